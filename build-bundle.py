@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+# Builds usr/share/snigdhaos-welcome/snigdhaos-welcome.pyz, the bundle the launcher runs.
+#
+# Every module is stored byte-compiled (unchecked hash pycs, nothing is stat'ed or
+# recompiled at start-up) next to its source, uncompressed so imports are plain reads.
+# The sources are the fallback when the bundle runs on another Python version, whose
+# magic number makes the interpreter ignore the pycs. Build it with the python3 the
+# package depends on, e.g. from the PKGBUILD:
+#
+#   python3 build-bundle.py
+
+import argparse
+import os
+import py_compile
+import sys
+import tempfile
+import zipfile
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "usr/share/snigdhaos-welcome")
+INSTALL_DIR = "/usr/share/snigdhaos-welcome"
+BUNDLE = "snigdhaos-welcome.pyz"
+# source tree only: the hyphenated script is replaced by __main__, freezer is a dev tool
+EXCLUDE = {"snigdhaos-welcome.py", "freezer.py"}
+
+MAIN = """\
+# generated by build-bundle.py
+if __name__ == "__main__":
+    from launcher import main
+
+    main()
+"""
+
+
+def modules(app_dir):
+    for root, dirs, files in os.walk(app_dir):
+        dirs[:] = sorted(d for d in dirs if d not in ("__pycache__", "images"))
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            relative = os.path.relpath(path, app_dir)
+            if name.endswith(".py") and relative not in EXCLUDE:
+                yield path, relative
+
+
+def compiled(source, relative, workdir):
+    # tracebacks point at the installed source tree
+    cfile = os.path.join(workdir, relative.replace(os.sep, "_") + "c")
+    py_compile.compile(
+        source,
+        cfile=cfile,
+        dfile=os.path.join(INSTALL_DIR, relative),
+        doraise=True,
+        invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH,
+    )
+    with open(cfile, "rb") as f:
+        return f.read()
+
+
+def build(app_dir=APP_DIR, output=None):
+    output = output or os.path.join(app_dir, BUNDLE)
+    temporary = output + ".tmp"
+    count = 0
+    with tempfile.TemporaryDirectory() as workdir:
+        main_source = os.path.join(workdir, "__main__.py")
+        with open(main_source, "w") as f:
+            f.write(MAIN)
+        entries = list(modules(app_dir)) + [(main_source, "__main__.py")]
+        with zipfile.ZipFile(temporary, "w", zipfile.ZIP_STORED) as bundle:
+            for source, relative in entries:
+                bundle.write(source, relative)
+                bundle.writestr(relative + "c", compiled(source, relative, workdir))
+                count += 1
+    os.replace(temporary, output)
+    print(
+        "[INFO]: %s: %d modules, %d KiB, %s"
+        % (output, count, os.path.getsize(output) // 1024, sys.implementation.cache_tag)
+    )
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the Snigdha OS Welcome bundle")
+    parser.add_argument("--output", help="bundle path, defaults to %s in the app directory" % BUNDLE)
+    args = parser.parse_args()
+    build(output=args.output)
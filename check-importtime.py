@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+# Import time budget check, run after build-bundle.py (CI or by hand):
+#
+#   python3 check-importtime.py [--bundle PATH] [--runs N]
+#
+# Every target is started N times with "python3 -I -X importtime" and the fastest run
+# counts, so a busy machine does not fail the check. The total is the sum of the
+# cumulative times of the top level imports. Exits 1 when a target is over its budget,
+# listing the slowest imports of that target.
+
+import argparse
+import os
+import subprocess
+import sys
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "usr/share/snigdhaos-welcome")
+
+# name -> (code run inside the bundle, budget in milliseconds), about twice the fastest
+# run measured on a loaded build machine so a busy CI worker does not fail at random
+TARGETS = {
+    # the command line front end must never pull in GTK (33-41 ms measured)
+    "cli": ("import launcher, snigdhaos_welcome.cli, snigdhaos_welcome.core.status", 80),
+    "gui": ("import launcher, welcome", 600),
+}
+FORBIDDEN = {"cli": ("gi",)}
+
+
+def parse(stderr):
+    """
+    Returns [(module, self us, cumulative us, depth)] from -X importtime output.
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3:
+            continue
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append((name.strip(), int(fields[0]), int(fields[1]), depth))
+    return imports
+
+
+def measure(path, code):
+    # the bundle (or the source directory) goes first on sys.path, as when launched
+    result = subprocess.run(
+        [sys.executable, "-I", "-X", "importtime", "-c", "import sys; sys.path.insert(0, %r); %s" % (path, code)],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed")
+    return parse(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the start-up import time budget")
+    parser.add_argument("--bundle", default=os.path.join(APP_DIR, "snigdhaos-welcome.pyz"))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target", action="append", choices=sorted(TARGETS), help="defaults to all")
+    args = parser.parse_args()
+
+    path = args.bundle if os.path.isfile(args.bundle) else APP_DIR
+    print("[INFO]: Measuring %s" % path)
+    failed = False
+    for name in args.target or sorted(TARGETS):
+        code, budget = TARGETS[name]
+        try:
+            runs = [measure(path, code) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print("[ERROR]: %s: %s" % (name, e))
+            failed = True
+            continue
+        imports = min(runs, key=lambda run: sum(cumulative for _, _, cumulative, depth in run if depth == 0))
+        total = sum(cumulative for _, _, cumulative, depth in imports if depth == 0) / 1000
+        over = total > budget
+        print("%s %-4s %7.1f ms (budget %d ms)" % ("[ERROR]:" if over else "[INFO]: ", name, total, budget))
+
+        loaded = {module for module, _, _, _ in imports}
+        for module in FORBIDDEN.get(name, ()):
+            if module in loaded:
+                print("[ERROR]: %s imports %s" % (name, module))
+                over = True
+        if over:
+            for module, own, cumulative, depth in sorted(imports, key=lambda entry: -entry[1])[:10]:
+                print("    %7.1f ms self %7.1f ms cumulative  %s" % (own / 1000, cumulative / 1000, module))
+        failed |= over
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,13 +3,21 @@ import os
 
 # Ensure the correct GTK version is available
 gi.require_version('Gtk', '3.0')
-from gi.repository import Gtk  # Import GTK for creating GUI components
+from gi.repository import Gtk, GLib  # Import GTK for creating GUI components
 
 # Get the directory of the current script to handle resource paths
 base_dir = os.path.dirname(os.path.realpath(__file__))
+if not os.path.isdir(os.path.join(base_dir, "images")):
+    # running from the bundle, the data files stay next to it
+    base_dir = os.path.dirname(base_dir)
 
 class Conflicts(Gtk.Window):
-    def __init__(self):
+    def __init__(self, engine=None, selected=None):
+        """
+        Args:
+            engine (conflictindex.ConflictIndex): Precomputed conflict index, None while it is built.
+            selected (list): Packages picked on the package search page.
+        """
         # Initialize the window with a title and default size
         super(Conflicts, self).__init__(title="Information")
         self.set_border_width(10)  # Add border width for better spacing
@@ -24,28 +32,39 @@ class Conflicts(Gtk.Window):
         vbox.set_homogeneous(False)  # Optional: Allow widgets to have different sizes
         self.add(vbox)  # Add the vertical box to the window
 
-        # List of warning messages and titles
-        warnings = [
-            ("Warning 1", "xcursor-breeze conflicts with breeze"),
-            ("Warning 2", "visual-studio-code-bin conflicts with code"),
-            ("Warning 3", "synapse (zeitgeist) conflicts with catfish"),
-            ("Warning 4", "Either choose libreoffice-fresh or libreoffice-still"),
-            ("Warning 5", "Either choose virtualbox for linux or linux-lts"),
-            ("Warning 6", "midori (zeitgeist) conflicts with catfish")
-        ]
+        # Conflicts are looked up in the precomputed index, nothing is computed here
+        warnings = []
+        if engine is None:
+            warnings.append(("Please wait", "Conflict information is still being collected"))
+        else:
+            for name, others in engine.clashes(selected or []):
+                warnings.append((name, "conflicts with " + ", ".join(others)))
+            for name, others in engine.installed_conflicts:
+                warnings.append(("%s (installed)" % name, "conflicts with " + ", ".join(others)))
+            if not warnings:
+                warnings.append(("No conflicts", "Nothing conflicts with the installed or selected packages"))
+
+        # Scrollable list, an installed system can have a long list of alternatives
+        vbox_warnings = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
+        scrolled.set_min_content_height(250)
+        scrolled.add(vbox_warnings)
+        vbox.pack_start(scrolled, True, True, 0)
 
         # Loop through each warning and create UI components dynamically
         for title, message in warnings:
             # Create a header label with bold and italic markup
             header = Gtk.Label(xalign=0)  # Align the header text to the left
-            header.set_markup(f"<b><i>{title}</i></b>")
-            vbox.pack_start(header, False, False, 0)  # Add header to the vertical box
-            
+            header.set_markup(f"<b><i>{GLib.markup_escape_text(title)}</i></b>")
+            vbox_warnings.pack_start(header, False, False, 0)  # Add header to the vertical box
+
             # Create a message label for each warning
             msg_label = Gtk.Label()
             msg_label.set_text(message)  # Set the message text
             msg_label.set_xalign(0)  # Align the message text to the left
-            vbox.pack_start(msg_label, False, False, 0)  # Add message label to the vertical box
+            msg_label.set_line_wrap(True)
+            vbox_warnings.pack_start(msg_label, False, False, 0)  # Add message label to the vertical box
 
         # Add a "Close" button at the bottom of the window
         close_button = Gtk.Button(label="Close")  # Create a button labeled "Close"
@@ -59,6 +78,8 @@ class Conflicts(Gtk.Window):
 # Main execution block: Runs when the script is executed directly
 if __name__ == "__main__":
     # Create an instance of the Conflicts window
-    window = Conflicts()
+    from snigdhaos_welcome.core import conflictindex, syncdb
+
+    window = Conflicts(conflictindex.ConflictIndex(syncdb.load()))
     window.show_all()  # Display all widgets in the window
     Gtk.main()  # Start the GTK event loop to handle user interactions
@@ -0,0 +1,220 @@
+import threading
+import time
+
+import gi
+
+gi.require_version("Gio", "2.0")
+from gi.repository import Gio, GLib
+
+from snigdhaos_welcome.core import install, mirrors, network, operations, preseed, status, tools
+
+# Session D-Bus interface of the running welcome app
+#
+# Other tools (first-boot scripts, a tray applet) reuse the warm process instead of
+# starting their own. Every action method returns an operation id at once and runs on a
+# worker thread. Progress and Completed signals carry that id. Operations are shared
+# with the GUI's own buttons through core.operations: a caller asking for an operation
+# that is already running, started over D-Bus or by a click, gets the id of the running
+# one and follows its signals. The Connected and PacmanLocked properties are polled by
+# the service itself for as long as it is exported, whatever the GUI is doing.
+#
+#   gdbus call --session --dest org.snigdhaos.Welcome --object-path /org/snigdhaos/Welcome \
+#       --method org.snigdhaos.Welcome1.EnsureTool gparted
+#   gdbus monitor --session --dest org.snigdhaos.Welcome
+#
+# The module runs on its own for testing against a private bus:
+#
+#   dbus-run-session -- python3 dbusservice.py
+
+BUS_NAME = "org.snigdhaos.Welcome"
+OBJECT_PATH = "/org/snigdhaos/Welcome"
+INTERFACE = "org.snigdhaos.Welcome1"
+# seconds between two polls of the Connected and PacmanLocked properties
+MONITOR_INTERVAL = 3
+
+INTROSPECTION = """
+<node>
+  <interface name="org.snigdhaos.Welcome1">
+    <method name="UpdateMirrors">
+      <arg type="s" name="operation" direction="out"/>
+    </method>
+    <method name="EnsureTool">
+      <arg type="s" name="package" direction="in"/>
+      <arg type="s" name="operation" direction="out"/>
+    </method>
+    <method name="StageProfile">
+      <arg type="s" name="profile" direction="in"/>
+      <arg type="b" name="dry_run" direction="in"/>
+      <arg type="s" name="operation" direction="out"/>
+    </method>
+    <method name="GetStatus">
+      <arg type="a{sv}" name="status" direction="out"/>
+    </method>
+    <signal name="Progress">
+      <arg type="s" name="operation"/>
+      <arg type="s" name="message"/>
+    </signal>
+    <signal name="Completed">
+      <arg type="s" name="operation"/>
+      <arg type="b" name="success"/>
+      <arg type="s" name="message"/>
+    </signal>
+    <property name="Connected" type="b" access="read"/>
+    <property name="PacmanLocked" type="b" access="read"/>
+  </interface>
+</node>
+"""
+
+
+class DBusService:
+    def __init__(self, peers=None, metrics=None, registry=None):
+        """
+        Args:
+            peers (callable): Returns the LAN package cache servers for UpdateMirrors.
+            metrics (metrics.Metrics): Records the duration of every operation as "dbus_<kind>".
+            registry (operations.Operations): Operations shared with the GUI.
+        """
+        self.peers = peers or (lambda: [])
+        self.metrics = metrics
+        self.connection = None
+        self.registration_id = None
+        self.owner_id = None
+        self.monitor_thread = None
+        self.operations = registry or operations.Operations()
+        self.operations.add_listener(self.on_operation_event)
+        self.properties = {"Connected": False, "PacmanLocked": install.is_locked()}
+
+    def start(self):
+        self.owner_id = Gio.bus_own_name(
+            Gio.BusType.SESSION,
+            BUS_NAME,
+            Gio.BusNameOwnerFlags.NONE,
+            self.on_bus_acquired,
+            None,
+            self.on_name_lost,
+        )
+
+    def on_bus_acquired(self, connection, name):
+        self.connection = connection
+        node = Gio.DBusNodeInfo.new_for_xml(INTROSPECTION)
+        self.registration_id = connection.register_object(
+            OBJECT_PATH,
+            node.interfaces[0],
+            self.on_method_call,
+            self.on_get_property,
+            None,
+        )
+        if self.monitor_thread is None:
+            self.monitor_thread = threading.Thread(target=self.monitor, daemon=True)
+            self.monitor_thread.start()
+
+    def on_name_lost(self, connection, name):
+        # another instance owns the name, or there is no session bus
+        print("[ERROR]: Cannot own %s on the session bus, D-Bus interface disabled" % name)
+
+    def on_method_call(self, connection, sender, path, interface, method, parameters, invocation):
+        args = parameters.unpack()
+        if method == "GetStatus":
+            # the connectivity probe blocks, collect the status on a worker
+            threading.Thread(target=self.get_status, args=(invocation,), daemon=True).start()
+            return
+        if method == "UpdateMirrors":
+            operation = self.run("mirrors", self.update_mirrors)
+        elif method == "EnsureTool":
+            operation = self.run("tool:" + args[0], self.ensure_tool, args[0])
+        elif method == "StageProfile":
+            # one installation at a time, whatever the profile
+            operation = self.run("profile", self.stage_profile, args[0], args[1])
+        else:
+            invocation.return_dbus_error("org.freedesktop.DBus.Error.UnknownMethod", method)
+            return
+        invocation.return_value(GLib.Variant("(s)", (operation,)))
+
+    def on_get_property(self, connection, sender, path, interface, name):
+        return GLib.Variant("b", self.properties[name])
+
+    def get_status(self, invocation):
+        state = status.collect()
+        result = {
+            key: GLib.Variant("b", state[key]) for key in ("live", "efi", "connected", "pacman_locked")
+        }
+        result["tools"] = GLib.Variant("a{sb}", state["tools"])
+        invocation.return_value(GLib.Variant("(a{sv})", (result,)))
+
+    def run(self, key, target, *args):
+        """
+        Starts target(operation, *args) through the shared registry, returns the
+        operation id callers follow in the signals.
+        """
+
+        def timed(operation, *args):
+            start = time.monotonic()
+            success, message = target(operation, *args)
+            if self.metrics is not None:
+                kind = "dbus_" + key.split(":", 1)[0]
+                self.metrics.record(kind, time.monotonic() - start, "ok" if success else "failed")
+            return success, message
+
+        return self.operations.run(key, timed, *args)[0]
+
+    def on_operation_event(self, event, operation, key, *values):
+        # GUI operations are signalled as well, a D-Bus caller may be following them
+        if event == "progress":
+            self.emit("Progress", GLib.Variant("(ss)", (operation, values[0])))
+        elif event == "completed":
+            self.emit("Completed", GLib.Variant("(sbs)", (operation, values[0], values[1])))
+
+    def progress(self, operation, message):
+        self.operations.progress(operation, message)
+
+    def emit(self, signal, parameters):
+        # signals go out from the main loop, workers only queue them
+        def emit_signal():
+            if self.connection is not None:
+                self.connection.emit_signal(None, OBJECT_PATH, INTERFACE, signal, parameters)
+            return False
+
+        GLib.idle_add(emit_signal)
+
+    def update_mirrors(self, operation):
+        return mirrors.update(lambda message, level: self.progress(operation, message), self.peers())
+
+    def ensure_tool(self, operation, package):
+        return tools.ensure(package, lambda line: self.progress(operation, line))
+
+    def stage_profile(self, operation, profile, dry_run):
+        lines = []
+
+        def log(line):
+            lines.append(line)
+            self.progress(operation, line)
+
+        rc = preseed.run(profile, dry_run, log)
+        return rc == 0, lines[-1] if lines else ""
+
+    def set_property(self, name, value):
+        # main loop only, emits PropertiesChanged when the value changed
+        if self.properties[name] == value:
+            return False
+        self.properties[name] = value
+        if self.connection is not None:
+            self.connection.emit_signal(
+                None,
+                OBJECT_PATH,
+                "org.freedesktop.DBus.Properties",
+                "PropertiesChanged",
+                GLib.Variant("(sa{sv}as)", (INTERFACE, {name: GLib.Variant("b", value)}, [])),
+            )
+        return False
+
+    def monitor(self):
+        # runs once the object is exported, the connectivity probe blocks up to 2 seconds
+        while True:
+            GLib.idle_add(self.set_property, "Connected", network.is_connected())
+            GLib.idle_add(self.set_property, "PacmanLocked", install.is_locked())
+            time.sleep(MONITOR_INTERVAL)
+
+
+if __name__ == "__main__":
+    DBusService().start()
+    GLib.MainLoop().run()
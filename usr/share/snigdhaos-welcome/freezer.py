@@ -1,23 +1,287 @@
-import subprocess
-
-def create_requirements_file(filename="requirements.txt"):
-    try:
-        # Run the pip freeze command and capture the output
-        result = subprocess.run(
-            ["pip", "freeze"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-        )
-        if result.returncode == 0:
-            # Write the output to the requirements.txt file
-            with open(filename, "w") as file:
-                file.write(result.stdout)
-            print(f"{filename} created successfully!")
+#!/usr/bin/env python3
+
+# Writes requirements.txt from the app's own imports, run by hand after adding an import:
+#
+#   python3 freezer.py [--output PATH] [--pin]
+#
+# "pip freeze" listed whatever the developer machine had installed. Instead the import
+# graph is walked statically (ast, nothing is imported) from the entry points: imports
+# of the app's own modules are followed, the standard library is dropped and the
+# remaining top level modules are mapped to their distributions. Imports guarded by
+# "except ImportError" are optional and only listed as comments, so are the GObject
+# introspection namespaces, which come from system packages rather than from pip.
+#
+# A size report compares the installed size (with dependencies, as far as they are
+# installed here) of the new requirements with the ones they replace.
+
+import argparse
+import ast
+import importlib.metadata
+import os
+import re
+import sys
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+# the scripts started directly, see their __main__ blocks
+ENTRY_POINTS = ["snigdhaos-welcome.py", "conflicts.py", "dbusservice.py"]
+# used when the distribution is not installed where this runs
+KNOWN_DISTRIBUTIONS = {"gi": "PyGObject", "cairo": "pycairo", "zstandard": "zstandard"}
+
+
+def module_file(name, app_dir=APP_DIR):
+    """
+    Returns the file of one of the app's own modules, None for anything else.
+    """
+    base = os.path.join(app_dir, *name.split("."))
+    for path in (base + ".py", os.path.join(base, "__init__.py")):
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def is_local(name, app_dir=APP_DIR):
+    # ui/ has no __init__.py, a namespace package is the app's as well
+    return module_file(name, app_dir) is not None or os.path.isdir(os.path.join(app_dir, *name.split(".")))
+
+
+def module_name(path, app_dir=APP_DIR):
+    relative = os.path.relpath(path, app_dir)[: -len(".py")]
+    parts = relative.split(os.sep)
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts)
+
+
+def optional_lines(tree):
+    # lines of the try bodies with an "except ImportError" (or ModuleNotFoundError)
+    lines = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Try):
+            continue
+        for handler in node.handlers:
+            names = handler.type.elts if isinstance(handler.type, ast.Tuple) else [handler.type]
+            if any(isinstance(n, ast.Name) and n.id in ("ImportError", "ModuleNotFoundError") for n in names):
+                for statement in node.body:
+                    lines.update(range(statement.lineno, statement.end_lineno + 1))
+                break
+    return lines
+
+
+def imports(path, app_dir=APP_DIR):
+    """
+    Returns [(absolute module name, optional, line)] imported anywhere in the file,
+    function level imports included. "from package import name" also yields
+    package.name, which is kept when it is one of the app's modules.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    optional = optional_lines(tree)
+    package = module_name(path, app_dir)
+    if not path.endswith("__init__.py"):
+        package = package.rpartition(".")[0]
+
+    found = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                parts = package.split(".") if package else []
+                base = ".".join(parts[: len(parts) - node.level + 1] + ([node.module] if node.module else []))
+            else:
+                base = node.module
+            names = [base] + ["%s.%s" % (base, alias.name) for alias in node.names if alias.name != "*"]
         else:
-            print("Error generating requirements:", result.stderr)
-    except Exception as e:
-        print(f"An error occurred: {e}")
+            continue
+        for name in names:
+            found.append((name, node.lineno in optional, node.lineno))
+    return found
+
+
+def gi_namespaces(path):
+    # "from gi.repository import Gtk" and gi.require_version("Gtk", "3.0")
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    namespaces = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and node.module == "gi.repository":
+            for alias in node.names:
+                namespaces.setdefault(alias.name, None)
+        elif (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and node.func.attr == "require_version"
+            and len(node.args) == 2
+            and all(isinstance(a, ast.Constant) for a in node.args)
+        ):
+            namespaces[node.args[0].value] = node.args[1].value
+    return namespaces
+
+
+def walk(entry_points=ENTRY_POINTS, app_dir=APP_DIR):
+    """
+    Follows the imports from the entry points through the app's own modules.
+
+    Returns:
+        tuple: ({top level module: [(file, line, optional)]}, {gi namespace: version}, [visited files])
+    """
+    external = {}
+    namespaces = {}
+    queue = [os.path.join(app_dir, name) for name in entry_points]
+    visited = set()
+    while queue:
+        path = queue.pop()
+        if path in visited:
+            continue
+        visited.add(path)
+        for name, optional, line in imports(path, app_dir):
+            local = module_file(name, app_dir)
+            if local is not None:
+                queue.append(local)
+                # importing a.b.c runs a/__init__.py and a/b/__init__.py as well
+                parts = name.split(".")
+                queue.extend(p for p in (module_file(".".join(parts[:i]), app_dir) for i in range(1, len(parts))) if p)
+                continue
+            top = name.partition(".")[0]
+            if is_local(top, app_dir) or top in sys.stdlib_module_names or top == "__future__":
+                # a name imported from one of the app's modules, or the standard library
+                continue
+            place = (os.path.relpath(path, app_dir), line, optional)
+            if place not in external.setdefault(top, []):
+                external[top].append(place)
+        for namespace, version in gi_namespaces(path).items():
+            if namespaces.get(namespace) is None:
+                namespaces[namespace] = version
+    return external, namespaces, sorted(os.path.relpath(p, app_dir) for p in visited)
+
+
+def distribution(module):
+    installed = importlib.metadata.packages_distributions().get(module)
+    if installed:
+        return installed[0]
+    return KNOWN_DISTRIBUTIONS.get(module, module)
+
+
+def requirement_name(line):
+    match = re.match(r"\s*([A-Za-z0-9][A-Za-z0-9._-]*)", line)
+    return match.group(1) if match and not line.lstrip().startswith(("#", "-")) else None
+
+
+def canonical(name):
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def installed_size(names):
+    """
+    Returns (bytes, installed distributions, missing names) for the distributions and
+    the ones they require, as far as they are installed here.
+    """
+    seen = set()
+    total = 0
+    found = []
+    missing = []
+    queue = list(names)
+    while queue:
+        name = queue.pop()
+        if canonical(name) in seen:
+            continue
+        seen.add(canonical(name))
+        try:
+            dist = importlib.metadata.distribution(name)
+        except importlib.metadata.PackageNotFoundError:
+            missing.append(name)
+            continue
+        found.append(dist.metadata["Name"])
+        total += distribution_size(dist)
+        for requirement in dist.requires or []:
+            # extras are not installed by a plain requirement
+            if "extra ==" not in requirement:
+                queue.append(requirement_name(requirement))
+    return total, found, missing
+
+
+def distribution_size(dist):
+    if dist.files is not None:
+        files = [dist.locate_file(file) for file in dist.files]
+    else:
+        # distribution packages often ship an egg-info without RECORD
+        files = []
+        for top in (dist.read_text("top_level.txt") or "").split():
+            location = str(dist.locate_file(top))
+            for root, _, names in os.walk(location):
+                files.extend(os.path.join(root, name) for name in names)
+            if os.path.isfile(location + ".py"):
+                files.append(location + ".py")
+    total = 0
+    for path in files:
+        try:
+            total += os.path.getsize(path)
+        except OSError:
+            pass
+    return total
+
+
+def format_size(size):
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024 or unit == "GiB":
+            return "%.1f %s" % (size, unit) if unit != "B" else "%d B" % size
+        size /= 1024
+
+
+def render(external, namespaces, entry_points, pin=False):
+    lines = [
+        "# generated by freezer.py from the imports of %s" % ", ".join(entry_points),
+        "# the standard library and the app's own modules are not listed",
+    ]
+    required = []
+    optional = []
+    for module, places in sorted(external.items()):
+        name = distribution(module)
+        if pin:
+            try:
+                name += "==" + importlib.metadata.version(name)
+            except importlib.metadata.PackageNotFoundError:
+                pass
+        if all(is_optional for _, _, is_optional in places):
+            optional.append("# %s  (optional, %s:%d)" % (name, places[0][0], places[0][1]))
+        else:
+            required.append(name)
+    lines += required + optional
+    if namespaces:
+        versions = ", ".join("%s %s" % (n, v) if v else n for n, v in sorted(namespaces.items()))
+        lines.append("# GObject introspection from the system packages: %s" % versions)
+    return "\n".join(lines) + "\n", required
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write requirements.txt from the app's imports")
+    parser.add_argument("--output", default=os.path.join(APP_DIR, "requirements.txt"))
+    parser.add_argument("--pin", action="store_true", help="pin the versions installed here")
+    args = parser.parse_args()
+
+    external, namespaces, visited = walk()
+    text, required = render(external, namespaces, ENTRY_POINTS, args.pin)
+
+    previous = []
+    if os.path.isfile(args.output):
+        with open(args.output, "r") as f:
+            previous = [name for name in map(requirement_name, f) if name]
+    with open(args.output, "w") as f:
+        f.write(text)
+
+    print("%d modules walked, %s written" % (len(visited), args.output))
+    for module, places in sorted(external.items()):
+        kind = "optional" if all(optional for _, _, optional in places) else "required"
+        print("  %-12s %-8s imported as %s in %d file(s), first in %s:%d" % ((distribution(module), kind, module, len({p[0] for p in places})) + places[0][:2]))
+
+    # installed size here, with dependencies
+    print("Size report:")
+    for label, names in (("before", previous), ("after", [requirement_name(r) for r in required])):
+        size, found, missing = installed_size(names)
+        print("  %-6s %3d requirement(s), %3d distribution(s) installed here, %s" % (label, len(names), len(found), format_size(size)))
+        if missing:
+            print("         not installed here, size unknown: %s" % ", ".join(sorted(missing)[:10]) + (" ..." if len(missing) > 10 else ""))
+
 
-# Call the function to create the requirements.txt file
-create_requirements_file()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import sys
+
+# Entry point shared by snigdhaos-welcome.py (source tree) and the bundle built by
+# build-bundle.py. Command line front end arguments never import GTK.
+
+CLI_ARGUMENTS = {
+    "mirrors",
+    "install-tool",
+    "stage-profile",
+    "hardware",
+    "status",
+    "stats",
+    "--preseed",
+    "--stats",
+    "-h",
+    "--help",
+}
+
+
+def take_root(argv):
+    # "--root PATH" / "--root=PATH" anywhere on the command line, for the GUI as well
+    for i, argument in enumerate(argv):
+        if argument == "--root" and i + 1 < len(argv):
+            return argv[i + 1], argv[:i] + argv[i + 2 :]
+        if argument.startswith("--root="):
+            return argument.split("=", 1)[1], argv[:i] + argv[i + 1 :]
+    return None, argv
+
+
+def apply_root(argv):
+    """
+    Sets the system root from the command line, the only place --root is parsed, and
+    returns the remaining arguments.
+    """
+    root, argv = take_root(argv)
+    if root is not None:
+        from snigdhaos_welcome.core import paths
+
+        paths.set_root(root)
+    return argv
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    argv = apply_root(argv)
+    if argv[:1] and argv[0] in CLI_ARGUMENTS:
+        from snigdhaos_welcome.cli import main as cli_main
+
+        sys.exit(cli_main(argv))
+
+    # Allocation tracking has to start before GTK and friends are imported
+    if "--memory-report" in argv:
+        import tracemalloc
+
+        tracemalloc.start()
+
+    import welcome
+
+    welcome.main()
@@ -0,0 +1,101 @@
+import gi
+
+gi.require_version("Gdk", "3.0")
+from gi.repository import Gdk, GLib
+
+from snigdhaos_welcome.core import memreport
+
+# Low-footprint resident mode
+#
+# With autostart the window can stay around for a whole session. Two levels of
+# resources are released and rebuilt on demand:
+#
+#   idle    the window has been unfocused for IDLE_SECONDS: background monitors pause
+#   hidden  the window is minimised or unmapped: decoded images and the stack pages
+#           that are not shown are dropped as well
+#
+# Each level calls its release callbacks in order and its restore callbacks in reverse,
+# after which freed memory is trimmed so the RSS really goes down.
+
+IDLE_SECONDS = 300
+
+
+class ResidentMode:
+    def __init__(self, window, idle_seconds=IDLE_SECONDS, on_change=None):
+        """
+        Args:
+            window (Gtk.Window): Window whose focus and visibility drive the mode.
+            idle_seconds (int): Unfocused time before the idle level is entered.
+            on_change (callable): Called with the current level ("active", "idle" or "hidden").
+        """
+        self.window = window
+        self.idle_seconds = idle_seconds
+        self.on_change = on_change
+        self.callbacks = {"idle": [], "hidden": []}
+        self.active_levels = []
+        self.idle_timer = None
+
+        window.connect("focus-out-event", self.on_focus_out)
+        window.connect("focus-in-event", self.on_focus_in)
+        window.connect("window-state-event", self.on_window_state)
+        window.connect("unmap-event", lambda *args: self.enter("hidden"))
+        window.connect("map-event", lambda *args: self.leave("hidden"))
+
+    def add(self, level, release, restore):
+        self.callbacks[level].append((release, restore))
+
+    @property
+    def level(self):
+        return self.active_levels[-1] if self.active_levels else "active"
+
+    def enter(self, level):
+        # "hidden" implies "idle"
+        if level == "hidden" and "idle" not in self.active_levels:
+            self.enter("idle")
+        if level in self.active_levels:
+            return False
+        for release, restore in self.callbacks[level]:
+            release()
+        self.active_levels.append(level)
+        memreport.trim()
+        if self.on_change is not None:
+            self.on_change(self.level)
+        return False
+
+    def leave(self, level):
+        # leaving "idle" leaves "hidden" too
+        if level == "idle" and "hidden" in self.active_levels:
+            self.leave("hidden")
+        if level not in self.active_levels:
+            return False
+        for release, restore in reversed(self.callbacks[level]):
+            restore()
+        self.active_levels.remove(level)
+        if self.on_change is not None:
+            self.on_change(self.level)
+        return False
+
+    def on_focus_out(self, widget, event):
+        if self.idle_timer is None:
+            self.idle_timer = GLib.timeout_add_seconds(self.idle_seconds, self.on_idle_timeout)
+        return False
+
+    def on_focus_in(self, widget, event):
+        if self.idle_timer is not None:
+            GLib.source_remove(self.idle_timer)
+            self.idle_timer = None
+        self.leave("idle")
+        return False
+
+    def on_idle_timeout(self):
+        self.idle_timer = None
+        self.enter("idle")
+        return False
+
+    def on_window_state(self, widget, event):
+        if event.changed_mask & Gdk.WindowState.ICONIFIED:
+            if event.new_window_state & Gdk.WindowState.ICONIFIED:
+                self.enter("hidden")
+            else:
+                self.leave("hidden")
+        return False
@@ -0,0 +1,7 @@
+import sys
+
+from launcher import apply_root
+from snigdhaos_welcome.cli import main
+
+# "python3 -m snigdhaos_welcome" from the application directory, --root as in the launcher
+sys.exit(main(apply_root(sys.argv[1:])))
@@ -0,0 +1,146 @@
+import argparse
+import json
+import sys
+
+# Command line front end
+#
+#   snigdhaos-welcome mirrors [--rollback]
+#   snigdhaos-welcome install-tool <package>
+#   snigdhaos-welcome stage-profile <profile.toml> [--dry-run]
+#   snigdhaos-welcome status [--json]
+#   snigdhaos-welcome stats [--days N]
+#   snigdhaos-welcome hardware [--refresh] [--json]
+#
+# --root PATH (or SNIGDHAOS_WELCOME_ROOT) runs any command against another system tree,
+# e.g. a freshly installed target mounted at /mnt, see core/paths.py.
+#
+# Core modules are imported inside the commands so that every command only pays for
+# what it uses, and nothing here ever imports gi.
+
+
+def cmd_mirrors(args):
+    from snigdhaos_welcome.core import lancache, mirrors
+
+    def on_status(message, level):
+        print("[%s]: %s" % ("INFO" if level == "info" else level.upper(), message.replace("\n", " ")))
+
+    if args.rollback:
+        if not mirrors.has_previous():
+            print("[ERROR]: No previous mirrorlist to restore")
+            return 1
+        return 0 if mirrors.rollback(on_status) else 1
+
+    peers = []
+    if args.discover:
+        # listen for one announcement period before ranking
+        try:
+            discovery = lancache.PeerDiscovery()
+        except OSError as e:
+            print("[ERROR]: LAN package cache discovery unavailable: %s" % e)
+        else:
+            discovery.start()
+            discovery.stopped.wait(lancache.ANNOUNCE_INTERVAL + 1)
+            peers = discovery.peers()
+            discovery.stop()
+
+    ok, summary = mirrors.update(on_status, peers)
+    print(summary)
+    return 0 if ok else 1
+
+
+def cmd_install_tool(args):
+    from snigdhaos_welcome.core import tools
+
+    ok, message = tools.ensure(args.package)
+    print("[%s]: %s" % ("INFO" if ok else "ERROR", message))
+    return 0 if ok else 1
+
+
+def cmd_stage_profile(args):
+    from snigdhaos_welcome.core import preseed
+
+    return preseed.run(args.profile, args.dry_run)
+
+
+def cmd_status(args):
+    from snigdhaos_welcome.core import status
+
+    state = status.collect()
+    if args.json:
+        print(json.dumps(state, indent=2, sort_keys=True))
+        return 0
+    if state["root"] != "/":
+        print("Root:           %s" % state["root"])
+    print("Session:        %s" % ("live" if state["live"] else "installed"))
+    print("Firmware:       %s" % ("EFI" if state["efi"] else "BIOS"))
+    print("Internet:       %s" % ("connected" if state["connected"] else "offline"))
+    print("Pacman:         %s" % ("locked" if state["pacman_locked"] else "idle"))
+    for package, installed in sorted(state["tools"].items()):
+        print("Tool %-10s %s" % (package + ":", "installed" if installed else "not installed"))
+    return 0
+
+
+def cmd_stats(args):
+    from snigdhaos_welcome.core import metrics
+
+    print(metrics.report(days=args.days))
+    return 0
+
+
+def cmd_hardware(args):
+    from snigdhaos_welcome.core import hardware
+
+    inventory = hardware.snapshot(refresh=args.refresh)
+    if args.json:
+        print(json.dumps(inventory, indent=2, sort_keys=True))
+    else:
+        print(hardware.report(inventory), end="")
+    return 0
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    # the preseed option of earlier releases
+    if argv[:1] == ["--preseed"]:
+        argv = ["stage-profile"] + argv[1:]
+    elif argv[:1] == ["--stats"]:
+        argv = ["stats"] + argv[1:]
+
+    parser = argparse.ArgumentParser(
+        prog="snigdhaos-welcome",
+        description="Snigdha OS Welcome without the GUI",
+        # taken off the command line by launcher.apply_root() before this parser runs
+        epilog="--root PATH anywhere on the command line works on another system root, defaults to /",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    mirrors = commands.add_parser("mirrors", help="rank the Arch and Chaotic AUR mirrors")
+    mirrors.add_argument("--no-discover", dest="discover", action="store_false", help="do not look for LAN package caches")
+    mirrors.add_argument("--rollback", action="store_true", help="restore the mirrorlists replaced by the last update")
+    mirrors.set_defaults(func=cmd_mirrors)
+
+    install_tool = commands.add_parser("install-tool", help="install a tool offered by the welcome app")
+    install_tool.add_argument("package")
+    install_tool.set_defaults(func=cmd_install_tool)
+
+    stage_profile = commands.add_parser("stage-profile", help="unattended installation from a preseed profile")
+    stage_profile.add_argument("profile", metavar="PROFILE", help="TOML preseed profile")
+    stage_profile.add_argument("--dry-run", action="store_true", help="validate and check only, do not install")
+    stage_profile.set_defaults(func=cmd_stage_profile)
+
+    status = commands.add_parser("status", help="show the session, network and tool state")
+    status.add_argument("--json", action="store_true")
+    status.set_defaults(func=cmd_status)
+
+    stats = commands.add_parser("stats", help="p50/p95 durations of recorded operations")
+    stats.add_argument("--days", type=int, default=30, help="report period, defaults to 30 days")
+    stats.set_defaults(func=cmd_stats)
+
+    hardware = commands.add_parser("hardware", help="hardware report for support requests")
+    hardware.add_argument("--refresh", action="store_true", help="ignore the snapshot taken in this boot")
+    hardware.add_argument("--json", action="store_true")
+    hardware.set_defaults(func=cmd_hardware)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,4 @@
+# GTK-free core of Snigdha OS Welcome
+#
+# Everything here runs without gi, so the command line front end (and anything
+# scripted) starts without loading GTK. The GUI under ui/ is a layer on top.
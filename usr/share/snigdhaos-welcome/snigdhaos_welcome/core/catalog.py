@@ -0,0 +1,75 @@
+from collections import namedtuple
+
+from . import paths
+
+# Declarative catalog of the utilities offered by the welcome app. GUI.GUI renders one
+# button per applicable tool and the install/launch flow is shared, so adding a tool
+# only means adding an entry to TOOLS.
+#
+#   package    pacman package providing the tool
+#   binary     executable launched once installed
+#   name       human readable name used in labels
+#   tooltip
+#   session    only offered on this XDG_SESSION_TYPE, None for any session
+#   live_only  only offered in the live session
+#
+# A namedtuple rather than a dataclass: dataclasses pulls in inspect and ast, about a
+# third of the command line front end's start-up imports.
+
+
+class Tool(namedtuple("Tool", "package binary name tooltip session live_only", defaults=(None, False))):
+    __slots__ = ()
+
+    def available(self, session, live):
+        if self.live_only and not live:
+            return False
+        return self.session is None or self.session == session
+
+    def label(self, installed):
+        # installed is None while the startup status scan is still running
+        if installed is None:
+            return self.name
+        if installed:
+            return "Launch %s" % self.name
+        return "Install & launch %s" % self.name
+
+    def app_cmd(self):
+        return [self.binary]
+
+    def pacman_cmd(self, extra_args=()):
+        return (
+            ["pkexec", "pacman"]
+            + paths.pacman_args()
+            + [
+                "-Sy",  # Synchronize package databases
+                self.package,
+                "--noconfirm",  # Skip confirmation prompts
+                "--needed",  # Only install if not already installed
+            ]
+            + list(extra_args)
+        )
+
+
+TOOLS = [
+    Tool(
+        package="gparted",
+        binary="/usr/bin/gparted",
+        name="GParted",
+        tooltip="Partition your disks before installing Snigdha OS",
+        live_only=True,
+    ),
+    Tool(
+        package="arandr",
+        binary="/usr/bin/arandr",
+        name="Arandr",
+        tooltip="Fix your screen resolution",
+        session="x11",
+    ),
+]
+
+
+def get_tool(package):
+    for tool in TOOLS:
+        if tool.package == package:
+            return tool
+    return None
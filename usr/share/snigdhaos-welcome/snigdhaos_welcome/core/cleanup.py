@@ -0,0 +1,32 @@
+from . import packages
+from . import paths
+
+# Post-install cleanup of packages that only make sense on the live ISO. The list is
+# matched against the local pacman database, anything not installed is ignored, and
+# the remaining packages are removed in a single pacman transaction.
+
+LIVE_PACKAGES = [
+    # installer
+    "calamares",
+    "snigdhaos-calamares",
+    "snigdhaos-calamares-config",
+    "ckbcomp",
+    # live hooks
+    "mkinitcpio-archiso",
+    "snigdhaos-live-hooks",
+    # dev tools pulled in for building the ISO
+    "archiso",
+    "snigdhaos-dev-tools",
+]
+
+
+def live_packages():
+    """
+    Returns {name: installed size in bytes} of the live-only packages still installed.
+    """
+    return packages.installed_sizes(LIVE_PACKAGES)
+
+
+def pacman_cmd(names):
+    # one -Rns transaction for every package, dependencies that become orphans go too
+    return ["pkexec", "pacman"] + paths.pacman_args() + ["-Rns", "--noconfirm"] + sorted(names)
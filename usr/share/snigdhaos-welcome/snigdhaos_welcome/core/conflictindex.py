@@ -0,0 +1,100 @@
+import os
+import re
+
+from . import packages
+
+# Conflict engine built from repository metadata
+#
+# Every package provides its own name plus its %PROVIDES% entries. The %CONFLICTS% and
+# %REPLACES% entries of a package are resolved against those providers once, when the
+# index is built, so asking "what conflicts with X" afterwards is a dict lookup even
+# with tens of thousands of packages indexed. Conflicts are stored symmetrically.
+
+VERSION_CONSTRAINT = re.compile(r"[<>=].*$")
+
+
+def strip_version(dependency):
+    # "foo>=1.0" -> "foo"
+    return VERSION_CONSTRAINT.sub("", dependency)
+
+
+class ConflictIndex:
+    def __init__(self, package_index=None, local_db=True):
+        """
+        Args:
+            package_index (syncdb.PackageIndex): Sync database index, may be None.
+            local_db (bool): Also index the installed packages (covers foreign/AUR packages).
+        """
+        self.providers = {}  # provided name -> set of package names
+        self.declared = {}  # package name -> set of names it conflicts with or replaces
+        self.conflicting = {}  # package name -> set of package names it conflicts with
+        self.installed = set()
+
+        if package_index is not None:
+            for i in range(len(package_index)):
+                record = package_index.record(i)
+                self.add(
+                    record["name"],
+                    record["provides"].split(),
+                    record["conflicts"].split() + record["replaces"].split(),
+                )
+
+        if local_db:
+            for name, path in packages.local_entries().items():
+                self.installed.add(name)
+                if name in self.declared:
+                    continue
+                try:
+                    desc = packages.read_desc(os.path.join(path, "desc"))
+                except OSError:
+                    continue
+                self.add(
+                    name,
+                    desc.get("PROVIDES", []),
+                    desc.get("CONFLICTS", []) + desc.get("REPLACES", []),
+                )
+
+        self.resolve()
+        self.installed_conflicts = self.conflicts_for(self.installed)
+
+    def add(self, name, provides, conflicts):
+        self.providers.setdefault(name, set()).add(name)
+        for provided in provides:
+            self.providers.setdefault(strip_version(provided), set()).add(name)
+        self.declared[name] = {strip_version(conflict) for conflict in conflicts}
+
+    def resolve(self):
+        for name, declared in self.declared.items():
+            for conflict in declared:
+                for other in self.providers.get(conflict, ()):
+                    # a package providing the name it conflicts with is a common idiom
+                    if other == name:
+                        continue
+                    self.conflicting.setdefault(name, set()).add(other)
+                    self.conflicting.setdefault(other, set()).add(name)
+
+    def conflicts_for(self, names):
+        """
+        Returns a sorted list of (package, [conflicting packages]) for the given names.
+        Installed counterparts are listed first.
+        """
+        result = []
+        for name in sorted(names):
+            others = self.conflicting.get(name)
+            if others:
+                ordered = sorted(others, key=lambda other: (other not in self.installed, other))
+                result.append((name, ordered))
+        return result
+
+    def clashes(self, selected):
+        """
+        Returns (package, [installed or selected packages]) for every selected package
+        that cannot be installed next to the current system or the rest of the selection.
+        """
+        wanted = self.installed | set(selected)
+        result = []
+        for name in sorted(selected):
+            others = sorted(self.conflicting.get(name, set()) & wanted)
+            if others:
+                result.append((name, others))
+        return result
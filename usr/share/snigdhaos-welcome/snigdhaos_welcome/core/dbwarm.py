@@ -0,0 +1,233 @@
+import email.utils
+import os
+import platform
+import subprocess
+import threading
+import urllib.error
+import urllib.request
+from os.path import expanduser
+
+from . import install
+from . import packages
+from . import paths
+from . import prefetch
+from . import syncdb
+
+# Sync database and keyring warm-up for the online installation
+#
+# An online installation starts by syncing the pacman databases and often by updating
+# the keyrings. Once the live session is online the databases are downloaded into a
+# user owned side --dbpath at low priority, with If-Modified-Since against the system
+# copies like pacman does: a repository that is up to date is only a symlink to the
+# system database. The side dbpath's "local" is a symlink to the real local database,
+# so "pacman -Sp --needed" there lists the installed keyrings that are out of date, and
+# those packages are pre-downloaded as well.
+#
+# When the online installation is launched swap_commands() copies the new databases
+# next to the system ones and renames them into place (one atomic rename per
+# database), and puts the keyring packages into the package cache. Calamares' own
+# sync then finds everything up to date. Nothing is swapped for the offline one.
+
+SIDE_DIR = os.path.join(expanduser("~"), ".cache/snigdhaos-welcome/dbwarm")
+PACMAN_CONF = "/etc/pacman.conf"
+KEYRINGS = ["archlinux-keyring", "chaotic-keyring"]
+TIMEOUT = 30
+# seconds the launch waits for a stopped warmer, a download in flight is abandoned then
+STOP_TIMEOUT = 5
+
+
+def pacman_conf(*args):
+    # pacman-conf ships with pacman and needs no root
+    process = subprocess.run(
+        ["pacman-conf", "--config", paths.resolve(PACMAN_CONF)] + list(args),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        universal_newlines=True,
+        check=True,
+    )
+    return process.stdout.split()
+
+
+def repositories():
+    """
+    Returns [(repo, [database urls])], servers in mirrorlist order.
+    """
+    architecture = platform.machine()
+    try:
+        configured = pacman_conf("Architecture")
+        if configured and configured[0] != "auto":
+            architecture = configured[0]
+        result = []
+        for repo in pacman_conf("--repo-list"):
+            servers = pacman_conf("--repo", repo, "Server")
+            result.append(
+                (repo, [server.replace("$repo", repo).replace("$arch", architecture) + "/%s.db" % repo for server in servers])
+            )
+        return result
+    except (OSError, subprocess.CalledProcessError) as e:
+        print("[ERROR]: Cannot read the pacman configuration: %s" % e)
+        return []
+
+
+class DatabaseWarmer(threading.Thread):
+    def __init__(self, side_dir=SIDE_DIR, keyrings=KEYRINGS):
+        """
+        Args:
+            side_dir (str): Side dbpath receiving the databases and keyring packages.
+            keyrings (list): Keyring packages refreshed when installed and out of date.
+        """
+        super(DatabaseWarmer, self).__init__(daemon=True)
+        self.side_dir = side_dir
+        self.keyrings = keyrings
+        self.stopped = threading.Event()
+        self.done = threading.Event()
+        self.lock = threading.Lock()
+        self.fresh = []  # repos whose side database is newer than the system one
+        self.keyring_files = []  # downloaded keyring packages
+
+    def stop(self):
+        self.stopped.set()
+
+    def run(self):
+        try:
+            # Linux threads carry their own nice value
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except OSError:
+            pass
+        try:
+            self.prepare()
+            for repo, urls in repositories():
+                if self.stopped.is_set():
+                    return
+                if self.sync(repo, urls):
+                    with self.lock:
+                        self.fresh.append(repo)
+            if not self.stopped.is_set():
+                self.refresh_keyrings()
+            print(
+                "[INFO]: Database warm-up done: %d newer database(s), %d keyring package(s)"
+                % (len(self.fresh), len(self.keyring_files))
+            )
+        except OSError as e:
+            print("[ERROR]: Database warm-up failed: %s" % e)
+        finally:
+            self.done.set()
+
+    def prepare(self):
+        sync_dir = os.path.join(self.side_dir, "sync")
+        os.makedirs(sync_dir, exist_ok=True)
+        os.makedirs(os.path.join(self.side_dir, "pkg"), exist_ok=True)
+        local = os.path.join(self.side_dir, "local")
+        if not os.path.islink(local):
+            os.symlink(paths.resolve(packages.LOCAL_DB), local)
+        # leftovers of an earlier session
+        for name in os.listdir(sync_dir):
+            os.unlink(os.path.join(sync_dir, name))
+
+    def sync(self, repo, urls):
+        """
+        Brings the side database of repo up to date, returns True when it is newer than
+        the system database.
+        """
+        system_db = os.path.join(paths.resolve(syncdb.SYNC_DIR), repo + ".db")
+        side_db = os.path.join(self.side_dir, "sync", repo + ".db")
+        headers = {}
+        if os.path.isfile(system_db):
+            headers["If-Modified-Since"] = email.utils.formatdate(os.stat(system_db).st_mtime, usegmt=True)
+
+        for url in urls:
+            if self.stopped.is_set():
+                break
+            try:
+                request = urllib.request.Request(url, headers=headers)
+                with urllib.request.urlopen(request, timeout=TIMEOUT) as response, open(side_db + ".part", "wb") as f:
+                    while not self.stopped.is_set():
+                        chunk = response.read(64 * 1024)
+                        if not chunk:
+                            break
+                        f.write(chunk)
+                    last_modified = response.headers.get("Last-Modified")
+                if self.stopped.is_set():
+                    os.unlink(side_db + ".part")
+                    break
+                # pacman stores the server time, later If-Modified-Since requests rely on it
+                if last_modified:
+                    mtime = email.utils.parsedate_to_datetime(last_modified).timestamp()
+                    os.utime(side_db + ".part", (mtime, mtime))
+                os.replace(side_db + ".part", side_db)
+                return True
+            except urllib.error.HTTPError as e:
+                if e.code == 304:
+                    break
+                print("[INFO]: Database warm-up: %s: %s" % (url, e))
+            except (OSError, ValueError) as e:
+                print("[INFO]: Database warm-up: %s: %s" % (url, e))
+            try:
+                os.unlink(side_db + ".part")
+            except OSError:
+                pass
+
+        # unchanged (or unreachable): the system copy stands in for the keyring check
+        if os.path.isfile(system_db) and not os.path.lexists(side_db):
+            os.symlink(system_db, side_db)
+        return False
+
+    def refresh_keyrings(self):
+        installed = sorted(packages.installed_packages(self.keyrings))
+        if not installed:
+            return
+        try:
+            process = subprocess.run(
+                ["pacman", "--config", paths.resolve(PACMAN_CONF), "--dbpath", self.side_dir]
+                + ["-Sp", "--needed", "--print-format", "%l"]
+                + installed,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                universal_newlines=True,
+                check=True,
+            )
+        except (OSError, subprocess.CalledProcessError) as e:
+            print("[ERROR]: Keyring check failed: %s" % e)
+            return
+        for url in (line.strip() for line in process.stdout.splitlines()):
+            if "://" not in url or self.stopped.is_set():
+                continue
+            # the detached signature goes along, a package is only listed with it
+            downloaded = []
+            for file_url in (url, url + ".sig"):
+                dest = os.path.join(self.side_dir, "pkg", os.path.basename(file_url))
+                try:
+                    if not os.path.isfile(dest):
+                        with urllib.request.urlopen(file_url, timeout=TIMEOUT) as response, open(dest + ".part", "wb") as f:
+                            while chunk := response.read(64 * 1024):
+                                f.write(chunk)
+                        os.replace(dest + ".part", dest)
+                    downloaded.append(dest)
+                except OSError as e:
+                    print("[INFO]: Keyring download of %s failed: %s" % (file_url, e))
+                    break
+            if len(downloaded) == 2:
+                with self.lock:
+                    self.keyring_files.extend(downloaded)
+
+    def swap_commands(self):
+        """
+        Returns the commands moving the warmed databases and keyring packages into the
+        system, empty while pacman is running. Databases are copied under a temporary
+        name first so every database is replaced by a single rename.
+        """
+        if install.is_locked():
+            return []
+        sync_dir = paths.resolve(syncdb.SYNC_DIR)
+        with self.lock:
+            fresh = list(self.fresh)
+            keyring_files = list(self.keyring_files)
+        copies = []
+        renames = []
+        for repo in fresh:
+            temporary = os.path.join(sync_dir, ".%s.db.warm" % repo)
+            copies.append(["sudo", "cp", "--preserve=timestamps", os.path.join(self.side_dir, "sync", repo + ".db"), temporary])
+            renames.append(["sudo", "mv", "-f", temporary, os.path.join(sync_dir, repo + ".db")])
+        if keyring_files:
+            copies.append(["sudo", "cp", "--preserve=timestamps"] + keyring_files + [prefetch.SYSTEM_CACHE_DIR])
+        return copies + renames
@@ -0,0 +1,127 @@
+import errno
+import mmap
+import os
+import random
+import time
+
+# Target disk benchmark
+#
+# Short sequential (1 MiB blocks) and random (4 KiB blocks) write/read tests on a
+# scratch file in a directory on the target partition. The file is opened with O_DIRECT
+# and page aligned buffers so the page cache is bypassed. File systems without O_DIRECT
+# support (tmpfs, some FUSE file systems) fall back to O_DSYNC writes and dropping the
+# cached pages before every read test, the result then says direct=False.
+#
+# To benchmark a bare disk or a loop device, mount a file system on it and point the
+# benchmark at the mount point.
+
+SEQUENTIAL_SIZE = 64 * 1024 * 1024
+SEQUENTIAL_BLOCK = 1024 * 1024
+RANDOM_BLOCK = 4096
+RANDOM_SECONDS = 2.0
+SLOW_INSTALL_SECONDS = 45 * 60  # warn when the installation is estimated to take longer
+
+
+def open_scratch(directory):
+    """
+    Creates the scratch file, returns (path, fd, direct).
+    """
+    path = os.path.join(directory, ".snigdhaos-welcome-bench-%d" % os.getpid())
+    flags = os.O_RDWR | os.O_CREAT | os.O_TRUNC
+    try:
+        return path, os.open(path, flags | os.O_DIRECT, 0o600), True
+    except OSError as e:
+        if e.errno != errno.EINVAL:
+            raise
+    return path, os.open(path, flags | os.O_DSYNC, 0o600), False
+
+
+def drop_cache(fd, direct):
+    if not direct:
+        os.fsync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def sequential_write(fd, buffer, size):
+    start = time.monotonic()
+    for offset in range(0, size, len(buffer)):
+        os.pwritev(fd, [buffer], offset)
+    os.fsync(fd)
+    return size / (time.monotonic() - start)
+
+
+def sequential_read(fd, buffer, size):
+    start = time.monotonic()
+    for offset in range(0, size, len(buffer)):
+        os.preadv(fd, [buffer], offset)
+    return size / (time.monotonic() - start)
+
+
+def random_io(fd, buffer, size, write, seconds):
+    # operations per second at random block aligned offsets
+    blocks = size // len(buffer)
+    rng = random.Random(0)
+    operations = 0
+    start = time.monotonic()
+    deadline = start + seconds
+    while time.monotonic() < deadline:
+        offset = rng.randrange(blocks) * len(buffer)
+        if write:
+            os.pwritev(fd, [buffer], offset)
+        else:
+            os.preadv(fd, [buffer], offset)
+        operations += 1
+    if write:
+        os.fsync(fd)
+    return operations / (time.monotonic() - start)
+
+
+def run(directory, size=SEQUENTIAL_SIZE, random_seconds=RANDOM_SECONDS):
+    """
+    Benchmarks the file system holding directory.
+
+    Returns:
+        dict: seq_write and seq_read in bytes per second, rand_write and rand_read in
+        IOPS, and whether O_DIRECT was used.
+    """
+    path, fd, direct = open_scratch(directory)
+    try:
+        # anonymous mmaps are page aligned, as O_DIRECT requires
+        sequential_buffer = mmap.mmap(-1, SEQUENTIAL_BLOCK)
+        sequential_buffer.write(os.urandom(SEQUENTIAL_BLOCK))  # defeat compressing controllers
+        random_buffer = mmap.mmap(-1, RANDOM_BLOCK)
+        random_buffer.write(os.urandom(RANDOM_BLOCK))
+
+        result = {"direct": direct}
+        result["seq_write"] = sequential_write(fd, sequential_buffer, size)
+        drop_cache(fd, direct)
+        result["seq_read"] = sequential_read(fd, sequential_buffer, size)
+        result["rand_write"] = random_io(fd, random_buffer, size, True, random_seconds)
+        drop_cache(fd, direct)
+        result["rand_read"] = random_io(fd, random_buffer, size, False, random_seconds)
+        return result
+    finally:
+        os.close(fd)
+        os.unlink(path)
+
+
+def install_seconds(result, install_size):
+    """
+    Rough installation time on the benchmarked disk: the installed system written
+    sequentially plus one small random write per 64 KiB (metadata, small files).
+    """
+    return install_size / result["seq_write"] + (install_size / 65536) / max(result["rand_write"], 1)
+
+
+def summary(result):
+    return (
+        "Sequential write %.0f MB/s, read %.0f MB/s\n"
+        "4K random write %.0f IOPS, read %.0f IOPS%s"
+        % (
+            result["seq_write"] / 1e6,
+            result["seq_read"] / 1e6,
+            result["rand_write"],
+            result["rand_read"],
+            "" if result["direct"] else "\n(O_DIRECT not supported, synchronous writes used)",
+        )
+    )
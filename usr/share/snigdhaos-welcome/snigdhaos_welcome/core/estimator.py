@@ -0,0 +1,204 @@
+import glob
+import os
+import platform
+import time
+import urllib.request
+
+from . import packages
+from . import paths
+
+# Install time estimator for the offline and online installation
+#
+# Both installations unpack the live image. The online installation additionally
+# updates every package that is out of date, so its extra cost is the download size of
+# those packages (from the sync database index) divided by the throughput measured
+# with a short ranged download from the top mirror.
+
+MIRRORLIST = "/etc/pacman.d/mirrorlist"
+LIVE_IMAGES = "/run/archiso/bootmnt/*/%s/*.sfs"  # archiso keeps the images per architecture
+PROBE_FILE = "extra.db"  # large enough for a meaningful sample on every mirror
+PROBE_SIZE = 2 * 1024 * 1024
+UNPACK_RATE = 50 * 1024 * 1024  # bytes per second, conservative for USB sticks and HDDs
+DEFAULT_OFFLINE_SECONDS = 600
+# without a live image: a desktop image of 3-4 GiB of squashfs unpacks to about 8 GiB
+DEFAULT_INSTALLED_SIZE = 8 * 1024 * 1024 * 1024
+RECOMMEND_OFFLINE_AFTER = 300  # extra seconds of online download that tip the scale
+
+
+def top_mirror(mirrorlist=None):
+    mirrorlist = mirrorlist or paths.resolve(MIRRORLIST)
+    try:
+        with open(mirrorlist, "r") as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith("Server") and "=" in line:
+                    return line.split("=", 1)[1].strip()
+    except OSError as e:
+        print("[ERROR]: Cannot read %s: %s" % (mirrorlist, e))
+    return None
+
+
+def probe_bandwidth(server, size=PROBE_SIZE, timeout=10):
+    """
+    Measures the throughput of a mirror with a ranged download of its extra database.
+    Returns bytes per second, or None when the mirror could not be reached.
+
+    Args:
+        server (str): Mirrorlist server template, e.g. https://host/$repo/os/$arch
+    """
+    url = server.replace("$repo", "extra").replace("$arch", platform.machine()) + "/" + PROBE_FILE
+    request = urllib.request.Request(url, headers={"Range": "bytes=0-%d" % (size - 1)})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            # start timing after the headers so latency does not count as bandwidth
+            start = time.monotonic()
+            received = 0
+            while received < size:
+                chunk = response.read(64 * 1024)
+                if not chunk:
+                    break
+                received += len(chunk)
+            elapsed = time.monotonic() - start
+    except OSError as e:
+        print("[ERROR]: Bandwidth probe of %s failed: %s" % (url, e))
+        return None
+    if received == 0 or elapsed <= 0:
+        return None
+    return received / elapsed
+
+
+def split_evr(version):
+    # "epoch:version-release" -> (epoch, version, release)
+    epoch, _, rest = version.rpartition(":")
+    ver, _, rel = rest.partition("-")
+    return epoch or "0", ver, rel
+
+
+def rpmvercmp(a, b):
+    # straight port of rpmvercmp() from libalpm's version.c
+    if a == b:
+        return 0
+    one = ptr1 = 0
+    two = ptr2 = 0
+    while one < len(a) and two < len(b):
+        while one < len(a) and not a[one].isalnum():
+            one += 1
+        while two < len(b) and not b[two].isalnum():
+            two += 1
+        if one >= len(a) or two >= len(b):
+            break
+
+        # if the separator lengths were different, we are also finished
+        if one - ptr1 != two - ptr2:
+            return -1 if one - ptr1 < two - ptr2 else 1
+
+        ptr1, ptr2 = one, two
+        isnum = a[ptr1].isdigit()
+        test = str.isdigit if isnum else str.isalpha
+        while ptr1 < len(a) and test(a[ptr1]):
+            ptr1 += 1
+        while ptr2 < len(b) and test(b[ptr2]):
+            ptr2 += 1
+
+        seg1, seg2 = a[one:ptr1], b[two:ptr2]
+        # numeric segments are always newer than alpha segments
+        if not seg2:
+            return 1 if isnum else -1
+        if isnum:
+            seg1, seg2 = seg1.lstrip("0"), seg2.lstrip("0")
+            if len(seg1) != len(seg2):
+                return 1 if len(seg1) > len(seg2) else -1
+        if seg1 != seg2:
+            return 1 if seg1 > seg2 else -1
+
+        one, two = ptr1, ptr2
+
+    if one >= len(a) and two >= len(b):
+        return 0
+    # the final showdown, a remaining alpha string never beats an empty string
+    if (one >= len(a) and not b[two].isalpha()) or (one < len(a) and a[one].isalpha()):
+        return -1
+    return 1
+
+
+def vercmp(a, b):
+    """
+    Compares two pacman versions, returns -1, 0 or 1 like "vercmp a b".
+    """
+    epoch_a, ver_a, rel_a = split_evr(a)
+    epoch_b, ver_b, rel_b = split_evr(b)
+    result = rpmvercmp(epoch_a, epoch_b)
+    if result == 0:
+        result = rpmvercmp(ver_a, ver_b)
+        if result == 0 and rel_a and rel_b:
+            result = rpmvercmp(rel_a, rel_b)
+    return result
+
+
+def outdated_download_size(package_index):
+    """
+    Returns (number of packages, download bytes) of the installed packages that have
+    a newer version in the sync databases.
+    """
+    count = 0
+    size = 0
+    for entry in os.listdir(paths.resolve(packages.LOCAL_DB)):
+        split = packages.split_entry(entry)
+        if split is None:
+            continue
+        i = package_index.find(split[0])
+        if i is None:
+            continue
+        record = package_index.record(i)
+        if vercmp(record["version"], split[1]) > 0:
+            count += 1
+            size += int(record["csize"] or 0)
+    return count, size
+
+
+def installed_size(pattern=None):
+    # bytes written by the installation, None when no live image is mounted
+    pattern = pattern or paths.resolve(LIVE_IMAGES % platform.machine())
+    size = sum(os.path.getsize(path) for path in glob.glob(pattern))
+    if size == 0:
+        return None
+    # squashfs is roughly half the size of what ends up on disk
+    return 2 * size
+
+
+def offline_seconds(pattern=None, unpack_rate=UNPACK_RATE):
+    # time to unpack the live image, the part both installation methods share
+    size = installed_size(pattern)
+    if size is None:
+        return DEFAULT_OFFLINE_SECONDS
+    return size / unpack_rate
+
+
+def estimate(package_index, server=None):
+    """
+    Returns a dict with the estimated offline and online durations in seconds, the
+    online download size and whether offline is recommended. online is None when
+    the mirror could not be probed.
+    """
+    offline = offline_seconds()
+    count, size = outdated_download_size(package_index)
+    server = server or top_mirror()
+    throughput = probe_bandwidth(server) if server else None
+    online = offline + size / throughput if throughput else None
+    return {
+        "offline": offline,
+        "online": online,
+        "download_size": size,
+        "download_count": count,
+        "throughput": throughput,
+        "recommend_offline": online is None or online - offline > RECOMMEND_OFFLINE_AFTER,
+    }
+
+
+def format_duration(seconds):
+    minutes = int(round(seconds / 60))
+    if minutes < 1:
+        return "under a minute"
+    if minutes < 60:
+        return "about %d min" % minutes
+    return "about %d h %02d min" % (minutes // 60, minutes % 60)
@@ -0,0 +1,208 @@
+import glob
+import json
+import os
+import platform
+import time
+
+from . import install
+from . import packages
+from . import paths
+from . import settings
+from . import sysstats
+
+# Hardware inventory for the support page
+#
+# Everything is read from sysfs and procfs, no lspci/lsblk/dmidecode is spawned. The
+# inventory cannot change without a reboot (hot plugged disks aside), so it is cached
+# in SNAPSHOT together with the boot id it was taken in and reused until the next boot.
+
+SNAPSHOT = os.path.join(settings.CONFIG_DIR, "hardware.json")
+BOOT_ID = "/proc/sys/kernel/random/boot_id"
+SNAPSHOT_VERSION = 1
+
+# PCI vendor ids, the names lspci would print for the GPUs seen on real machines and VMs
+PCI_VENDORS = {
+    "0x1002": "AMD",
+    "0x10de": "NVIDIA",
+    "0x8086": "Intel",
+    "0x1af4": "Red Hat (virtio)",
+    "0x1234": "QEMU",
+    "0x15ad": "VMware",
+    "0x80ee": "VirtualBox",
+    "0x1414": "Microsoft (Hyper-V)",
+}
+
+
+def read(path, default=""):
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return default
+
+
+def boot_id():
+    return read(paths.resolve(BOOT_ID))
+
+
+def cpu():
+    model = ""
+    for line in read(paths.resolve("/proc/cpuinfo")).splitlines():
+        key, _, value = line.partition(":")
+        # "model name" on x86, "Model"/"Hardware" on ARM boards
+        if key.strip() in ("model name", "Model", "Hardware"):
+            model = value.strip()
+            break
+
+    sockets = set()
+    cores = set()
+    threads = 0
+    for topology in glob.glob(paths.resolve("/sys/devices/system/cpu/cpu[0-9]*/topology")):
+        package = read(os.path.join(topology, "physical_package_id"), "0")
+        sockets.add(package)
+        cores.add((package, read(os.path.join(topology, "core_id"), topology)))
+        threads += 1
+    return {
+        "model": model or platform.machine(),
+        "sockets": len(sockets),
+        "cores": len(cores),
+        "threads": threads or os.cpu_count() or 0,
+    }
+
+
+def memory():
+    for line in read(paths.resolve("/proc/meminfo")).splitlines():
+        if line.startswith("MemTotal:"):
+            return int(line.split()[1]) * 1024
+    return 0
+
+
+def gpus():
+    found = []
+    # card0, card1, ... but not the connectors (card0-HDMI-A-1)
+    for card in sorted(glob.glob(paths.resolve("/sys/class/drm/card[0-9]*"))):
+        if "-" in os.path.basename(card):
+            continue
+        device = os.path.join(card, "device")
+        vendor = read(os.path.join(device, "vendor"))
+        driver = os.path.join(device, "driver")
+        found.append(
+            {
+                "card": os.path.basename(card),
+                "vendor": PCI_VENDORS.get(vendor, vendor or "unknown"),
+                "device": "%s:%s" % (vendor[2:], read(os.path.join(device, "device"))[2:]),
+                "driver": os.path.basename(os.readlink(driver)) if os.path.islink(driver) else "none",
+                "boot_vga": read(os.path.join(device, "boot_vga")) == "1",
+            }
+        )
+    return found
+
+
+def disks():
+    found = []
+    for name in sorted(sysstats.whole_disks()):
+        block = os.path.join(paths.resolve("/sys/block"), name)
+        model = read(os.path.join(block, "device/model")) or read(os.path.join(block, "device/name"))
+        found.append(
+            {
+                "name": name,
+                "model": " ".join(model.split()) or "unknown",
+                "size": int(read(os.path.join(block, "size"), "0")) * 512,
+                "rotational": read(os.path.join(block, "queue/rotational")) == "1",
+                "removable": read(os.path.join(block, "removable")) == "1",
+            }
+        )
+    return found
+
+
+def firmware():
+    dmi = paths.resolve("/sys/class/dmi/id")
+    bits = read(paths.resolve(install.EFI_PLATFORM_SIZE))
+    return {
+        "mode": "UEFI %s-bit" % bits if bits else "BIOS",
+        "vendor": read(os.path.join(dmi, "sys_vendor")),
+        "product": read(os.path.join(dmi, "product_name")),
+        "board": read(os.path.join(dmi, "board_name")),
+        "bios": read(os.path.join(dmi, "bios_version")),
+    }
+
+
+def collect():
+    uname = os.uname()
+    return {
+        "kernel": "%s %s %s" % (uname.sysname, uname.release, uname.machine),
+        "cpu": cpu(),
+        "memory": memory(),
+        "gpus": gpus(),
+        "disks": disks(),
+        "firmware": firmware(),
+        "collected": time.time(),
+    }
+
+
+def snapshot(path=SNAPSHOT, refresh=False):
+    """
+    Returns the inventory, from the snapshot when it was taken in the current boot.
+
+    Args:
+        path (str): Snapshot file.
+        refresh (bool): Collect again even when the snapshot is current.
+    """
+    current = boot_id()
+    if not refresh and current:
+        try:
+            with open(path, "r") as f:
+                cached = json.load(f)
+            if cached.get("version") == SNAPSHOT_VERSION and cached.get("boot_id") == current:
+                return cached["hardware"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    hardware = collect()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = path + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump({"version": SNAPSHOT_VERSION, "boot_id": current, "hardware": hardware}, f)
+        os.replace(temporary, path)
+    except OSError as e:
+        print("[ERROR]: Cannot write the hardware snapshot %s: %s" % (path, e))
+    return hardware
+
+
+def rows(hardware):
+    """
+    Returns [(label, value)] for display and export.
+    """
+    cpu_ = hardware["cpu"]
+    firmware_ = hardware["firmware"]
+    result = [
+        ("Kernel", hardware["kernel"]),
+        ("CPU", cpu_["model"]),
+        ("Topology", "%d socket(s), %d cores, %d threads" % (cpu_["sockets"], cpu_["cores"], cpu_["threads"])),
+        ("Memory", packages.format_size(hardware["memory"])),
+        ("Firmware", firmware_["mode"]),
+    ]
+    machine = " ".join(value for value in (firmware_["vendor"], firmware_["product"]) if value)
+    if machine:
+        result.append(("Machine", machine))
+    if firmware_["board"] or firmware_["bios"]:
+        result.append(("Board", "%s (BIOS %s)" % (firmware_["board"] or "unknown", firmware_["bios"] or "unknown")))
+    for gpu in hardware["gpus"]:
+        primary = ", primary" if gpu["boot_vga"] else ""
+        result.append(("GPU", "%s [%s], driver %s%s" % (gpu["vendor"], gpu["device"], gpu["driver"], primary)))
+    if not hardware["gpus"]:
+        result.append(("GPU", "none found"))
+    for disk in hardware["disks"]:
+        kind = "removable" if disk["removable"] else "HDD" if disk["rotational"] else "SSD"
+        result.append(("Disk", "%s: %s, %s, %s" % (disk["name"], disk["model"], packages.format_size(disk["size"]), kind)))
+    return result
+
+
+def report(hardware):
+    # plain text pasted into a forum post
+    entries = rows(hardware)
+    width = max(len(label) for label, _ in entries)
+    lines = ["Snigdha OS hardware report"]
+    lines += ["%-*s  %s" % (width, label, value) for label, value in entries]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,80 @@
+import os
+import subprocess
+
+from . import paths
+
+# Calamares staging shared by the install buttons, the bootloader dialog and the
+# preseeded (headless) installation. Nothing in here needs GTK.
+
+CALAMARES_DIR = "/etc/calamares"
+CALAMARES_POLKIT = "/usr/bin/calamares_polkit"
+PACMAN_LOCKFILE = "/var/lib/pacman/db.lck"
+EFI_PLATFORM_SIZE = "/sys/firmware/efi/fw_platform_size"
+
+# install mode -> (calamares settings, packages module config)
+MODES = {
+    "offline": ("settings-beginner.conf", "packages-no-system-update.conf"),
+    "online": ("settings-advanced.conf", "packages-system-update.conf"),
+}
+
+# bootloader -> bootloader module config
+BOOTLOADERS = {
+    "grub": "bootloader-grub.conf",
+    "systemd-boot": "bootloader-systemd.conf",
+}
+
+
+def is_locked(pacman_lockfile=None):
+    return os.path.exists(pacman_lockfile or paths.resolve(PACMAN_LOCKFILE))
+
+
+def is_efi():
+    return os.path.isfile(paths.resolve(EFI_PLATFORM_SIZE))
+
+
+def is_live():
+    return os.path.isfile(paths.resolve(CALAMARES_POLKIT))
+
+
+def mode_commands(mode, settings=None):
+    """
+    Returns the commands staging the Calamares configuration of an install mode.
+
+    Args:
+        mode (str): "offline" or "online".
+        settings (str): Optional settings.conf replacing the mode's default one.
+    """
+    settings_file, packages_file = MODES[mode]
+    calamares_dir = paths.resolve(CALAMARES_DIR)
+    return [
+        ["sudo", "cp", settings or os.path.join(calamares_dir, settings_file), os.path.join(calamares_dir, "settings.conf")],
+        [
+            "sudo",
+            "cp",
+            os.path.join(calamares_dir, "modules", packages_file),
+            os.path.join(calamares_dir, "modules", "packages.conf"),
+        ],
+    ]
+
+
+def bootloader_file(bootloader):
+    return os.path.join(paths.resolve(CALAMARES_DIR), "modules", BOOTLOADERS[bootloader])
+
+
+def bootloader_command(bootloader):
+    return [
+        "sudo",
+        "cp",
+        bootloader_file(bootloader),
+        os.path.join(paths.resolve(CALAMARES_DIR), "modules", "bootloader.conf"),
+    ]
+
+
+def launch_installer(calamares_polkit=CALAMARES_POLKIT):
+    # Calamares copies the mirrorlists to the target, where LAN peers of this session are
+    # dead entries. Imported here, mirrors is too heavy for the command line start-up.
+    from . import mirrors
+
+    mirrors.drop_peers()
+    # started on this machine whatever the root, the target is only what it installs to
+    return subprocess.Popen([calamares_polkit, "-d"], shell=False)
@@ -0,0 +1,285 @@
+import argparse
+import fnmatch
+import http.server
+import json
+import os
+import re
+import socket
+import threading
+import time
+import uuid
+
+from . import prefetch
+
+# LAN package cache sharing between live sessions
+#
+# A machine that has already downloaded packages serves its pacman cache over HTTP and
+# announces itself with a small UDP broadcast. Every instance listens for those
+# announcements and mirror_update() puts the discovered peers at the top of the
+# mirrorlists. Peers that stop announcing are aged out after PEER_TIMEOUT and removed
+# from the mirrorlists again, and none are left in them when the installer copies them
+# to the target. The server answers any $repo/os/$arch path with the file of the same
+# name from the (flat) cache, and a miss is a plain 404, so pacman moves on to the
+# next, upstream, server. Packages are signed, a peer can make a download fail but it
+# cannot change what gets installed.
+#
+# Several instances can run on one machine for testing, every server picks its own
+# port and the discovery socket is shared through SO_REUSEPORT:
+#
+#   python3 -m snigdhaos_welcome.core.lancache --cache-dir /tmp/a --broadcast 127.255.255.255
+#   python3 -m snigdhaos_welcome.core.lancache --cache-dir /tmp/b --broadcast 127.255.255.255
+
+SERVICE = "snigdhaos-pkgcache"
+DISCOVERY_PORT = 7879
+BROADCAST = "255.255.255.255"
+ANNOUNCE_INTERVAL = 5
+PEER_TIMEOUT = 3 * ANNOUNCE_INTERVAL
+PACKAGE_PATTERN = "*.pkg.tar*"
+PEER_MARKER = "# LAN peer, added by snigdhaos-welcome"
+COPY_CHUNK = 4 * 1024 * 1024
+
+
+def cache_dirs():
+    return [prefetch.SYSTEM_CACHE_DIR, prefetch.CACHE_DIR]
+
+
+class CacheRequestHandler(http.server.BaseHTTPRequestHandler):
+    server_version = "snigdhaos-welcome"
+
+    def find(self):
+        # only the last path component matters, the cache has no repository layout
+        name = os.path.basename(self.path.split("?", 1)[0])
+        if not fnmatch.fnmatch(name, PACKAGE_PATTERN) or name.endswith(".part"):
+            return None
+        for directory in self.server.cache_dirs:
+            path = os.path.join(directory, name)
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def do_HEAD(self):
+        self.serve(send_body=False)
+
+    def do_GET(self):
+        self.serve(send_body=True)
+
+    def serve(self, send_body):
+        path = self.find()
+        if path is None:
+            self.server.misses += 1
+            self.send_error(404)
+            return
+        try:
+            f = open(path, "rb")
+        except OSError:
+            self.send_error(404)
+            return
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            start, end = 0, size - 1
+            match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+            if match:
+                # libcurl resumes interrupted downloads with a single open ended range
+                start = int(match.group(1))
+                if match.group(2):
+                    end = min(int(match.group(2)), end)
+                if start > end:
+                    self.send_response(416)
+                    self.send_header("Content-Range", "bytes */%d" % size)
+                    self.end_headers()
+                    return
+                self.send_response(206)
+                self.send_header("Content-Range", "bytes %d-%d/%d" % (start, end, size))
+            else:
+                self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.send_header("Accept-Ranges", "bytes")
+            self.end_headers()
+            if not send_body:
+                return
+            self.server.hits += 1
+            self.wfile.flush()
+            # sendfile keeps the file contents out of the interpreter
+            count = end - start + 1
+            offset = start
+            while count > 0:
+                sent = os.sendfile(self.connection.fileno(), f.fileno(), offset, min(count, COPY_CHUNK))
+                if sent == 0:
+                    break
+                offset += sent
+                count -= sent
+            self.server.bytes_sent += offset - start
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CacheServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=("", 0), directories=None):
+        """
+        Args:
+            address (tuple): (host, port) to listen on, port 0 picks a free port.
+            directories (list): Package cache directories, searched in order.
+        """
+        super(CacheServer, self).__init__(address, CacheRequestHandler)
+        self.cache_dirs = directories or cache_dirs()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_sent = 0
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        print("[INFO]: Sharing %s on port %d" % (", ".join(self.cache_dirs), self.port))
+
+
+class PeerDiscovery(threading.Thread):
+    def __init__(
+        self, server_port=None, port=DISCOVERY_PORT, broadcast=BROADCAST, interval=ANNOUNCE_INTERVAL, on_expire=None
+    ):
+        """
+        Args:
+            server_port (int): Port of the local CacheServer to announce, None to only listen.
+            port (int): UDP port announcements are sent to and received on.
+            broadcast (str): Address announcements are sent to.
+            interval (int): Seconds between announcements.
+            on_expire (callable): Called on the discovery thread with the remaining peers()
+                when peers were not heard from for PEER_TIMEOUT.
+        """
+        super(PeerDiscovery, self).__init__(daemon=True)
+        self.server_port = server_port
+        self.port = port
+        self.broadcast = broadcast
+        self.interval = interval
+        self.on_expire = on_expire
+        self.id = uuid.uuid4().hex
+        self.found = {}  # instance id -> (host, port, last seen)
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        # every instance on a machine receives the broadcasts
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        self.sock.bind(("", port))
+        self.sock.settimeout(1)
+
+    def stop(self):
+        self.stopped.set()
+
+    def announce(self):
+        message = {"service": SERVICE, "id": self.id, "port": self.server_port}
+        try:
+            self.sock.sendto(json.dumps(message).encode(), (self.broadcast, self.port))
+        except OSError as e:
+            print("[ERROR]: Cannot announce the package cache: %s" % e)
+
+    def receive(self):
+        try:
+            data, (host, _) = self.sock.recvfrom(1024)
+            message = json.loads(data)
+        except (socket.timeout, ValueError):
+            return
+        if not isinstance(message, dict) or message.get("service") != SERVICE:
+            return
+        port = message.get("port")
+        if message.get("id") == self.id or not isinstance(port, int):
+            return
+        with self.lock:
+            self.found[message["id"]] = (host, port, time.monotonic())
+
+    def run(self):
+        next_announce = 0
+        while not self.stopped.is_set():
+            if self.server_port is not None and time.monotonic() >= next_announce:
+                self.announce()
+                next_announce = time.monotonic() + self.interval
+            self.receive()
+            self.expire()
+        self.sock.close()
+
+    def expire(self):
+        now = time.monotonic()
+        with self.lock:
+            expired = [key for key, (_, _, seen) in self.found.items() if now - seen >= PEER_TIMEOUT]
+            for key in expired:
+                del self.found[key]
+        if expired and self.on_expire is not None:
+            self.on_expire(self.peers())
+
+    def peers(self):
+        """
+        Returns the mirrorlist server lines of the peers heard from recently, most recent first.
+        """
+        now = time.monotonic()
+        with self.lock:
+            alive = sorted(
+                (entry for entry in self.found.values() if now - entry[2] < PEER_TIMEOUT),
+                key=lambda entry: -entry[2],
+            )
+        return ["http://%s:%d/$repo/os/$arch" % (host, port) for host, port, _ in alive]
+
+
+def with_peers(mirrorlist, peers):
+    """
+    Returns the mirrorlist text with previously added peers replaced by the given ones.
+    """
+    lines = []
+    skip = False
+    for line in mirrorlist.splitlines():
+        if line == PEER_MARKER:
+            skip = True
+            continue
+        if skip:
+            skip = False
+            continue
+        lines.append(line)
+    added = []
+    for server in peers:
+        added += [PEER_MARKER, "Server = %s" % server]
+    return "\n".join(added + lines) + "\n"
+
+
+def peers_in(mirrorlist):
+    """
+    Returns the servers added by with_peers() to the mirrorlist text, in order.
+    """
+    lines = mirrorlist.splitlines()
+    return [
+        line.partition("=")[2].strip()
+        for marker, line in zip(lines, lines[1:])
+        if marker == PEER_MARKER
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Share a pacman package cache with LAN peers")
+    parser.add_argument("--cache-dir", action="append", help="cache directory, may be repeated")
+    parser.add_argument("--bind", default="", help="address the HTTP server listens on")
+    parser.add_argument("--port", type=int, default=0, help="HTTP port, 0 picks a free one")
+    parser.add_argument("--broadcast", default=BROADCAST, help="announcement address")
+    parser.add_argument("--discovery-port", type=int, default=DISCOVERY_PORT)
+    args = parser.parse_args(argv)
+
+    server = CacheServer((args.bind, args.port), args.cache_dir)
+    server.start()
+    discovery = PeerDiscovery(server.port, args.discovery_port, args.broadcast)
+    discovery.start()
+    try:
+        while True:
+            time.sleep(ANNOUNCE_INTERVAL)
+            print("[INFO]: Peers: %s" % (", ".join(discovery.peers()) or "none"))
+    except KeyboardInterrupt:
+        discovery.stop()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import ctypes
+import gc
+import tracemalloc
+
+# Memory footprint report
+#
+# RSS comes from /proc/self/status. Python allocations are only attributed when
+# tracemalloc was started early, which "snigdhaos-welcome --memory-report" does before
+# GTK is imported. trim() hands freed heap memory back to the kernel so the RSS after
+# releasing caches reflects what is really still in use.
+
+BUDGET_MIB = 120  # idle RSS the resident mode is expected to stay under
+
+
+def start(frames=1):
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def status_fields(path="/proc/self/status"):
+    # VmRSS/VmHWM/... in bytes
+    fields = {}
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if value.strip().endswith("kB"):
+                    fields[key] = int(value.split()[0]) * 1024
+    except OSError:
+        pass
+    return fields
+
+
+def rss():
+    return status_fields().get("VmRSS", 0)
+
+
+def trim():
+    gc.collect()
+    try:
+        # glibc keeps freed arenas mapped until asked
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def report(top=10, budget=BUDGET_MIB):
+    """
+    Returns the report text: RSS against the budget, then the top Python allocation sites.
+    """
+    fields = status_fields()
+    mib = 1024 * 1024
+    current = fields.get("VmRSS", 0) / mib
+    lines = [
+        "RSS %.1f MiB (peak %.1f MiB), budget %d MiB%s"
+        % (current, fields.get("VmHWM", 0) / mib, budget, " EXCEEDED" if current > budget else "")
+    ]
+    if not tracemalloc.is_tracing():
+        lines.append("tracemalloc is not running, start with --memory-report for allocation sites")
+        return "\n".join(lines)
+
+    traced, peak = tracemalloc.get_traced_memory()
+    lines.append("Python heap %.1f MiB traced (peak %.1f MiB), top %d allocation sites:" % (traced / mib, peak / mib, top))
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ]
+    )
+    for statistic in snapshot.statistics("lineno")[:top]:
+        frame = statistic.traceback[0]
+        lines.append("  %8.1f KiB %6d blocks  %s:%d" % (statistic.size / 1024, statistic.count, frame.filename, frame.lineno))
+    return "\n".join(lines)
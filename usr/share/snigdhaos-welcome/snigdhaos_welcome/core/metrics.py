@@ -0,0 +1,223 @@
+import contextlib
+import math
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from . import settings
+
+# Operation timings
+#
+# Every measured operation (mirror update, tool install, Calamares staging and launch,
+# connectivity probe) is counted in an in-memory histogram and appended to a small
+# SQLite journal next to the settings file. The journal keeps the newest MAX_ROWS rows.
+# When the "metrics_textfile" setting names a file, the histograms are also written there
+# in the Prometheus text format after every operation, for node_exporter's textfile
+# collector. "snigdhaos-welcome --stats" reports percentiles from the journal.
+#
+# record() is called from the main loop for some operations, so it only updates the
+# histograms; the journal and the textfile are written by a worker thread.
+
+JOURNAL = os.path.join(settings.CONFIG_DIR, "metrics.db")
+MAX_ROWS = 20000
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, math.inf)
+# operations that run on a timer are journaled at most once per this many seconds
+JOURNAL_INTERVAL = {"connectivity": 60}
+# seconds flush() waits for the writer at exit
+FLUSH_TIMEOUT = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS operations (
+    started REAL NOT NULL,
+    operation TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    outcome TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS operations_started ON operations (started);
+"""
+
+
+class Measurement:
+    # handed out by Metrics.measure(), the block may set outcome itself
+    def __init__(self):
+        self.outcome = "ok"
+
+
+class Metrics:
+    def __init__(self, journal=JOURNAL, textfile=None):
+        """
+        Args:
+            journal (str): SQLite journal, None to keep the timings in memory only.
+            textfile (str): Prometheus textfile written after every operation, None for none.
+        """
+        self.journal = journal
+        self.textfile = textfile
+        self.lock = threading.Lock()
+        self.histograms = {}  # operation -> [bucket counts, sum, count]
+        self.outcomes = {}  # (operation, outcome) -> count
+        self.last_journaled = {}
+        self.connection = None  # opened and used by the writer thread only
+        self.writes = queue.Queue()  # (operation, seconds, outcome, time) for the writer
+        self.writer = None
+
+    def open_journal(self):
+        try:
+            os.makedirs(os.path.dirname(self.journal), exist_ok=True)
+            self.connection = sqlite3.connect(self.journal, isolation_level=None)
+            self.connection.executescript(SCHEMA)
+        except (OSError, sqlite3.Error) as e:
+            print("[ERROR]: Cannot open the metrics journal %s: %s" % (self.journal, e))
+            self.connection = None
+
+    @contextlib.contextmanager
+    def measure(self, operation):
+        """
+        Times the block. The outcome is "error" when it raises, otherwise whatever the
+        block set on the yielded Measurement ("ok" by default).
+        """
+        measurement = Measurement()
+        start = time.monotonic()
+        try:
+            yield measurement
+        except BaseException:
+            measurement.outcome = "error"
+            raise
+        finally:
+            self.record(operation, time.monotonic() - start, measurement.outcome)
+
+    def record(self, operation, seconds, outcome="ok"):
+        with self.lock:
+            histogram = self.histograms.setdefault(operation, [[0] * len(BUCKETS), 0.0, 0])
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    histogram[0][i] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+            self.outcomes[(operation, outcome)] = self.outcomes.get((operation, outcome), 0) + 1
+            if self.writer is None and (self.journal is not None or self.textfile is not None):
+                self.writer = threading.Thread(target=self.write_loop, daemon=True)
+                self.writer.start()
+            if self.writer is not None:
+                self.writes.put((operation, seconds, outcome, time.time()))
+
+    def write_loop(self):
+        if self.journal is not None:
+            self.open_journal()
+        # None, queued by flush(), ends the loop
+        while (item := self.writes.get()) is not None:
+            try:
+                self.append(*item)
+                # one textfile rewrite for a burst of operations
+                if self.textfile is not None and self.writes.empty():
+                    self.write_textfile()
+            except Exception as e:
+                # the writer has to outlive a bad row, flush() waits for it
+                print("[ERROR]: Cannot write metrics: %s" % e)
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        """
+        Writes out everything recorded so far and stops the writer, at exit. Gives up
+        after timeout seconds, a later record() starts a new writer.
+        """
+        with self.lock:
+            writer, self.writer = self.writer, None
+            if writer is None:
+                return
+            self.writes.put(None)
+        writer.join(timeout)
+        if writer.is_alive():
+            print("[ERROR]: Metrics writer did not finish within %ss" % timeout)
+
+    def append(self, operation, seconds, outcome, now):
+        if self.connection is None:
+            return
+        interval = JOURNAL_INTERVAL.get(operation)
+        if interval is not None and now - self.last_journaled.get(operation, 0) < interval:
+            return
+        self.last_journaled[operation] = now
+        try:
+            self.connection.execute(
+                "INSERT INTO operations VALUES (?, ?, ?, ?)", (now - seconds, operation, seconds, outcome)
+            )
+            # rotation, the rowid grows with every insert
+            self.connection.execute(
+                "DELETE FROM operations WHERE rowid <= (SELECT MAX(rowid) FROM operations) - ?", (MAX_ROWS,)
+            )
+        except sqlite3.Error as e:
+            print("[ERROR]: Cannot write the metrics journal: %s" % e)
+
+    def prometheus(self):
+        lines = [
+            "# HELP snigdhaos_welcome_operation_seconds Duration of welcome app operations.",
+            "# TYPE snigdhaos_welcome_operation_seconds histogram",
+        ]
+        with self.lock:
+            for operation, (buckets, total, count) in sorted(self.histograms.items()):
+                for bound, bucket in zip(BUCKETS, buckets):
+                    le = "+Inf" if bound == math.inf else repr(float(bound))
+                    lines.append('snigdhaos_welcome_operation_seconds_bucket{operation="%s",le="%s"} %d' % (operation, le, bucket))
+                lines.append('snigdhaos_welcome_operation_seconds_sum{operation="%s"} %f' % (operation, total))
+                lines.append('snigdhaos_welcome_operation_seconds_count{operation="%s"} %d' % (operation, count))
+            lines.append("# HELP snigdhaos_welcome_operations_total Welcome app operations by outcome.")
+            lines.append("# TYPE snigdhaos_welcome_operations_total counter")
+            for (operation, outcome), count in sorted(self.outcomes.items()):
+                lines.append('snigdhaos_welcome_operations_total{operation="%s",outcome="%s"} %d' % (operation, outcome, count))
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self):
+        # the collector must never see a half written file
+        temporary = "%s.%d.tmp" % (self.textfile, threading.get_native_id())
+        try:
+            with open(temporary, "w") as f:
+                f.write(self.prometheus())
+            os.replace(temporary, self.textfile)
+        except OSError as e:
+            print("[ERROR]: Cannot write the metrics textfile %s: %s" % (self.textfile, e))
+
+
+def percentile(values, fraction):
+    # nearest rank on sorted values
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+def report(journal=JOURNAL, days=30):
+    """
+    Returns the stats report: p50/p95 per operation over the whole period, then per day.
+    """
+    if not os.path.isfile(journal):
+        return "No operations recorded yet (%s does not exist)" % journal
+    connection = sqlite3.connect(journal)
+    try:
+        rows = connection.execute(
+            "SELECT date(started, 'unixepoch', 'localtime'), operation, seconds, outcome "
+            "FROM operations WHERE started >= ? ORDER BY started",
+            (time.time() - days * 86400,),
+        ).fetchall()
+    finally:
+        connection.close()
+    if not rows:
+        return "No operations recorded in the last %d days" % days
+
+    overall = {}
+    daily = {}
+    for day, operation, seconds, outcome in rows:
+        overall.setdefault(operation, []).append((seconds, outcome))
+        daily.setdefault((operation, day), []).append((seconds, outcome))
+
+    def line(label, entries):
+        values = sorted(seconds for seconds, _ in entries)
+        errors = sum(1 for _, outcome in entries if outcome != "ok")
+        return "%-24s %6d %6d %10.2f %10.2f" % (label, len(values), errors, percentile(values, 0.5), percentile(values, 0.95))
+
+    columns = "%-24s %6s %6s %10s %10s"
+    output = ["Last %d days" % days, columns % ("operation", "count", "failed", "p50 (s)", "p95 (s)")]
+    output += [line(operation, entries) for operation, entries in sorted(overall.items())]
+    for operation in sorted(overall):
+        output += ["", operation, columns % ("day", "count", "failed", "p50 (s)", "p95 (s)")]
+        output += [line(day, entries) for (name, day), entries in sorted(daily.items()) if name == operation]
+    return "\n".join(output)
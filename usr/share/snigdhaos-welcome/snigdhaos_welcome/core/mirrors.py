@@ -0,0 +1,468 @@
+import concurrent.futures
+import email.utils
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+import urllib.request
+
+from . import lancache
+from . import paths
+
+# Mirrorlist ranking with rate-mirrors, shared by the GUI and the command line front end
+#
+# rate-mirrors runs unprivileged and saves its ranking to a temporary candidate file.
+# The candidate is only applied when it passes check(): at least MIN_SERVERS servers,
+# and the top CHECK_TOP of them answer for the repository database within
+# LATENCY_BUDGET with a copy no more than MAX_LAG behind the newest one seen. Applying
+# keeps the current mirrorlist as <mirrorlist>.previous and renames the candidate into
+# place, rollback() swaps the two back. A failed ranking leaves the mirrorlist alone.
+# Every write of one update, rollback or peer cleanup goes through one PrivilegedWriter,
+# a root shell started through pkexec at the first write: one prompt per click.
+#
+# The sweep takes minutes, so when it starts up to PROVISIONAL_PROBES of the servers
+# already known (the mirrorlist, its .pacnew and the Arch mirror status) are probed
+# once, and as soon as PROVISIONAL_COUNT of them answer within PROVISIONAL_LATENCY with
+# a current database they are applied as a provisional list: pacman gets fast mirrors
+# after seconds and the final ranking replaces them when rate-mirrors is done. Probing
+# stops early once rate-mirrors has saved its ranking, it measures on the same link.
+
+# (rate-mirrors target, mirrorlist, human readable name, repository probed by check())
+MIRRORLISTS = [
+    ("arch", "/etc/pacman.d/mirrorlist", "Arch", "core"),
+    ("chaotic-aur", "/etc/pacman.d/chaotic-mirrorlist", "Chaotic AUR", "chaotic-aur"),
+]
+CONCURRENCY = 40
+MIN_SERVERS = 3
+CHECK_TOP = 3
+LATENCY_BUDGET = 3.0  # seconds until the database response headers arrive
+MAX_LAG = 24 * 3600  # seconds a database may be behind the newest probed copy
+PREVIOUS_SUFFIX = ".previous"
+# provisional list: applied once this many mirrors answered within this many seconds
+PROVISIONAL_COUNT = 5
+PROVISIONAL_LATENCY = 0.5
+# servers probed at most, the list order wins: the current ones first, then the local
+# candidates, then the mirror status, so probing ends within one LATENCY_BUDGET
+PROVISIONAL_PROBES = 30
+STATUS_URL = "https://archlinux.org/mirrors/status/json/"
+
+# run as root, "$1" is the mirrorlist, "$2" the candidate and "$3" is "keep" when the
+# previous version must not be replaced
+APPLY_SCRIPT = (
+    'cp "$2" "$1.new" && chmod 644 "$1.new" && '
+    '{ [ "$3" = keep ] || [ ! -e "$1" ] || cp -p "$1" "$1%s"; } && mv -f "$1.new" "$1"' % PREVIOUS_SUFFIX
+)
+ROLLBACK_SCRIPT = 'cp -p "$1%s" "$1.new" && cp -p "$1" "$1%s" && mv -f "$1.new" "$1"' % (PREVIOUS_SUFFIX, PREVIOUS_SUFFIX)
+# the pkexec helper, reads (action, mirrorlist, candidate, keep) as four lines per
+# request and answers each with the exit status of the action on a line of its own
+HELPER_SCRIPT = (
+    "apply() { %s; }\n"
+    "rollback() { %s; }\n"
+    'while IFS= read -r action && IFS= read -r mirrorlist && IFS= read -r candidate && IFS= read -r keep; do\n'
+    '  case "$action" in apply|rollback) "$action" "$mirrorlist" "$candidate" "$keep" ;; *) false ;; esac\n'
+    "  echo $?\n"
+    "done\n"
+) % (APPLY_SCRIPT, ROLLBACK_SCRIPT)
+
+
+def rate_mirrors_installed():
+    return shutil.which("rate-mirrors") is not None
+
+
+def rate_mirrors_cmd(target, mirrorlist):
+    return [
+        "rate-mirrors",
+        "--concurrency", str(CONCURRENCY),
+        "--disable-comments",  # Ignore comments in the mirrorlist
+        "--save", mirrorlist,  # Save the updated mirrorlist
+        target,
+    ]
+
+
+def servers(text):
+    # Server lines in order, commented out ones and LAN peers are skipped
+    result = []
+    for line in lancache.with_peers(text, []).splitlines():
+        key, _, value = line.strip().partition("=")
+        if key.strip() == "Server" and value.strip():
+            result.append(value.strip())
+    return result
+
+
+def probe(server, repo, timeout=LATENCY_BUDGET):
+    """
+    Asks a server for the repository database (HEAD).
+
+    Returns:
+        tuple: (latency in seconds or None, Last-Modified timestamp or None, error or None)
+    """
+    url = server.replace("$repo", repo).replace("$arch", platform.machine()) + "/%s.db" % repo
+    start = time.monotonic()
+    try:
+        request = urllib.request.Request(url, method="HEAD")
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            latency = time.monotonic() - start
+            last_modified = response.headers.get("Last-Modified")
+    except (OSError, ValueError) as e:
+        return None, None, str(getattr(e, "reason", e))
+    try:
+        modified = email.utils.parsedate_to_datetime(last_modified).timestamp() if last_modified else None
+    except (TypeError, ValueError):
+        modified = None
+    return latency, modified, None
+
+
+def probe_all(server_list, repo, timeout=LATENCY_BUDGET):
+    # {server: probe()}, probed concurrently
+    if not server_list:
+        return {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(server_list), CONCURRENCY)) as executor:
+        futures = {server: executor.submit(probe, server, repo, timeout) for server in server_list}
+        return {server: future.result() for server, future in futures.items()}
+
+
+def check(candidate, repo):
+    """
+    Health check of a candidate mirrorlist text.
+
+    Returns:
+        tuple: (list of problems, empty when it may be applied, {server: probe()} of the top servers)
+    """
+    server_list = servers(candidate)
+    if len(server_list) < MIN_SERVERS:
+        return ["only %d server(s), at least %d expected" % (len(server_list), MIN_SERVERS)], {}
+
+    results = probe_all(server_list[:CHECK_TOP], repo)
+    newest = max((modified for _, modified, _ in results.values() if modified is not None), default=None)
+    problems = []
+    for server, (latency, modified, error) in results.items():
+        if error is not None:
+            problems.append("%s: %s" % (server, error))
+        elif latency > LATENCY_BUDGET:
+            problems.append("%s: %.1f s, budget %.1f s" % (server, latency, LATENCY_BUDGET))
+        elif modified is not None and newest - modified > MAX_LAG:
+            problems.append("%s: %s.db is %.0f hours behind" % (server, repo, (newest - modified) / 3600))
+    return problems, results
+
+
+def median_latency(results):
+    latencies = [latency for latency, _, error in results.values() if error is None]
+    return statistics.median(latencies) if latencies else None
+
+
+def format_latency(latency):
+    return "unreachable" if latency is None else "%.0f ms" % (latency * 1000)
+
+
+class PrivilegedWriter:
+    """
+    Root shell for the mirrorlist writes of one action, pkexec runs at the first write
+    and the helper exits when the writer is closed. Once authentication was dismissed
+    or the helper died every further write fails without a second prompt.
+    """
+
+    def __init__(self):
+        self.process = None
+        self.failed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def run(self, action, mirrorlist, candidate="", keep=""):
+        if self.failed:
+            return False
+        if self.process is None:
+            try:
+                self.process = subprocess.Popen(
+                    ["pkexec", "/bin/sh", "-c", HELPER_SCRIPT],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    text=True,
+                )
+            except OSError as e:
+                print("[ERROR]: Cannot run pkexec: %s" % e)
+                self.failed = True
+                return False
+        try:
+            self.process.stdin.write("%s\n%s\n%s\n%s\n" % (action, mirrorlist, candidate, keep))
+            self.process.stdin.flush()
+            reply = self.process.stdout.readline()
+        except OSError:
+            reply = ""
+        if not reply:
+            self.failed = True
+            return False
+        return reply.strip() == "0"
+
+    def apply(self, mirrorlist, text, keep_previous=False):
+        """
+        Replaces the mirrorlist with text in one rename, the current one becomes the
+        previous unless keep_previous is set.
+        """
+        with tempfile.NamedTemporaryFile("w", prefix="mirrorlist-", suffix=".candidate", delete=False) as f:
+            f.write(text)
+        try:
+            return self.run("apply", mirrorlist, f.name, "keep" if keep_previous else "replace")
+        finally:
+            os.unlink(f.name)
+
+    def rollback(self, mirrorlist):
+        return self.run("rollback", mirrorlist)
+
+    def close(self):
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        self.process.wait()
+        self.process = None
+
+
+def drop_peers(alive=(), on_status=print):
+    """
+    Removes the LAN peers that are not in alive from the mirrorlists, all of them by
+    default. Mirrorlists without such peers are not written, no pkexec prompt for them.
+
+    Returns:
+        bool: False when a mirrorlist could not be written.
+    """
+    ok = True
+    with PrivilegedWriter() as writer:
+        for _, mirrorlist, name, _ in MIRRORLISTS:
+            mirrorlist = paths.resolve(mirrorlist)
+            try:
+                with open(mirrorlist, "r") as f:
+                    text = f.read()
+            except OSError:
+                continue
+            listed = lancache.peers_in(text)
+            kept = [server for server in listed if server in alive]
+            if kept == listed:
+                continue
+            # the previous version stays the one from before the last update
+            if writer.apply(mirrorlist, lancache.with_peers(text, kept), keep_previous=True):
+                on_status(f"{name}: {len(listed) - len(kept)} LAN package cache(s) removed", "info")
+            else:
+                on_status(f"Could not write {mirrorlist}", "error")
+                ok = False
+    return ok
+
+
+def has_previous():
+    return any(os.path.isfile(paths.resolve(mirrorlist) + PREVIOUS_SUFFIX) for _, mirrorlist, _, _ in MIRRORLISTS)
+
+
+def rollback(on_status=print):
+    """
+    Swaps every mirrorlist with its previous version, returns False when one failed.
+    """
+    ok = True
+    with PrivilegedWriter() as writer:
+        for _, mirrorlist, name, _ in MIRRORLISTS:
+            mirrorlist = paths.resolve(mirrorlist)
+            if not os.path.isfile(mirrorlist + PREVIOUS_SUFFIX):
+                continue
+            if writer.rollback(mirrorlist):
+                on_status(f"{name} mirrorlist restored", "info")
+            else:
+                on_status(f"Could not restore the {name} mirrorlist", "error")
+                ok = False
+    return ok
+
+
+def known_servers(mirrorlist, target):
+    """
+    Returns the servers probed for the provisional list: the Server lines of the mirrorlist
+    and of its .pacnew, commented out or not (pacman-mirrorlist ships all of them commented
+    out), and for Arch the active mirrors of the mirror status page.
+    """
+    found = []
+    for path in (mirrorlist, mirrorlist + ".pacnew"):
+        try:
+            with open(path, "r") as f:
+                text = f.read()
+        except OSError:
+            continue
+        for line in lancache.with_peers(text, []).splitlines():
+            key, _, value = line.strip().lstrip("#").partition("=")
+            if key.strip() == "Server" and value.strip():
+                found.append(value.strip())
+    if target == "arch":
+        found += status_servers()
+    return list(dict.fromkeys(found))
+
+
+def status_servers(timeout=5):
+    # fully synced https mirrors from the Arch mirror status, the list rate-mirrors uses too
+    try:
+        with urllib.request.urlopen(STATUS_URL, timeout=timeout) as response:
+            status = json.load(response)
+    except (OSError, ValueError) as e:
+        print("[INFO]: Arch mirror status not available: %s" % e)
+        return []
+    return [
+        mirror["url"] + "$repo/os/$arch"
+        for mirror in status.get("urls", [])
+        if mirror.get("active") and mirror.get("protocol") == "https" and (mirror.get("completion_pct") or 0) >= 1
+    ]
+
+
+def probe_stream(server_list, repo, timeout=LATENCY_BUDGET):
+    # yields (server, probe()) as the probes finish, pending ones are cancelled on close()
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(len(server_list), CONCURRENCY)))
+    futures = {executor.submit(probe, server, repo, timeout): server for server in server_list}
+    try:
+        for future in concurrent.futures.as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def provisional_servers(results):
+    # mirrors below PROVISIONAL_LATENCY with a current database, fastest first
+    newest = max((modified for _, modified, _ in results.values() if modified is not None), default=None)
+    fast = [
+        (latency, server)
+        for server, (latency, modified, error) in results.items()
+        if error is None
+        and latency <= PROVISIONAL_LATENCY
+        and (modified is None or newest - modified <= MAX_LAG)
+    ]
+    return [server for _, server in sorted(fast)]
+
+
+def finish_ranking(process, candidate_file, repo, name, on_status):
+    """
+    Waits for rate-mirrors and checks its candidate.
+
+    Returns:
+        tuple: (candidate text or None, {server: probe()} of its top servers)
+    """
+    returncode = process.wait()
+    if returncode != 0 or not os.path.isfile(candidate_file):
+        on_status(f"{name}: rate-mirrors failed (exit status {returncode})", "error")
+        return None, {}
+    with open(candidate_file, "r") as f:
+        candidate = f.read()
+    problems, results = check(candidate, repo)
+    if problems:
+        on_status(f"{name}: ranking rejected\n" + "\n".join(problems), "error")
+        return None, {}
+    return candidate, results
+
+
+def update_mirrorlist(target, mirrorlist, name, repo, on_status, peers, writer):
+    """
+    Ranks one mirrorlist. rate-mirrors sweeps in the background while the known servers
+    are probed, as soon as PROVISIONAL_COUNT of them are fast a provisional list is
+    applied, the checked rate-mirrors ranking replaces it when the sweep is done. Both
+    go through writer, a PrivilegedWriter.
+
+    Returns:
+        tuple: (True when the final ranking was applied, summary line)
+    """
+    start = time.monotonic()
+    try:
+        with open(mirrorlist, "r") as f:
+            current = f.read()
+    except OSError:
+        current = ""
+    current_top = servers(current)[:CHECK_TOP]
+
+    with tempfile.TemporaryDirectory(prefix="snigdhaos-mirrors-") as directory:
+        candidate_file = os.path.join(directory, "mirrorlist")
+        try:
+            process = subprocess.Popen(rate_mirrors_cmd(target, candidate_file), shell=False)
+        except OSError as e:
+            on_status(f"{name}: rate-mirrors failed: {e}", "error")
+            return False, f"{name}: kept"
+
+        # the current top servers go first, they are the "before" of the summary
+        results = {}
+        provisional = False
+        candidates = list(dict.fromkeys(current_top + known_servers(mirrorlist, target)))[:PROVISIONAL_PROBES]
+        stream = probe_stream(candidates, repo)
+        for server, result in stream:
+            results[server] = result
+            fast = provisional_servers(results)
+            if len(fast) >= PROVISIONAL_COUNT and all(server in results for server in current_top):
+                text = "".join("Server = %s\n" % server for server in fast)
+                provisional = writer.apply(mirrorlist, lancache.with_peers(text, list(peers)))
+                if provisional:
+                    on_status(
+                        f"{name}: {len(fast)} fast mirrors in use after {time.monotonic() - start:.1f} s\n"
+                        "Refining the ranking, please wait...",
+                        "info",
+                    )
+                break
+            if process.poll() is not None or os.path.exists(candidate_file):
+                break
+        # stop probing, rate-mirrors measures on the same link
+        stream.close()
+
+        candidate, after = finish_ranking(process, candidate_file, repo, name, on_status)
+
+    before = median_latency({server: results[server] for server in current_top if server in results})
+    if candidate is None:
+        if provisional:
+            after = {server: results[server] for server in fast[:CHECK_TOP]}
+            return False, f"{name}: {format_latency(before)} -> {format_latency(median_latency(after))} (provisional list kept)"
+        return False, f"{name}: kept"
+
+    # Packages already downloaded by machines on the LAN come first, upstream on a miss.
+    # After a provisional list the previous version stays the one from before the update.
+    if not writer.apply(mirrorlist, lancache.with_peers(candidate, list(peers)), keep_previous=provisional):
+        on_status(f"Could not write {mirrorlist}", "error")
+        return False, f"{name}: kept"
+    line = f"{name}: {format_latency(before)} -> {format_latency(median_latency(after))}"
+    print(
+        f"[INFO]: {name} mirrorlist updated in {time.monotonic() - start:.1f} s, "
+        f"median latency of the top {CHECK_TOP} {line.split(': ', 1)[1]}"
+    )
+    return True, line
+
+
+def update(on_status=print, peers=()):
+    """
+    Ranks the Arch and Chaotic AUR mirrors, checks the result and applies it with LAN
+    peers at the top.
+
+    Args:
+        on_status (callable): Called with (message, level), level is "info", "warning" or "error".
+        peers (list): Mirrorlist servers of LAN package caches, see lancache.PeerDiscovery.
+
+    Returns:
+        tuple: (True when every mirrorlist was updated, summary with the latencies before and after)
+    """
+    if not rate_mirrors_installed():
+        on_status("rate-mirrors not found. Installing...", "warning")
+        try:
+            subprocess.run(["sudo", "pacman", "-S", "--noconfirm", "rate-mirrors"], check=True)
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"Error installing rate-mirrors: {e}")
+            on_status("Error installing rate-mirrors. Please install manually.", "error")
+            return False, "rate-mirrors is not available"
+
+    ok = True
+    summary = []
+    # one pkexec prompt for the provisional and final lists of both mirrorlists
+    with PrivilegedWriter() as writer:
+        for target, mirrorlist, name, repo in MIRRORLISTS:
+            on_status(f"Updating {name} Mirrorlist\nLooking for fast mirrors...", "info")
+            updated, line = update_mirrorlist(
+                target, paths.resolve(mirrorlist), name, repo, on_status, peers, writer
+            )
+            ok &= updated
+            summary.append(line)
+    if peers:
+        summary.append(f"{len(peers)} LAN package cache(s) first")
+    return ok, "\n".join(summary)
@@ -0,0 +1,17 @@
+import socket
+
+# Define a constant REMOTE_SERVER with the address of the server (Google) to be used later for network operations
+REMOTE_SERVER = "www.google.com"
+
+
+def is_connected(host=REMOTE_SERVER, timeout=2):
+    try:
+        address = socket.gethostbyname(host)
+        s = socket.create_connection((address, 80), timeout)
+        s.close()
+
+        return True
+    except OSError:
+        pass
+
+    return False
@@ -0,0 +1,68 @@
+import itertools
+import threading
+
+# Long running actions shared by the GUI and the D-Bus service
+#
+# Every mirror update and package install goes through one Operations instance, keyed
+# by what it touches ("mirrors", "tool:<package>"). Starting an operation whose key is
+# already running returns the running operation instead of a second one, whoever
+# started it, so a button click and a D-Bus call never rank or install twice at once.
+# Listeners are called with ("started" | "progress" | "completed", operation, key,
+# values...) on the thread the event happens on.
+
+
+class Operations:
+    def __init__(self):
+        self.running = {}  # key -> operation id
+        self.listeners = []
+        self.counter = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def notify(self, event, operation, key, *values):
+        for listener in self.listeners:
+            try:
+                listener(event, operation, key, *values)
+            except Exception as e:
+                print("[ERROR]: Operation listener failed: %s" % e)
+
+    def key_of(self, operation):
+        with self.lock:
+            for key, running in self.running.items():
+                if running == operation:
+                    return key
+        return None
+
+    def run(self, key, target, *args):
+        """
+        Starts target(operation, *args) on a worker unless an operation with the same
+        key is running. target returns (success, message).
+
+        Returns:
+            tuple: (operation id, True when it was started by this call)
+        """
+        with self.lock:
+            operation = self.running.get(key)
+            if operation is not None:
+                return operation, False
+            operation = "%s-%d" % (key.split(":", 1)[0], next(self.counter))
+            self.running[key] = operation
+
+        def worker():
+            try:
+                success, message = target(operation, *args)
+            except Exception as e:
+                print("[ERROR]: Operation %s failed: %s" % (operation, e))
+                success, message = False, str(e)
+            with self.lock:
+                del self.running[key]
+            self.notify("completed", operation, key, success, message)
+
+        self.notify("started", operation, key)
+        threading.Thread(target=worker, daemon=True).start()
+        return operation, True
+
+    def progress(self, operation, message):
+        self.notify("progress", operation, self.key_of(operation), message)
@@ -0,0 +1,116 @@
+import os
+import subprocess
+
+from . import paths
+
+# Helpers reading the local pacman database directly. Every installed package has a
+# "<name>-<pkgver>-<pkgrel>" directory in the local database, so one directory listing
+# answers "is it installed?" for any number of packages without spawning pacman.
+
+LOCAL_DB = "/var/lib/pacman/local"
+
+
+def split_entry(entry):
+    """
+    Splits a local database directory name into (name, version).
+    Returns None for entries that are not package directories (e.g. ALPM_DB_VERSION).
+    """
+    parts = entry.rsplit("-", 2)
+    if len(parts) != 3:
+        return None
+    return parts[0], "%s-%s" % (parts[1], parts[2])
+
+
+def local_entries():
+    # name -> directory in the local database
+    local_db = paths.resolve(LOCAL_DB)
+    try:
+        entries = os.listdir(local_db)
+    except OSError as e:
+        print("[ERROR]: Cannot read local pacman database %s: %s" % (local_db, e))
+        return {}
+
+    result = {}
+    for entry in entries:
+        split = split_entry(entry)
+        if split is not None:
+            result[split[0]] = os.path.join(local_db, entry)
+    return result
+
+
+def installed_packages(names=None):
+    """
+    Returns the set of installed package names, restricted to names when given.
+
+    Args:
+        names (iterable): Optional package names to check in a single scan.
+    """
+    installed = set(local_entries())
+    if names is not None:
+        return installed & set(names)
+    return installed
+
+
+def read_desc(path):
+    """
+    Parses a pacman "desc" file into a dict of %FIELD% -> list of lines.
+
+    Args:
+        path (str): Path of the desc file.
+    """
+    fields = {}
+    current = None
+    with open(path, "r", errors="replace") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line.startswith("%") and line.endswith("%"):
+                current = fields.setdefault(line.strip("%"), [])
+            elif line and current is not None:
+                current.append(line)
+    return fields
+
+
+def installed_sizes(names):
+    """
+    Returns {name: installed size in bytes} for the installed packages among names.
+    """
+    entries = local_entries()
+    sizes = {}
+    for name in names:
+        if name not in entries:
+            continue
+        try:
+            desc = read_desc(os.path.join(entries[name], "desc"))
+            sizes[name] = int(desc.get("SIZE", ["0"])[0])
+        except (OSError, ValueError) as e:
+            print("[ERROR]: Cannot read size of %s: %s" % (name, e))
+            sizes[name] = 0
+    return sizes
+
+
+def format_size(size):
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return "%.0f %s" % (size, unit)
+        size /= 1024
+    return "%.1f GiB" % size
+
+
+def run_pacman(pacman_cmd, on_line=print):
+    """
+    Runs a pacman command, handing every output line to on_line. Returns the exit code.
+    """
+    try:
+        with subprocess.Popen(
+            pacman_cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            bufsize=1,
+            universal_newlines=True,
+        ) as process:
+            for line in process.stdout:
+                on_line(line.rstrip("\n"))
+    except OSError as e:
+        on_line("[ERROR]: Cannot run %s: %s" % (pacman_cmd[0], e))
+        return -1
+    return process.returncode
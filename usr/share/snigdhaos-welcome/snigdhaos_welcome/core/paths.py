@@ -0,0 +1,63 @@
+import os
+
+# System root prefix
+#
+# Modules keep the paths they use as they are on a running system ("/etc/calamares",
+# "/var/lib/pacman/db.lck", ...) and resolve() them when they are used, so the app can
+# work on another tree: a freshly installed target mounted at /mnt, or a fixture tree
+# for tests and benchmarks. Two roots are kept:
+#
+#   root       installed files (/etc, /usr, /var, ...), SNIGDHAOS_WELCOME_ROOT or --root
+#   host root  kernel and runtime interfaces (/proc, /sys, /run, /dev), which belong to
+#              the running machine even when the root is a mounted target,
+#              SNIGDHAOS_WELCOME_HOST_ROOT
+#
+# Both default to "/", where resolve() returns the path unchanged.
+
+ROOT_ENV = "SNIGDHAOS_WELCOME_ROOT"
+HOST_ROOT_ENV = "SNIGDHAOS_WELCOME_HOST_ROOT"
+HOST_DIRS = ("/proc", "/sys", "/run", "/dev")
+
+roots = {
+    "root": os.path.abspath(os.environ.get(ROOT_ENV) or "/"),
+    "host": os.path.abspath(os.environ.get(HOST_ROOT_ENV) or "/"),
+}
+
+
+def set_root(root=None, host_root=None):
+    """
+    Changes the roots for this process and for the processes it starts.
+
+    Args:
+        root (str): Root of the installed files, None to keep the current one.
+        host_root (str): Root of /proc, /sys, /run and /dev, None to keep the current one.
+    """
+    for key, value, env in (("root", root, ROOT_ENV), ("host", host_root, HOST_ROOT_ENV)):
+        if value is not None:
+            roots[key] = os.path.abspath(value)
+            os.environ[env] = roots[key]
+
+
+def root():
+    return roots["root"]
+
+
+def is_host(path):
+    return any(path == directory or path.startswith(directory + "/") for directory in HOST_DIRS)
+
+
+def resolve(path):
+    """
+    Returns where the absolute system path lives under the configured root.
+    """
+    prefix = roots["host"] if is_host(path) else roots["root"]
+    if prefix == "/":
+        return path
+    return os.path.join(prefix, path.lstrip("/"))
+
+
+def pacman_args():
+    # pacman keeps its database and log under --root, the package cache stays the host's
+    if roots["root"] == "/":
+        return []
+    return ["--root", roots["root"]]
@@ -0,0 +1,148 @@
+import os
+import subprocess
+import threading
+import time
+import urllib.request
+from os.path import expanduser
+
+from . import paths
+
+# Speculative pre-download of catalog tool packages
+#
+# The packages (and missing dependencies) of tools that are not installed yet are
+# resolved with "pacman -Sp" and downloaded into a user owned cache directory at low
+# CPU priority and a capped rate. install_package() later passes this directory to
+# pacman as an extra --cachedir so installing a tool no longer hits the network.
+
+CACHE_DIR = os.path.join(expanduser("~"), ".cache/snigdhaos-welcome/pkg")
+# the running system's cache, pacman keeps using it with --root (see paths.pacman_args)
+SYSTEM_CACHE_DIR = "/var/cache/pacman/pkg"
+
+
+def cachedir_args():
+    # extra pacman arguments making prefetched packages visible, system cache stays first
+    # so that anything pacman downloads itself still lands there
+    if not os.path.isdir(CACHE_DIR):
+        return []
+    return ["--cachedir", SYSTEM_CACHE_DIR, "--cachedir", CACHE_DIR]
+
+
+class Prefetcher(threading.Thread):
+    def __init__(
+        self,
+        packages,
+        is_connected,
+        pacman_lockfile,
+        cache_dir=CACHE_DIR,
+        rate_limit=512 * 1024,
+        poll_interval=10,
+    ):
+        """
+        Args:
+            packages (list): Package names to pre-download.
+            is_connected (callable): Connectivity probe, returns True when online.
+            pacman_lockfile (str): Downloads pause while this file exists.
+            cache_dir (str): Directory receiving the packages.
+            rate_limit (int): Bandwidth cap in bytes per second.
+            poll_interval (int): Seconds between connectivity/lock checks while waiting.
+        """
+        super(Prefetcher, self).__init__(daemon=True)
+        self.packages = list(packages)
+        self.is_connected = is_connected
+        self.pacman_lockfile = pacman_lockfile
+        self.cache_dir = cache_dir
+        self.rate_limit = rate_limit
+        self.poll_interval = poll_interval
+        self.stopped = threading.Event()
+
+    def stop(self):
+        self.stopped.set()
+
+    def run(self):
+        if not self.packages:
+            return
+        try:
+            # Linux threads carry their own nice value
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except OSError:
+            pass
+
+        while not self.stopped.is_set():
+            if not self.is_connected() or os.path.exists(self.pacman_lockfile):
+                self.stopped.wait(self.poll_interval)
+                continue
+
+            urls = self.resolve()
+            if urls is None:
+                self.stopped.wait(self.poll_interval)
+                continue
+
+            if all(self.download(url) for url in urls):
+                print("[INFO]: Prefetched %s" % " ".join(self.packages))
+                return
+            self.stopped.wait(self.poll_interval)
+
+    def resolve(self):
+        # urls of the packages and their missing dependencies, without needing root
+        try:
+            process = subprocess.run(
+                ["pacman"] + paths.pacman_args() + ["-Sp", "--print-format", "%l"] + self.packages,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                universal_newlines=True,
+                check=True,
+            )
+        except (OSError, subprocess.CalledProcessError) as e:
+            print("[ERROR]: Prefetch could not resolve %s: %s" % (self.packages, e))
+            return None
+        return [line.strip() for line in process.stdout.splitlines() if "://" in line]
+
+    def download(self, url):
+        """
+        Downloads one package, returns False when it had to stop (network gone,
+        pacman started, prefetch cancelled) so the caller retries later.
+        """
+        filename = os.path.basename(url)
+        dest = os.path.join(self.cache_dir, filename)
+        if os.path.exists(dest) or os.path.exists(os.path.join(SYSTEM_CACHE_DIR, filename)):
+            return True
+        if url.startswith("file://"):
+            return True
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        partial = dest + ".part"
+        try:
+            with urllib.request.urlopen(url, timeout=15) as response, open(partial, "wb") as f:
+                start = time.monotonic()
+                last_check = start
+                received = 0
+                while True:
+                    chunk = response.read(64 * 1024)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    received += len(chunk)
+
+                    # keep the average rate below the cap
+                    ahead = received / self.rate_limit - (time.monotonic() - start)
+                    if ahead > 0:
+                        time.sleep(ahead)
+
+                    now = time.monotonic()
+                    if now - last_check > 5:
+                        last_check = now
+                        if (
+                            self.stopped.is_set()
+                            or os.path.exists(self.pacman_lockfile)
+                            or not self.is_connected()
+                        ):
+                            raise InterruptedError("prefetch interrupted")
+            os.replace(partial, dest)
+            return True
+        except (OSError, InterruptedError) as e:
+            print("[INFO]: Prefetch of %s paused: %s" % (filename, e))
+            try:
+                os.unlink(partial)
+            except OSError:
+                pass
+            return False
@@ -0,0 +1,180 @@
+# Unattended installation from a preseed profile
+#
+#   snigdhaos-welcome stage-profile profile.toml [--dry-run]
+#
+# Validates the profile, runs the pre-flight checks, stages the Calamares settings,
+# packages and bootloader configuration the install buttons would stage, and launches
+# the installer. Nothing here imports GTK, so it also works over SSH or from a
+# first-boot unit. Example profile:
+#
+#   [install]
+#   mode = "offline"            # "offline" or "online"
+#   bootloader = "grub"         # "grub" or "systemd-boot", only used on EFI systems
+#
+#   [checks]
+#   verify_media = true         # hash the live medium before installing
+#   require_network = true      # defaults to true for online installs
+#
+#   [calamares]
+#   settings = "/etc/calamares/settings-unattended.conf"  # optional settings.conf override
+#
+# Calamares itself only runs without interaction when the settings file points it at
+# an automated sequence; the optional [calamares] settings key exists for that.
+
+import os
+import subprocess
+import tomllib
+
+from . import install
+from . import network
+from . import paths
+from . import verify
+
+SCHEMA = {
+    "install": {"mode": str, "bootloader": str},
+    "checks": {"verify_media": bool, "require_network": bool},
+    "calamares": {"settings": str},
+}
+
+
+class PreseedError(Exception):
+    pass
+
+
+def load_profile(path):
+    """
+    Reads and validates a preseed profile, raises PreseedError listing every problem.
+    """
+    try:
+        with open(path, "rb") as f:
+            profile = tomllib.load(f)
+    except (OSError, tomllib.TOMLDecodeError) as e:
+        raise PreseedError("cannot read %s: %s" % (path, e))
+
+    errors = []
+    for section, values in profile.items():
+        if section not in SCHEMA:
+            errors.append("unknown section [%s]" % section)
+            continue
+        if not isinstance(values, dict):
+            errors.append("[%s] must be a table" % section)
+            continue
+        for key, value in values.items():
+            expected = SCHEMA[section].get(key)
+            if expected is None:
+                errors.append("unknown key %s.%s" % (section, key))
+            elif not isinstance(value, expected):
+                errors.append("%s.%s must be a %s" % (section, key, expected.__name__))
+    # the checks below read the tables
+    if any(not isinstance(values, dict) for values in profile.values()):
+        raise PreseedError("invalid profile %s:\n  %s" % (path, "\n  ".join(errors)))
+
+    settings = profile.setdefault("install", {})
+    if settings.get("mode") not in install.MODES:
+        errors.append("install.mode must be one of %s" % ", ".join(sorted(install.MODES)))
+    settings.setdefault("bootloader", "grub")
+    if settings["bootloader"] not in install.BOOTLOADERS:
+        errors.append("install.bootloader must be one of %s" % ", ".join(sorted(install.BOOTLOADERS)))
+
+    checks = profile.setdefault("checks", {})
+    checks.setdefault("verify_media", False)
+    checks.setdefault("require_network", settings.get("mode") == "online")
+
+    override = profile.get("calamares", {}).get("settings")
+    if override is not None and not os.path.isfile(override):
+        errors.append("calamares.settings %s does not exist" % override)
+
+    if errors:
+        raise PreseedError("invalid profile %s:\n  %s" % (path, "\n  ".join(errors)))
+    return profile
+
+
+def preflight(profile):
+    """
+    Runs the checks the GUI would have shown as dialogs, returns a list of problems.
+    """
+    problems = []
+    if install.is_locked():
+        problems.append(
+            "pacman lockfile %s found, is another pacman process running?" % paths.resolve(install.PACMAN_LOCKFILE)
+        )
+    if not install.is_live():
+        problems.append("%s not found, is this a live session?" % paths.resolve(install.CALAMARES_POLKIT))
+
+    if install.is_efi():
+        bootloader_file = install.bootloader_file(profile["install"]["bootloader"])
+        if not os.path.isfile(bootloader_file):
+            problems.append("%s not found" % bootloader_file)
+    elif profile["install"]["bootloader"] == "systemd-boot":
+        problems.append("systemd-boot requires an EFI system")
+
+    if profile["checks"]["require_network"] and not network.is_connected():
+        problems.append("no internet connection")
+
+    if profile["checks"]["verify_media"] and not problems:
+        problems.extend(verify_media())
+    return problems
+
+
+def verify_media():
+    results = []
+
+    def on_progress(done, total, rate):
+        print("\r[INFO]: Verifying media %d%% at %.0f MB/s" % (done * 100 // max(total, 1), rate / 1e6), end="", flush=True)
+
+    verifier = verify.MediaVerifier(on_progress, results.append)
+    verifier.start()
+    verifier.join()
+    print()
+    if not results:
+        raise PreseedError("media verification stopped without a result")
+    return ["%s: %s" % (image, message) for image, ok, message in results[0] or [] if not ok]
+
+
+def stage_commands(profile):
+    settings = profile["install"]
+    commands = install.mode_commands(settings["mode"], profile.get("calamares", {}).get("settings"))
+    if install.is_efi():
+        commands.append(install.bootloader_command(settings["bootloader"]))
+    return commands
+
+
+def run(profile_path, dry_run=False, log=print):
+    """
+    Validates, checks, stages and installs from a profile, returns the exit code.
+
+    Args:
+        log (callable): Receives every "[INFO]"/"[ERROR]" line.
+    """
+    try:
+        profile = load_profile(profile_path)
+    except PreseedError as e:
+        log("[ERROR]: %s" % e)
+        return 2
+
+    try:
+        problems = preflight(profile)
+    except PreseedError as e:
+        log("[ERROR]: %s" % e)
+        return 1
+    for problem in problems:
+        log("[ERROR]: %s" % problem)
+    if problems:
+        return 1
+
+    commands = stage_commands(profile)
+    for command in commands:
+        log("[INFO]: %s" % " ".join(command))
+        if not dry_run:
+            # sequential, the installer must not start before its configuration is in place
+            try:
+                subprocess.run(command, check=True)
+            except (OSError, subprocess.CalledProcessError) as e:
+                log("[ERROR]: Staging failed: %s" % e)
+                return 1
+
+    if dry_run:
+        log("[INFO]: Dry run, not launching %s" % install.CALAMARES_POLKIT)
+        return 0
+    log("[INFO]: Launching %s" % install.CALAMARES_POLKIT)
+    return install.launch_installer().wait()
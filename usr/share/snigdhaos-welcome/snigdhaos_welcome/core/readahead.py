@@ -0,0 +1,255 @@
+import ctypes
+import glob
+import os
+import platform
+import struct
+import threading
+import time
+
+# Page cache warm-up of the installer
+#
+# On a live USB the first start of Calamares is dominated by cold reads of the binary,
+# Qt and the Calamares modules from squashfs. While the user is still looking at the
+# install page, the shared library closure of the installer (ELF DT_NEEDED entries,
+# followed recursively) plus the Calamares module and data directories is handed to
+# the kernel with posix_fadvise(WILLNEED), at idle IO priority, up to a byte budget.
+
+INSTALLER = "/usr/bin/calamares"
+EXTRA_DIRS = ["/usr/lib/calamares", "/usr/share/calamares", "/etc/calamares"]
+LIBRARY_DIRS = ["/usr/lib", "/usr/lib64", "/lib", "/lib64", "/usr/local/lib"]
+DEFAULT_BUDGET = 384 * 1024 * 1024
+
+PT_LOAD = 1
+PT_DYNAMIC = 2
+DT_NULL = 0
+DT_NEEDED = 1
+DT_STRTAB = 5
+DT_RPATH = 15
+DT_RUNPATH = 29
+
+# ioprio_set syscall numbers, IO priority is best-effort only on other architectures
+IOPRIO_SET = {"x86_64": 251, "aarch64": 30, "i686": 289, "i386": 289}
+IOPRIO_CLASS_IDLE = 3
+IOPRIO_CLASS_SHIFT = 13
+IOPRIO_WHO_PROCESS = 1
+
+
+def lower_io_priority():
+    # applies to the calling thread only, Linux IO priorities are per task
+    number = IOPRIO_SET.get(platform.machine())
+    if number is None:
+        return False
+    libc = ctypes.CDLL(None, use_errno=True)
+    result = libc.syscall(
+        number,
+        IOPRIO_WHO_PROCESS,
+        threading.get_native_id(),
+        IOPRIO_CLASS_IDLE << IOPRIO_CLASS_SHIFT,
+    )
+    return result == 0
+
+
+def elf_dependencies(path):
+    """
+    Returns (needed sonames, runpath directories) of an ELF file, ([], []) for
+    anything that is not a dynamically linked ELF file.
+    """
+    with open(path, "rb") as f:
+        ident = f.read(16)
+        if len(ident) < 16 or ident[:4] != b"\x7fELF":
+            return [], []
+        is64 = ident[4] == 2
+        endian = "<" if ident[5] == 1 else ">"
+
+        if is64:
+            header = struct.Struct(endian + "HHIQQQIHHHHHH")
+            phdr = struct.Struct(endian + "IIQQQQQQ")
+            dyn = struct.Struct(endian + "qQ")
+        else:
+            header = struct.Struct(endian + "HHIIIIIHHHHHH")
+            phdr = struct.Struct(endian + "IIIIIIII")
+            dyn = struct.Struct(endian + "iI")
+
+        fields = header.unpack(f.read(header.size))
+        phoff, phentsize, phnum = fields[4], fields[8], fields[9]
+
+        loads = []
+        dynamic = None
+        for i in range(phnum):
+            f.seek(phoff + i * phentsize)
+            entry = phdr.unpack(f.read(phdr.size))
+            if is64:
+                p_type, p_offset, p_vaddr, p_filesz = entry[0], entry[2], entry[3], entry[5]
+            else:
+                p_type, p_offset, p_vaddr, p_filesz = entry[0], entry[1], entry[2], entry[4]
+            if p_type == PT_LOAD:
+                loads.append((p_vaddr, p_offset, p_filesz))
+            elif p_type == PT_DYNAMIC:
+                dynamic = (p_offset, p_filesz)
+
+        if dynamic is None:
+            return [], []
+
+        f.seek(dynamic[0])
+        data = f.read(dynamic[1])
+        needed = []
+        runpath = []
+        strtab = None
+        for offset in range(0, len(data) - dyn.size + 1, dyn.size):
+            tag, value = dyn.unpack_from(data, offset)
+            if tag == DT_NULL:
+                break
+            if tag == DT_NEEDED:
+                needed.append(value)
+            elif tag in (DT_RPATH, DT_RUNPATH):
+                runpath.append(value)
+            elif tag == DT_STRTAB:
+                strtab = value
+
+        if strtab is None:
+            return [], []
+
+        # DT_STRTAB is a virtual address, map it back to a file offset
+        strtab_offset = None
+        for vaddr, offset, filesz in loads:
+            if vaddr <= strtab < vaddr + filesz:
+                strtab_offset = strtab - vaddr + offset
+                break
+        if strtab_offset is None:
+            return [], []
+
+        def string(index):
+            f.seek(strtab_offset + index)
+            raw = f.read(256)
+            return raw.split(b"\0", 1)[0].decode("utf-8", "replace")
+
+        origin = os.path.dirname(os.path.realpath(path))
+        dirs = []
+        for index in runpath:
+            for entry in string(index).split(":"):
+                if entry:
+                    dirs.append(entry.replace("$ORIGIN", origin).replace("${ORIGIN}", origin))
+        return [string(index) for index in needed], dirs
+
+
+def ld_so_conf_dirs(path="/etc/ld.so.conf"):
+    # library directories configured for the dynamic linker, includes followed
+    dirs = []
+    try:
+        with open(path, "r") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return dirs
+    for line in lines:
+        line = line.split("#", 1)[0].strip()
+        if line.startswith("include"):
+            for included in sorted(glob.glob(line.split(None, 1)[1])):
+                dirs.extend(ld_so_conf_dirs(included))
+        elif line:
+            dirs.append(line)
+    return dirs
+
+
+def library_closure(binaries, library_dirs=None, stop=None):
+    """
+    Yields the binaries followed by every shared library they need, breadth first.
+    Every file is yielded before its ELF headers are read, and nothing more is read
+    once stop() returns True.
+    """
+    if library_dirs is None:
+        library_dirs = ld_so_conf_dirs() + LIBRARY_DIRS
+    seen = set()
+    queue = list(binaries)
+    while queue:
+        if stop is not None and stop():
+            return
+        path = os.path.realpath(queue.pop(0))
+        if path in seen:
+            continue
+        seen.add(path)
+        yield path
+        if stop is not None and stop():
+            return
+        try:
+            needed, runpath = elf_dependencies(path)
+        except (OSError, struct.error):
+            continue
+        for soname in needed:
+            for directory in runpath + library_dirs:
+                candidate = os.path.join(directory, soname)
+                if os.path.isfile(candidate):
+                    queue.append(candidate)
+                    break
+
+
+def walk(directories):
+    for directory in directories:
+        for root, dirs, files in os.walk(directory):
+            for name in sorted(files):
+                yield os.path.join(root, name)
+
+
+class Warmer(threading.Thread):
+    def __init__(self, installer=INSTALLER, extra_dirs=EXTRA_DIRS, budget=DEFAULT_BUDGET):
+        """
+        Args:
+            installer (str): Installer binary whose library closure is warmed.
+            extra_dirs (list): Module and data directories warmed after the closure.
+            budget (int): Maximum number of bytes handed to readahead.
+        """
+        super(Warmer, self).__init__(daemon=True)
+        self.installer = installer
+        self.extra_dirs = extra_dirs
+        self.budget = budget
+        self.cancelled = threading.Event()
+        self.warmed = 0
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def stopped(self):
+        return self.cancelled.is_set() or self.warmed >= self.budget
+
+    def files(self):
+        # shared objects among the module files pull in their own libraries
+        module_files = []
+        for path in walk(self.extra_dirs):
+            if self.stopped():
+                return
+            module_files.append(path)
+        binaries = [self.installer] + [path for path in module_files if ".so" in path]
+        yield from library_closure(binaries, stop=self.stopped)
+        yield from module_files
+
+    def run(self):
+        if not os.path.isfile(self.installer):
+            return
+        lower_io_priority()
+        start = time.monotonic()
+        count = 0
+        for path in self.files():
+            if self.stopped():
+                break
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                size = os.fstat(fd).st_size
+                length = min(size, self.budget - self.warmed)
+                os.posix_fadvise(fd, 0, length, os.POSIX_FADV_WILLNEED)
+                self.warmed += length
+                count += 1
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
+        print(
+            "[INFO]: Installer warm-up %s: %d files, %d MiB in %.1fs"
+            % (
+                "cancelled" if self.cancelled.is_set() else "done",
+                count,
+                self.warmed // (1024 * 1024),
+                time.monotonic() - start,
+            )
+        )
@@ -0,0 +1,40 @@
+import os
+from os.path import expanduser
+
+# key=value settings file shared by the GUI and the command line front end
+
+CONFIG_DIR = os.path.join(expanduser("~"), ".config/snigdhaos-welcome")
+SETTINGS = os.path.join(CONFIG_DIR, "settings.conf")
+
+
+def read(path=SETTINGS):
+    settings = {}
+    if os.path.isfile(path):
+        with open(path, "r") as f:
+            for line in f:
+                if "=" in line:
+                    key, value = line.split("=", 1)
+                    settings[key.strip()] = value.strip()
+    return settings
+
+
+def load(key, default, path=SETTINGS):
+    # booleans are normalised to "True"/"False"
+    value = read(path).get(key, default)
+    if value.lower() in ("true", "false"):
+        return value.capitalize()
+    return value
+
+
+def save(key, value, path=SETTINGS):
+    try:
+        # Rewrite the settings file keeping every other key
+        settings = read(path)
+        settings[key] = str(value)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write("".join(f"{k}={v}\n" for k, v in settings.items()))
+        print(f"[INFO]: Settings saved: {key}={value}")
+    except Exception as e:
+        # Handle any errors that occur while saving settings
+        print(f"[ERROR]: Failed to save settings: {e}")
@@ -0,0 +1,21 @@
+from . import catalog
+from . import install
+from . import network
+from . import packages
+from . import paths
+from . import settings
+
+# System state shown by "snigdhaos-welcome status"
+
+
+def collect():
+    installed = packages.installed_packages([tool.package for tool in catalog.TOOLS])
+    return {
+        "root": paths.root(),
+        "live": install.is_live(),
+        "efi": install.is_efi(),
+        "connected": network.is_connected(),
+        "pacman_locked": install.is_locked(),
+        "tools": {tool.package: tool.package in installed for tool in catalog.TOOLS},
+        "settings": settings.read(),
+    }
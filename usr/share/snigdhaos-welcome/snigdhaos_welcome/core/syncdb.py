@@ -0,0 +1,281 @@
+import array
+import bisect
+import glob
+import json
+import mmap
+import os
+import struct
+import subprocess
+import tarfile
+from os.path import expanduser
+
+from . import paths
+
+# Indexed reader for the pacman sync databases
+#
+# The sync databases are compressed tar archives holding one "desc" file per package.
+# They are streamed (never extracted to disk) into a compact index file:
+#
+#   header   magic, record count and section lengths
+#   meta     JSON with the mtime of every source database
+#   records  one tab separated line per package, sorted by name
+#   search   "\n" + "name\x1fdescription\n" per package, lower cased, same order
+#   offsets  uint32 start offsets of every record and every search line
+#
+# Later runs mmap the file and only rebuild it when a database mtime changed. Prefix
+# search is a binary search over the sorted names, substring search is a find() over
+# the search section, so neither needs to load the packages into Python objects.
+
+SYNC_DIR = "/var/lib/pacman/sync"
+INDEX_FILE = os.path.join(expanduser("~"), ".cache/snigdhaos-welcome/pkgindex.bin")
+
+MAGIC = b"SWPKIDX1"
+HEADER = struct.Struct("<8sIIIII")
+FIELDS = ("name", "version", "repo", "csize", "isize", "desc", "provides", "conflicts", "replaces")
+
+
+def sources(sync_dir=None):
+    # {database path: mtime_ns}, the index is stale as soon as this changes
+    sync_dir = sync_dir or paths.resolve(SYNC_DIR)
+    result = {}
+    for path in sorted(glob.glob(os.path.join(sync_dir, "*.db"))):
+        try:
+            result[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            pass
+    return result
+
+
+def open_tar(path):
+    """
+    Opens a sync database as a streaming tarfile. gzip/bzip2/xz are handled by tarfile,
+    zstd through the zstandard module when available, otherwise through "zstd -dc".
+    Returns (tarfile, callable releasing the decompressor or None), tarfile does not
+    close a fileobj it was handed.
+    """
+    with open(path, "rb") as f:
+        magic = f.read(4)
+
+    if magic != b"\x28\xb5\x2f\xfd":
+        return tarfile.open(path, "r|*"), None
+
+    try:
+        import zstandard
+    except ImportError:
+        process = subprocess.Popen(["zstd", "-dcq", path], stdout=subprocess.PIPE)
+
+        def release():
+            process.stdout.close()
+            process.wait()
+
+        return tarfile.open(fileobj=process.stdout, mode="r|"), release
+
+    # closing the reader closes the file as well
+    reader = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    return tarfile.open(fileobj=reader, mode="r|"), reader.close
+
+
+def parse_desc(data):
+    fields = {}
+    current = None
+    for line in data.decode("utf-8", "replace").split("\n"):
+        if line.startswith("%") and line.endswith("%"):
+            current = fields.setdefault(line.strip("%"), [])
+        elif line and current is not None:
+            current.append(line)
+    return fields
+
+
+def read_database(path):
+    """
+    Yields one record dict per package of a sync database.
+
+    Args:
+        path (str): Path of the .db file, its basename (without .db) is the repo name.
+    """
+    repo = os.path.basename(path)[: -len(".db")]
+    archive, release = open_tar(path)
+    try:
+        for member in archive:
+            if not member.isfile() or not member.name.endswith("/desc"):
+                continue
+            desc = parse_desc(archive.extractfile(member).read())
+            if "NAME" not in desc:
+                continue
+            yield {
+                "name": desc["NAME"][0],
+                "version": desc.get("VERSION", [""])[0],
+                "repo": repo,
+                "csize": desc.get("CSIZE", ["0"])[0],
+                "isize": desc.get("ISIZE", ["0"])[0],
+                "desc": desc.get("DESC", [""])[0],
+                "provides": " ".join(desc.get("PROVIDES", [])),
+                "conflicts": " ".join(desc.get("CONFLICTS", [])),
+                "replaces": " ".join(desc.get("REPLACES", [])),
+            }
+    finally:
+        archive.close()
+        if release is not None:
+            release()
+
+
+def clean(value):
+    # tabs and newlines separate fields and records
+    return value.replace("\t", " ").replace("\n", " ")
+
+
+def build(index_file=INDEX_FILE, sync_dir=None):
+    """
+    Streams every sync database into a new index file, replacing it atomically.
+    """
+    current = sources(sync_dir)
+    records = []
+    for path in current:
+        try:
+            records.extend(read_database(path))
+        except (OSError, tarfile.TarError) as e:
+            print("[ERROR]: Cannot read sync database %s: %s" % (path, e))
+
+    # the first repository wins for duplicate names, like pacman does
+    seen = set()
+    unique = []
+    for record in records:
+        if record["name"] not in seen:
+            seen.add(record["name"])
+            unique.append(record)
+    unique.sort(key=lambda record: record["name"].encode())
+
+    record_blob = bytearray()
+    search_blob = bytearray(b"\n")
+    record_offsets = array.array("I")
+    search_offsets = array.array("I")
+    for record in unique:
+        record_offsets.append(len(record_blob))
+        record_blob += ("\t".join(clean(record[field]) for field in FIELDS) + "\n").encode()
+        search_offsets.append(len(search_blob))
+        search_blob += ("%s\x1f%s\n" % (record["name"], clean(record["desc"]))).lower().encode()
+
+    meta = json.dumps({"sources": current}).encode()
+    sections = meta + bytes(record_blob) + bytes(search_blob)
+    padding = b"\0" * (-(HEADER.size + len(sections)) % 4)
+
+    os.makedirs(os.path.dirname(index_file), exist_ok=True)
+    tmp = index_file + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(unique), len(meta), len(record_blob), len(search_blob), len(padding)))
+        f.write(sections)
+        f.write(padding)
+        f.write(record_offsets.tobytes())
+        f.write(search_offsets.tobytes())
+    os.replace(tmp, index_file)
+    print("[INFO]: Indexed %d packages from %d sync databases" % (len(unique), len(current)))
+
+
+class PackageIndex:
+    def __init__(self, index_file=INDEX_FILE):
+        with open(index_file, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.count, meta_len, records_len, search_len, padding = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            raise ValueError("%s is not a package index" % index_file)
+
+        start = HEADER.size
+        self.meta = json.loads(self.map[start : start + meta_len])
+        start += meta_len
+        self.records_start = start
+        start += records_len
+        self.search_start = start
+        self.search = memoryview(self.map)[start : start + search_len]
+        start += search_len + padding
+        self.record_offsets = memoryview(self.map)[start : start + 4 * self.count].cast("I")
+        start += 4 * self.count
+        self.search_offsets = memoryview(self.map)[start : start + 4 * self.count].cast("I")
+
+    def __len__(self):
+        return self.count
+
+    def name(self, i):
+        start = self.records_start + self.record_offsets[i]
+        return self.map[start : self.map.find(b"\t", start)]
+
+    def record(self, i):
+        start = self.records_start + self.record_offsets[i]
+        line = self.map[start : self.map.find(b"\n", start)].decode()
+        return dict(zip(FIELDS, line.split("\t")))
+
+    def find(self, name):
+        # exact lookup, returns the record index or None
+        i = self.lower_bound(name.encode())
+        if i < self.count and self.name(i) == name.encode():
+            return i
+        return None
+
+    def lower_bound(self, key):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.name(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def prefix(self, query, limit=200):
+        key = query.lower().encode()
+        result = []
+        i = self.lower_bound(key)
+        while i < self.count and len(result) < limit and self.name(i).startswith(key):
+            result.append(i)
+            i += 1
+        return result
+
+    def substring(self, query, limit=200):
+        # matches the name or the description, case insensitive
+        needle = query.lower().encode()
+        search = self.map
+        base = self.search_start
+        end = base + len(self.search)
+        result = []
+        pos = search.find(needle, base, end)
+        while pos != -1 and len(result) < limit:
+            i = bisect.bisect_right(self.search_offsets, pos - base) - 1
+            result.append(i)
+            # continue after the matching package
+            if i + 1 >= self.count:
+                break
+            pos = search.find(needle, base + self.search_offsets[i + 1], end)
+        return result
+
+    def search_packages(self, query, limit=200):
+        """
+        Name prefix matches first, then substring matches in names and descriptions.
+        Returns a list of record indexes.
+        """
+        query = query.strip()
+        if not query:
+            return []
+        result = self.prefix(query, limit)
+        seen = set(result)
+        for i in self.substring(query, limit):
+            if len(result) >= limit:
+                break
+            if i not in seen:
+                seen.add(i)
+                result.append(i)
+        return result
+
+
+def load(index_file=INDEX_FILE, sync_dir=None):
+    """
+    Returns a PackageIndex, rebuilding the index file first when a sync database
+    changed since it was written.
+    """
+    try:
+        index = PackageIndex(index_file)
+        if index.meta.get("sources") == sources(sync_dir):
+            return index
+    except (OSError, ValueError, struct.error) as e:
+        print("[INFO]: Package index needs a rebuild: %s" % e)
+    build(index_file, sync_dir)
+    return PackageIndex(index_file)
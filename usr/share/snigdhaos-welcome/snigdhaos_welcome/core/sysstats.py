@@ -0,0 +1,151 @@
+import array
+import os
+
+from . import paths
+
+# System resource sampling for the dashboard page
+#
+# /proc/stat, /proc/meminfo, /proc/diskstats and /proc/net/dev are opened once and
+# re-read with pread() at offset 0 on every sample, procfs regenerates the contents on
+# each read. Counters (CPU jiffies, disk sectors, network bytes) are turned into rates
+# from the delta to the previous sample. Every series keeps its last HISTORY values in
+# a fixed-size ring buffer.
+
+HISTORY = 60
+READ_SIZE = 64 * 1024
+SECTOR_SIZE = 512  # /proc/diskstats always counts 512 byte sectors
+SERIES = ("cpu", "memory", "swap", "disk_read", "disk_write", "net_rx", "net_tx")
+
+
+class Ring:
+    def __init__(self, size=HISTORY):
+        self.data = array.array("d", [0.0] * size)
+        self.size = size
+        self.count = 0
+
+    def append(self, value):
+        self.data[self.count % self.size] = value
+        self.count += 1
+
+    def values(self):
+        # oldest first
+        if self.count <= self.size:
+            return self.data[: self.count].tolist()
+        start = self.count % self.size
+        return (self.data[start:] + self.data[:start]).tolist()
+
+    def last(self):
+        return self.data[(self.count - 1) % self.size] if self.count else 0.0
+
+
+def whole_disks(sys_block=None):
+    # partitions are not in /sys/block, virtual block devices are skipped
+    sys_block = sys_block or paths.resolve("/sys/block")
+    try:
+        names = os.listdir(sys_block)
+    except OSError:
+        return set()
+    return {name for name in names if not name.startswith(("loop", "ram", "zram", "fd", "sr"))}
+
+
+class Sampler:
+    def __init__(self, proc=None, history=HISTORY):
+        """
+        Args:
+            proc (str): procfs mount point, /proc under the host root by default.
+            history (int): Number of samples kept per series.
+        """
+        self.fds = {}
+        proc = proc or paths.resolve("/proc")
+        for name in ("stat", "meminfo", "diskstats", "net/dev"):
+            try:
+                self.fds[name] = os.open(os.path.join(proc, name), os.O_RDONLY | os.O_CLOEXEC)
+            except OSError as e:
+                print("[ERROR]: Cannot open %s/%s: %s" % (proc, name, e))
+        self.disks = whole_disks()
+        self.series = {name: Ring(history) for name in SERIES}
+        self.previous = None  # (time, cpu busy, cpu total, disk read, disk write, rx, tx)
+
+    def close(self):
+        for fd in self.fds.values():
+            os.close(fd)
+        self.fds = {}
+
+    def read(self, name):
+        fd = self.fds.get(name)
+        if fd is None:
+            return ""
+        return os.pread(fd, READ_SIZE, 0).decode("ascii", "replace")
+
+    def cpu(self):
+        # aggregate "cpu" line: user nice system idle iowait irq softirq steal ...
+        line = self.read("stat").split("\n", 1)[0].split()
+        if not line or line[0] != "cpu":
+            return 0, 0
+        values = [int(value) for value in line[1:9]]
+        idle = values[3] + values[4]
+        total = sum(values)
+        return total - idle, total
+
+    def memory(self):
+        fields = {}
+        for line in self.read("meminfo").splitlines():
+            key, _, value = line.partition(":")
+            if key in ("MemTotal", "MemAvailable", "SwapTotal", "SwapFree"):
+                fields[key] = int(value.split()[0]) * 1024
+        return fields
+
+    def disk(self):
+        read = written = 0
+        for line in self.read("diskstats").splitlines():
+            fields = line.split()
+            if len(fields) > 9 and fields[2] in self.disks:
+                read += int(fields[5])
+                written += int(fields[9])
+        return read * SECTOR_SIZE, written * SECTOR_SIZE
+
+    def network(self):
+        rx = tx = 0
+        for line in self.read("net/dev").splitlines()[2:]:
+            interface, _, counters = line.partition(":")
+            if interface.strip() == "lo":
+                continue
+            fields = counters.split()
+            if len(fields) > 8:
+                rx += int(fields[0])
+                tx += int(fields[8])
+        return rx, tx
+
+    def sample(self, now):
+        """
+        Takes one sample at monotonic time now. Returns the latest values: cpu, memory and
+        swap as fractions, memory_total/swap_total in bytes, disk and network in bytes
+        per second. Rates are only appended from the second sample on.
+        """
+        busy, total = self.cpu()
+        disk_read, disk_write = self.disk()
+        rx, tx = self.network()
+        memory = self.memory()
+
+        memory_total = memory.get("MemTotal", 0)
+        swap_total = memory.get("SwapTotal", 0)
+        self.series["memory"].append(
+            1 - memory.get("MemAvailable", 0) / memory_total if memory_total else 0.0
+        )
+        self.series["swap"].append(1 - memory.get("SwapFree", 0) / swap_total if swap_total else 0.0)
+
+        current = (now, busy, total, disk_read, disk_write, rx, tx)
+        if self.previous is not None:
+            elapsed = now - self.previous[0]
+            if elapsed > 0:
+                cpu_total = total - self.previous[2]
+                self.series["cpu"].append((busy - self.previous[1]) / cpu_total if cpu_total > 0 else 0.0)
+                for name, index in (("disk_read", 3), ("disk_write", 4), ("net_rx", 5), ("net_tx", 6)):
+                    # counters restart when an interface or disk goes away
+                    self.series[name].append(max(0, current[index] - self.previous[index]) / elapsed)
+        self.previous = current
+
+        latest = {name: ring.last() for name, ring in self.series.items()}
+        latest["memory_total"] = memory_total
+        latest["swap_total"] = swap_total
+        return latest
@@ -0,0 +1,32 @@
+from . import catalog
+from . import install
+from . import packages
+from . import paths
+from . import prefetch
+
+# Non-interactive "make sure this catalog tool is installed", used by the command line
+# front end and the D-Bus service. The GUI asks first and goes through install_package().
+
+
+def ensure(package, on_line=print):
+    """
+    Installs a catalog tool unless it already is.
+
+    Args:
+        package (str): Package name of a catalog.TOOLS entry.
+        on_line (callable): Receives pacman's output line by line.
+
+    Returns:
+        tuple: (ok, message)
+    """
+    tool = catalog.get_tool(package)
+    if tool is None:
+        return False, "Unknown tool %s, known tools: %s" % (package, ", ".join(t.package for t in catalog.TOOLS))
+    if packages.installed_packages([tool.package]):
+        return True, "%s is already installed" % tool.package
+    if install.is_locked():
+        return False, "Pacman lockfile found %s, is another pacman process running?" % paths.resolve(install.PACMAN_LOCKFILE)
+    packages.run_pacman(tool.pacman_cmd(prefetch.cachedir_args()), on_line)
+    if not packages.installed_packages([tool.package]):
+        return False, "%s could not be installed" % tool.package
+    return True, "Package %s installed" % tool.package
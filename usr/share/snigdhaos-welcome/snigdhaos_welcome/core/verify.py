@@ -0,0 +1,170 @@
+import concurrent.futures
+import glob
+import hashlib
+import mmap
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+from . import paths
+
+# Installation media integrity check
+#
+# archiso publishes a checksum next to every squashfs image (airootfs.sha512 next to
+# airootfs.sfs). Each image is hashed in a worker process from a read-only mmap, in
+# large chunks so the USB stick sees long sequential reads. Workers report progress
+# through a queue and stop as soon as the shared cancel event is set.
+#
+# A single digest cannot be split across processes, so images are what runs in
+# parallel; a medium with one image is verified by one worker at full read speed.
+
+MEDIA_DIR = "/run/archiso/bootmnt"
+CHUNK_SIZE = 16 * 1024 * 1024
+ALGORITHMS = ("sha512", "sha256", "md5")
+
+# set in every worker process by init_worker()
+progress_queue = None
+cancel_event = None
+
+
+def find_images(media_dir=None):
+    """
+    Returns [(image path, algorithm, expected hex digest or None)] for every squashfs
+    image on the medium.
+    """
+    images = []
+    media_dir = media_dir or paths.resolve(MEDIA_DIR)
+    for image in sorted(glob.glob(os.path.join(media_dir, "**", "*.sfs"), recursive=True)):
+        base = os.path.splitext(image)[0]
+        found = None
+        for algorithm in ALGORITHMS:
+            checksum_file = base + "." + algorithm
+            if os.path.isfile(checksum_file):
+                with open(checksum_file, "r") as f:
+                    content = f.read().split()
+                if content:
+                    found = (image, algorithm, content[0].lower())
+                    break
+        images.append(found or (image, "sha512", None))
+    return images
+
+
+def init_worker(progress, cancel):
+    global progress_queue, cancel_event
+    progress_queue = progress
+    cancel_event = cancel
+
+
+def hash_image(image, algorithm):
+    # runs in a worker process, returns the hex digest or None when cancelled
+    digest = hashlib.new(algorithm)
+    with open(image, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return digest.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            mapped.madvise(mmap.MADV_SEQUENTIAL)
+            view = memoryview(mapped)
+            try:
+                for offset in range(0, size, CHUNK_SIZE):
+                    if cancel_event.is_set():
+                        return None
+                    chunk = view[offset : offset + CHUNK_SIZE]
+                    digest.update(chunk)
+                    progress_queue.put(len(chunk))
+                    chunk.release()
+            finally:
+                view.release()
+    return digest.hexdigest()
+
+
+class MediaVerifier(threading.Thread):
+    def __init__(self, on_progress, on_done, media_dir=None, workers=None):
+        """
+        Args:
+            on_progress (callable): Called with (bytes done, bytes total, bytes per second).
+            on_done (callable): Called with [(image, ok, message)], or None when cancelled.
+            media_dir (str): Mount point of the installation medium.
+            workers (int): Process pool size, defaults to one per image up to the CPU count.
+        """
+        super(MediaVerifier, self).__init__(daemon=True)
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.media_dir = media_dir or paths.resolve(MEDIA_DIR)
+        self.workers = workers
+        # spawn keeps the GTK process (and its threads) out of the workers
+        self.context = multiprocessing.get_context("spawn")
+        self.cancel_event = self.context.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        # on_done is always called, the GUI waits for it to leave the "cancel" state
+        results = None
+        try:
+            results = self.verify()
+        except Exception as e:
+            print("[ERROR]: Media verification failed: %s" % e)
+            results = [(self.media_dir, False, "verification failed: %s" % e)]
+        finally:
+            self.on_done(results)
+
+    def verify(self):
+        """
+        Returns [(image, ok, message)], or None when cancelled.
+        """
+        images = find_images(self.media_dir)
+        if not images:
+            return [(self.media_dir, False, "No squashfs images found, is this a live session?")]
+
+        total = sum(os.path.getsize(image) for image, algorithm, expected in images)
+        progress = self.context.Queue()
+        workers = self.workers or min(len(images), os.cpu_count() or 1)
+        done = 0
+        start = time.monotonic()
+
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=self.context,
+            initializer=init_worker,
+            initargs=(progress, self.cancel_event),
+        ) as pool:
+            futures = {
+                pool.submit(hash_image, image, algorithm): (image, expected)
+                for image, algorithm, expected in images
+            }
+            pending = set(futures)
+            while pending:
+                finished, pending = concurrent.futures.wait(pending, timeout=0.5)
+                try:
+                    while True:
+                        done += progress.get_nowait()
+                except queue.Empty:
+                    pass
+                elapsed = time.monotonic() - start
+                self.on_progress(done, total, done / elapsed if elapsed > 0 else 0)
+
+        if self.cancel_event.is_set():
+            return None
+
+        results = []
+        for future, (image, expected) in futures.items():
+            try:
+                digest = future.result()
+            except OSError as e:
+                results.append((image, False, "read error: %s" % e))
+                continue
+            except Exception as e:
+                # a worker that died (BrokenProcessPool) or could not be started
+                results.append((image, False, "verification failed: %s" % e))
+                continue
+            if expected is None:
+                results.append((image, False, "no checksum file to compare against"))
+            elif digest == expected:
+                results.append((image, True, "checksum matches"))
+            else:
+                results.append((image, False, "checksum mismatch, the medium is damaged"))
+        return results
@@ -0,0 +1,149 @@
+# Small continuation framework for GTK click handlers.
+#
+# A handler decorated with @async_handler is written as a generator. Every
+# value it yields is a step that must not run on the GTK main thread:
+#
+#   - a callable is executed on a worker thread, its return value (or the
+#     exception it raised) is sent back into the generator on the main thread
+#   - a Gtk.Dialog is shown non-modally, the generator resumes with the
+#     response id once the user answers; the dialog is destroyed when the
+#     handler yields again, so it can still read the dialog (e.g. a file chooser)
+#
+# While the handler is suspended the clicked button shows a spinner and is
+# made insensitive, so a second click cannot start the same handler twice.
+
+import functools
+import threading
+
+import gi
+
+gi.require_version("Gtk", "3.0")
+from gi.repository import Gtk, GLib
+
+
+class Task:
+    def __init__(self, generator, widget=None):
+        self.generator = generator
+        self.widget = widget
+        self.spinner = None
+        self.previous_image = None
+
+    def start(self):
+        if self.widget is not None:
+            # the handler may destroy its own dialog, forget the widget when that happens
+            self.widget.connect("destroy", self.on_widget_destroyed)
+        self.busy(True)
+        self.step(None)
+
+    def on_widget_destroyed(self, widget):
+        self.widget = None
+        self.spinner = None
+
+    def busy(self, state):
+        # only buttons get a spinner, other widgets (event boxes, ...) are left alone
+        if not isinstance(self.widget, Gtk.Button):
+            return
+        if state:
+            self.previous_image = self.widget.get_image()
+            self.spinner = Gtk.Spinner()
+            self.spinner.start()
+            self.widget.set_image(self.spinner)
+            self.widget.set_always_show_image(True)
+            self.widget.set_sensitive(False)
+        else:
+            if self.spinner is not None:
+                self.spinner.stop()
+                self.spinner = None
+            self.widget.set_image(self.previous_image)
+            self.widget.set_always_show_image(self.previous_image is not None)
+            self.widget.set_sensitive(True)
+
+    def step(self, value, error=None):
+        try:
+            if error is not None:
+                work = self.generator.throw(error)
+            else:
+                work = self.generator.send(value)
+        except StopIteration:
+            self.busy(False)
+            return False
+        except Exception as e:
+            print("[ERROR]: Exception in async handler: %s" % e)
+            self.busy(False)
+            return False
+
+        if isinstance(work, Gtk.Dialog):
+            self.wait_dialog(work)
+        elif callable(work):
+            threading.Thread(target=self.run_worker, args=(work,), daemon=True).start()
+        else:
+            # plain values are handed straight back, handy for conditional yields
+            GLib.idle_add(self.step, work)
+        return False
+
+    def run_worker(self, work):
+        try:
+            result = work()
+        except Exception as e:
+            GLib.idle_add(self.step, None, e)
+            return
+        GLib.idle_add(self.step, result)
+
+    def wait_dialog(self, dialog):
+        def on_response(dialog, response):
+            self.step(response)
+            dialog.destroy()
+
+        dialog.connect("response", on_response)
+        dialog.show_all()
+
+
+def async_handler(func):
+    """
+    Turns a generator method into a GTK signal handler that never blocks the main loop.
+
+    The first positional argument after self is taken to be the emitting widget and
+    receives the busy spinner while the handler is suspended.
+    """
+
+    @functools.wraps(func)
+    def wrapper(self, widget=None, *args):
+        Task(func(self, widget, *args), widget).start()
+
+    return wrapper
+
+
+def message_dialog(parent, text, secondary=None, message_type=None, buttons=None, title="Warning"):
+    """
+    Builds a Gtk.MessageDialog that is meant to be yielded from an async handler
+    (or shown with a "response" callback) instead of blocking in run().
+
+    Args:
+        parent (Gtk.Window): Transient parent of the dialog.
+        text (str): Primary text.
+        secondary (str): Optional secondary markup.
+        message_type (Gtk.MessageType): Defaults to WARNING.
+        buttons (list): Optional list of (label, response id) tuples. Defaults to a single OK button.
+    """
+    md = Gtk.MessageDialog(
+        parent=parent,
+        flags=0,
+        message_type=message_type if message_type is not None else Gtk.MessageType.WARNING,
+        buttons=Gtk.ButtonsType.NONE if buttons else Gtk.ButtonsType.OK,
+        text=text,
+        title=title,
+    )
+    for label, response in buttons or []:
+        md.add_buttons(label, response)
+    if secondary:
+        md.format_secondary_markup(secondary)
+    return md
+
+
+def show_message(parent, text, secondary=None, message_type=None, title="Warning"):
+    # fire-and-forget variant for places that are not inside an async handler,
+    # returns False so it can be passed to GLib.idle_add directly
+    md = message_dialog(parent, text, secondary, message_type, title=title)
+    md.connect("response", lambda dialog, response: dialog.destroy())
+    md.show_all()
+    return False
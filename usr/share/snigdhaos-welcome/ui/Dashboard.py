@@ -0,0 +1,127 @@
+import time
+
+import gi
+
+gi.require_version("Gtk", "3.0")
+from gi.repository import Gtk, GLib
+
+from snigdhaos_welcome.core import packages, sysstats
+
+# graph title, series drawn in it (name, rgb), full scale (None: scaled to the largest value)
+GRAPHS = (
+    ("CPU", (("cpu", (0.20, 0.60, 0.86)),), 1.0),
+    ("Memory / swap", (("memory", (0.18, 0.80, 0.44)), ("swap", (0.90, 0.49, 0.13))), 1.0),
+    ("Disk read / write", (("disk_read", (0.61, 0.35, 0.71)), ("disk_write", (0.91, 0.30, 0.24))), None),
+    ("Network down / up", (("net_rx", (0.10, 0.74, 0.61)), ("net_tx", (0.95, 0.77, 0.06))), None),
+)
+GRAPH_HEIGHT = 70
+SPACING = 12
+
+
+# Stack page with live CPU, memory, disk and network graphs. Sampling only runs while
+# the page is mapped (shown in the stack and the window is not hidden): every tick takes
+# one sysstats sample and queues a single redraw of the one drawing area.
+class Dashboard(Gtk.Box):
+    def __init__(self, interval=1):
+        """
+        Args:
+            interval (int): Seconds between samples.
+        """
+        super(Dashboard, self).__init__(orientation=Gtk.Orientation.VERTICAL, spacing=10)
+
+        self.interval = interval
+        self.sampler = None
+        self.latest = {}
+        self.timer = None
+
+        self.area = Gtk.DrawingArea()
+        self.area.set_size_request(780, len(GRAPHS) * (GRAPH_HEIGHT + 2 * SPACING))
+        self.area.connect("draw", self.on_draw)
+        self.pack_start(self.area, True, True, 0)
+
+        self.connect("map", lambda widget: self.start())
+        self.connect("unmap", lambda widget: self.stop())
+        self.connect("destroy", lambda widget: self.close())
+
+    def start(self):
+        if self.timer is not None or not self.get_mapped():
+            return
+        if self.sampler is None:
+            self.sampler = sysstats.Sampler()
+        self.tick()
+        self.timer = GLib.timeout_add_seconds(self.interval, self.tick)
+
+    def stop(self):
+        if self.timer is not None:
+            GLib.source_remove(self.timer)
+            self.timer = None
+        # the next rate is taken over the gap otherwise
+        if self.sampler is not None:
+            self.sampler.previous = None
+
+    def close(self):
+        self.stop()
+        if self.sampler is not None:
+            self.sampler.close()
+            self.sampler = None
+
+    def tick(self):
+        self.latest = self.sampler.sample(time.monotonic())
+        self.area.queue_draw()
+        return True
+
+    def caption(self, name):
+        value = self.latest.get(name, 0.0)
+        if name == "memory":
+            return "%.0f%% of %s" % (value * 100, packages.format_size(self.latest.get("memory_total", 0)))
+        if name == "swap":
+            if not self.latest.get("swap_total"):
+                return "no swap"
+            return "%.0f%% of %s" % (value * 100, packages.format_size(self.latest["swap_total"]))
+        if name == "cpu":
+            return "%.0f%%" % (value * 100)
+        return "%s/s" % packages.format_size(value)
+
+    def on_draw(self, area, cr):
+        if self.sampler is None:
+            return False
+        width = area.get_allocated_width()
+        style = area.get_style_context()
+        foreground = style.get_color(style.get_state())
+        cr.set_font_size(12)
+
+        top = SPACING
+        for title, series, scale in GRAPHS:
+            cr.set_source_rgba(foreground.red, foreground.green, foreground.blue, 1)
+            cr.move_to(0, top + 10)
+            cr.show_text(title)
+            x = 160
+            for name, (red, green, blue) in series:
+                cr.set_source_rgb(red, green, blue)
+                cr.move_to(x, top + 10)
+                cr.show_text(self.caption(name))
+                x += 170
+
+            graph_top = top + SPACING + 4
+            cr.set_source_rgba(foreground.red, foreground.green, foreground.blue, 0.25)
+            cr.rectangle(0.5, graph_top + 0.5, width - 1, GRAPH_HEIGHT)
+            cr.set_line_width(1)
+            cr.stroke()
+
+            values = [self.sampler.series[name].values() for name, colour in series]
+            full = scale or max([max(v) for v in values if v] + [1024])
+            step = (width - 2) / (sysstats.HISTORY - 1)
+            for (name, (red, green, blue)), points in zip(series, values):
+                if len(points) < 2:
+                    continue
+                # newest sample at the right edge
+                x = width - 1 - step * (len(points) - 1)
+                cr.move_to(x, graph_top + GRAPH_HEIGHT * (1 - min(points[0] / full, 1)))
+                for value in points[1:]:
+                    x += step
+                    cr.line_to(x, graph_top + GRAPH_HEIGHT * (1 - min(value / full, 1)))
+                cr.set_source_rgb(red, green, blue)
+                cr.set_line_width(1.5)
+                cr.stroke()
+            top = graph_top + GRAPH_HEIGHT + SPACING
+        return False
@@ -3,14 +3,22 @@
 
 import os
 import getpass
+import weakref
+from snigdhaos_welcome.core import catalog, mirrors, settings
 from os.path import expanduser
 from ui.Stack import Stack
 from ui.StackSwitcher import StackSwitcher
+from ui.PackageSearch import PackageSearch
+from ui.Dashboard import Dashboard
+from ui.Hardware import Hardware
 
 debug = False
 # debug = True
 
 base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if not os.path.isdir(os.path.join(base_dir, "images")):
+    # running from the bundle, the data files stay next to it
+    base_dir = os.path.dirname(base_dir)
 home = expanduser("~")
 username = getpass.getuser()
 
@@ -25,13 +33,34 @@ if debug:
 else:
     user = "whoami"
 
-Settings = home + "/.config/snigdhaos-welcome/settings.conf"
+Settings = settings.SETTINGS
 Skel_Settings = "/etc/skel/.config/snigdhaos-welcome/settings.conf"
 dot_desktop = "/usr/share/applications/snigdhaos-welcome.desktop"
 autostart = home + "/.config/autostart/snigdhaos-welcome.desktop"
 
 
+def load_image(self, Gtk, GdkPixbuf, name, size):
+    # images are registered so the resident mode can drop and reload their pixbufs
+    path = os.path.join(base_dir, name)
+    image = Gtk.Image().new_from_pixbuf(GdkPixbuf.Pixbuf().new_from_file_at_size(path, size, size))
+    self.images.append((weakref.ref(image), path, size))
+    return image
+
+
+def add_package_page(self):
+    # package search, filled in by Main.load_package_index(), rebuilt after resident mode
+    self.package_search = PackageSearch(
+        lambda package: self.on_package_install(None, package), self.on_conflicts_clicked
+    )
+    self.stack.add_titled(self.package_search, "Packages", "Packages")
+    self.stack.child_set_property(self.package_search, "position", 1)
+    if self.package_index_loaded.is_set():
+        self.package_search.set_index(self.package_index)
+
+
 def GUI(self, Gtk, GdkPixbuf):
+    self.images = []  # (weakref to Gtk.Image, path, size)
+
     # initialize main vbox
     self.vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=0)
     self.vbox.set_halign(Gtk.Align.CENTER)
@@ -46,16 +75,11 @@ def GUI(self, Gtk, GdkPixbuf):
     # x11 shows icon inside headerbar twice, only set icon when on wayland
     if self.session is not None:
         if self.session == "wayland":
-            headerbar.pack_start(
-                Gtk.Image().new_from_pixbuf(
-                    GdkPixbuf.Pixbuf().new_from_file_at_size(
-                        os.path.join(base_dir, "images/snigdhaos-welcome-small.png"), 16, 16
-                    )
-                )
-            )
+            headerbar.pack_start(load_image(self, Gtk, GdkPixbuf, "images/snigdhaos-welcome-small.png", 16))
 
     # initialize the stack
     stack = Stack(transition_type="CROSSFADE")
+    self.stack = stack
 
     # initialize the stack-switcher
     stack_switcher = StackSwitcher(stack)
@@ -142,10 +166,7 @@ def GUI(self, Gtk, GdkPixbuf):
     # facebook
 
     fb_event = Gtk.EventBox()
-    pbfb = GdkPixbuf.Pixbuf().new_from_file_at_size(
-        os.path.join(base_dir, "images/facebook.png"), 64, 64
-    )
-    fbimage = Gtk.Image().new_from_pixbuf(pbfb)
+    fbimage = load_image(self, Gtk, GdkPixbuf, "images/facebook.png", 64)
     fb_event.add(fbimage)
     fb_event.connect(
         "button_press_event",
@@ -155,10 +176,7 @@ def GUI(self, Gtk, GdkPixbuf):
 
     # twitter
     tw_event = Gtk.EventBox()
-    pbtw = GdkPixbuf.Pixbuf().new_from_file_at_size(
-        os.path.join(base_dir, "images/twitter.png"), 64, 64
-    )
-    twimage = Gtk.Image().new_from_pixbuf(pbtw)
+    twimage = load_image(self, Gtk, GdkPixbuf, "images/twitter.png", 64)
     tw_event.add(twimage)
     tw_event.connect(
         "button_press_event",
@@ -168,10 +186,7 @@ def GUI(self, Gtk, GdkPixbuf):
 
     # mewe
     mew_event = Gtk.EventBox()
-    pbmew = GdkPixbuf.Pixbuf().new_from_file_at_size(
-        os.path.join(base_dir, "images/github.png"), 64, 64
-    )
-    mewimage = Gtk.Image().new_from_pixbuf(pbmew)
+    mewimage = load_image(self, Gtk, GdkPixbuf, "images/github.png", 64)
     mew_event.add(mewimage)
     mew_event.connect(
         "button_press_event",
@@ -252,6 +267,19 @@ def GUI(self, Gtk, GdkPixbuf):
     vbox_info.pack_start(hbox_social_img, False, False, 0)
 
     stack.add_titled(vbox_install_stack, "Install Snigdha OS", "Install Snigdha OS")
+    self.install_page = vbox_install_stack
+
+    add_package_page(self)
+
+    # live resource graphs, sampling only while the page is shown
+    self.dashboard = Dashboard()
+    stack.add_titled(self.dashboard, "System", "System")
+
+    if username != user:
+        # inventory for support requests on the forum, only on the installed system
+        self.hardware_page = Hardware(lambda: self.on_link_clicked(None, app_forums))
+        stack.add_titled(self.hardware_page, "Hardware", "Hardware")
+
     autostart = eval(self.load_settings())
     hbox_notify = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
     hbox_notify.set_halign(Gtk.Align.CENTER)
@@ -259,10 +287,7 @@ def GUI(self, Gtk, GdkPixbuf):
     self.label_notify = Gtk.Label(xalign=0.5, yalign=0.5)
     self.label_notify.set_justify(Gtk.Justification.CENTER)
     hbox_notify.pack_end(self.label_notify, False, False, 0)
-    pixbuf = GdkPixbuf.Pixbuf().new_from_file_at_size(
-        os.path.join(base_dir, "images/snigdhaos-welcome.png"), 300, 300
-    )
-    image = Gtk.Image().new_from_pixbuf(pixbuf)
+    image = load_image(self, Gtk, GdkPixbuf, "images/snigdhaos-welcome.png", 300)
 
     label_welcome_message = Gtk.Label(xalign=0, yalign=0)
     label_welcome_message.set_name("label_style_eshan")
@@ -276,14 +301,6 @@ def GUI(self, Gtk, GdkPixbuf):
         )
     vbox_welcome_title.pack_start(image, True, False, 0)
     vbox_welcome_message.pack_start(label_welcome_message, True, False, 0)
-    button_gparted = Gtk.Button(label="")
-    button_gparted_label = button_gparted.get_child()
-    button_gparted_label.set_markup("Run GParted")
-    button_gparted.connect("clicked", self.on_gp_clicked)
-    button_gparted.set_size_request(100, 50)
-    button_gparted.set_property("has-tooltip", True)
-    button_gparted.connect("query-tooltip", self.tooltip_callback, "Launch GParted")
-
     self.button_easy_install = Gtk.Button(label="")
     button_easy_install_label = self.button_easy_install.get_child()
     button_easy_install_label.set_markup(
@@ -315,17 +332,56 @@ def GUI(self, Gtk, GdkPixbuf):
     self.button_mirrors.connect(
         "query-tooltip", self.tooltip_callback, "Update Mirrorlist"
     )
-    button_resolution = Gtk.Button(label="Fix Screen Resolution")
-    button_resolution.set_size_request(100, 50)
-    button_resolution.set_property("has-tooltip", True)
-    button_resolution.connect("query-tooltip", self.tooltip_callback, "Launch Arandr")
-    button_resolution.connect("clicked", self.on_buttonarandr_clicked)
+    # shown while the mirrorlists replaced by the last update are kept
+    self.button_mirrors_rollback = Gtk.Button(label="Restore previous mirrors")
+    self.button_mirrors_rollback.connect("clicked", self.on_mirror_rollback_clicked)
+    self.button_mirrors_rollback.set_size_request(100, 50)
+    self.button_mirrors_rollback.set_no_show_all(True)
+    self.button_mirrors_rollback.set_visible(mirrors.has_previous())
+    self.button_mirrors_rollback.set_property("has-tooltip", True)
+    self.button_mirrors_rollback.connect(
+        "query-tooltip", self.tooltip_callback, "Go back to the mirrorlists used before the last update"
+    )
+    # one button per catalog tool, labels are refreshed by Main.update_tool_status()
+    tool_buttons = []
+    for tool in catalog.TOOLS:
+        if not tool.available(self.session, username == user):
+            continue
+        button_tool = Gtk.Button(label=tool.label(self.tool_status.get(tool.package)))
+        button_tool.connect("clicked", self.on_tool_clicked, tool)
+        button_tool.set_size_request(100, 50)
+        button_tool.set_property("has-tooltip", True)
+        button_tool.connect("query-tooltip", self.tooltip_callback, tool.tooltip)
+        self.tool_buttons[tool.package] = button_tool
+        tool_buttons.append(button_tool)
+
+    self.button_verify = Gtk.Button(label="Verify media")
+    self.button_verify.set_size_request(100, 50)
+    self.button_verify.set_property("has-tooltip", True)
+    self.button_verify.connect(
+        "query-tooltip",
+        self.tooltip_callback,
+        "Check that the live medium reads back correctly before installing",
+    )
+    self.button_verify.connect("clicked", self.on_verify_clicked)
+
+    button_benchmark = Gtk.Button(label="Benchmark disk")
+    button_benchmark.set_size_request(100, 50)
+    button_benchmark.set_property("has-tooltip", True)
+    button_benchmark.connect(
+        "query-tooltip",
+        self.tooltip_callback,
+        "Measure the write speed of the disk you want to install to",
+    )
+    button_benchmark.connect("clicked", self.on_benchmark_clicked)
 
     if username == user:
         hbox_util_buttons.pack_start(self.button_mirrors, False, True, 0)
-        hbox_util_buttons.pack_start(button_gparted, False, True, 0)
-        if self.session == "x11":
-            hbox_util_buttons.pack_start(button_resolution, False, True, 0)
+        hbox_util_buttons.pack_start(self.button_mirrors_rollback, False, True, 0)
+        for button_tool in tool_buttons:
+            hbox_util_buttons.pack_start(button_tool, False, True, 0)
+        hbox_util_buttons.pack_start(self.button_verify, False, True, 0)
+        hbox_util_buttons.pack_start(button_benchmark, False, True, 0)
         hbox_install_buttons.pack_start(self.button_easy_install, True, True, 0)
         hbox_install_buttons.pack_end(self.button_adv_install, True, True, 0)
 
@@ -333,12 +389,24 @@ def GUI(self, Gtk, GdkPixbuf):
 
         self.button_mirrors.get_child().set_markup("Update Mirrors")
 
-        button_resolution.get_child().set_markup("<b>Screen Resolution</b>")
-
         hbox_install_buttons.pack_start(self.button_mirrors, False, True, 0)
-
-        if self.session == "x11":
-            hbox_install_buttons.pack_start(button_resolution, False, True, 0)
+        hbox_install_buttons.pack_start(self.button_mirrors_rollback, False, True, 0)
+
+        for button_tool in tool_buttons:
+            hbox_install_buttons.pack_start(button_tool, False, True, 0)
+
+        # hidden until Main.scan_live_packages() finds something to remove
+        self.button_cleanup = Gtk.Button(label="Remove live packages")
+        self.button_cleanup.set_size_request(100, 50)
+        self.button_cleanup.set_no_show_all(True)
+        self.button_cleanup.set_property("has-tooltip", True)
+        self.button_cleanup.connect(
+            "query-tooltip",
+            self.tooltip_callback,
+            "Remove the installer and other packages only needed on the live ISO",
+        )
+        self.button_cleanup.connect("clicked", self.on_cleanup_clicked)
+        hbox_install_buttons.pack_start(self.button_cleanup, False, True, 0)
 
     label_creds = Gtk.Label(xalign=0)
     label_creds.set_markup("User: whoami | Pass: No Password")
@@ -393,6 +461,26 @@ def GUI(self, Gtk, GdkPixbuf):
     check.connect("toggled", self.startup_toggle)
     check.set_active(autostart)
 
+    check_prefetch = Gtk.CheckButton(label="Pre-download tools")
+    check_prefetch.set_property("has-tooltip", True)
+    check_prefetch.connect(
+        "query-tooltip",
+        self.tooltip_callback,
+        "Quietly download missing tools in the background once online, so installing them is instant",
+    )
+    check_prefetch.set_active(self.load_setting("prefetch", "False") == "True")
+    check_prefetch.connect("toggled", self.prefetch_toggle)
+
+    check_lan_cache = Gtk.CheckButton(label="Share package cache on LAN")
+    check_lan_cache.set_property("has-tooltip", True)
+    check_lan_cache.connect(
+        "query-tooltip",
+        self.tooltip_callback,
+        "Let other Snigdha OS machines on this network download packages from this one",
+    )
+    check_lan_cache.set_active(self.load_setting("lan_cache", "False") == "True")
+    check_lan_cache.connect("toggled", self.lan_cache_toggle)
+
     hbox_footer_buttons.set_halign(Gtk.Align.CENTER)
 
     if username == user:
@@ -401,10 +489,18 @@ def GUI(self, Gtk, GdkPixbuf):
         vbox_auto_start = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=15)
         vbox_auto_start.set_halign(Gtk.Align.CENTER)
         vbox_auto_start.pack_end(check, True, False, 0)
+        vbox_auto_start.pack_end(check_prefetch, True, False, 0)
+        vbox_auto_start.pack_end(check_lan_cache, True, False, 0)
         self.vbox.pack_end(vbox_auto_start, True, False, 0)
     else:
         hbox_footer_buttons.pack_end(check, False, False, 0)
+        hbox_footer_buttons.pack_end(check_lan_cache, False, False, 0)
 
     self.vbox.pack_start(hbox_notify, False, False, 5)  # notify label
 
+    # main loop health, updated by Main.update_stall_counter()
+    self.label_stalls = Gtk.Label(xalign=0.5, yalign=0.5)
+    self.label_stalls.set_sensitive(False)
+    self.vbox.pack_end(self.label_stalls, False, False, 0)
+
     self.vbox.pack_end(hbox_footer_buttons, False, False, 0)  # Footer
@@ -0,0 +1,108 @@
+import os
+import threading
+
+import gi
+
+gi.require_version("Gtk", "3.0")
+gi.require_version("Gdk", "3.0")
+from gi.repository import Gdk, Gtk, GLib
+
+from snigdhaos_welcome.core import hardware
+
+EXPORT = os.path.join(os.path.expanduser("~"), "snigdhaos-hardware.txt")
+
+
+# Stack page listing the hardware.snapshot() inventory. The snapshot is taken on a worker
+# thread, within a boot it is read back from the cache instead. Export copies the report
+# to the clipboard, saves it to EXPORT and opens the forum to paste it into.
+class Hardware(Gtk.Box):
+    def __init__(self, on_export):
+        """
+        Args:
+            on_export (callable): Called after the report was exported, opens the forum.
+        """
+        super(Hardware, self).__init__(orientation=Gtk.Orientation.VERTICAL, spacing=10)
+
+        self.hardware = None
+        self.on_export = on_export
+
+        self.label_status = Gtk.Label(xalign=0)
+        self.label_status.set_markup("<i>Reading hardware information...</i>")
+
+        self.grid = Gtk.Grid(column_spacing=20, row_spacing=6)
+
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
+        scrolled.set_size_request(780, 260)
+        scrolled.add(self.grid)
+
+        self.button_refresh = Gtk.Button(label="Refresh")
+        self.button_refresh.set_tooltip_text("Read the hardware information again")
+        self.button_refresh.connect("clicked", lambda button: self.load(refresh=True))
+
+        self.button_export = Gtk.Button(label="Export for the forum")
+        self.button_export.set_tooltip_text(
+            "Copy the report to the clipboard, save it to %s and open the forum" % EXPORT
+        )
+        self.button_export.connect("clicked", self.on_export_clicked)
+
+        hbox_buttons = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+        hbox_buttons.pack_end(self.button_export, False, False, 0)
+        hbox_buttons.pack_end(self.button_refresh, False, False, 0)
+
+        self.pack_start(self.label_status, False, False, 0)
+        self.pack_start(scrolled, True, True, 0)
+        self.pack_start(hbox_buttons, False, False, 0)
+
+        self.load()
+
+    def load(self, refresh=False):
+        self.button_refresh.set_sensitive(False)
+        self.button_export.set_sensitive(False)
+        threading.Thread(target=self.collect, args=(refresh,), daemon=True).start()
+
+    def collect(self, refresh):
+        try:
+            inventory = hardware.snapshot(refresh=refresh)
+        except Exception as e:
+            print("[ERROR]: Exception in Hardware.collect(): %s" % e)
+            inventory = None
+        GLib.idle_add(self.set_hardware, inventory)
+
+    def set_hardware(self, inventory):
+        self.hardware = inventory
+        self.button_refresh.set_sensitive(True)
+        for child in self.grid.get_children():
+            child.destroy()
+        if inventory is None:
+            self.label_status.set_markup("<i>Hardware information is not available</i>")
+            return False
+
+        for row, (label, value) in enumerate(hardware.rows(inventory)):
+            label_name = Gtk.Label(xalign=0, yalign=0)
+            label_name.set_markup("<b>%s</b>" % GLib.markup_escape_text(label))
+            label_value = Gtk.Label(label=value, xalign=0, yalign=0)
+            label_value.set_selectable(True)
+            label_value.set_line_wrap(True)
+            self.grid.attach(label_name, 0, row, 1, 1)
+            self.grid.attach(label_value, 1, row, 1, 1)
+        self.grid.show_all()
+        self.label_status.set_markup("<i>Hardware of this machine</i>")
+        self.button_export.set_sensitive(True)
+        return False
+
+    def on_export_clicked(self, button):
+        if self.hardware is None:
+            return
+        text = hardware.report(self.hardware)
+        Gtk.Clipboard.get(Gdk.SELECTION_CLIPBOARD).set_text(text, -1)
+        try:
+            with open(EXPORT, "w") as f:
+                f.write(text)
+            self.label_status.set_markup(
+                "<i>Report copied to the clipboard and saved to %s</i>" % GLib.markup_escape_text(EXPORT)
+            )
+        except OSError as e:
+            print("[ERROR]: Cannot write %s: %s" % (EXPORT, e))
+            self.label_status.set_markup("<i>Report copied to the clipboard</i>")
+        self.on_export()
@@ -2,14 +2,17 @@
 
 import os
 import gi
-import subprocess
-import threading
+from snigdhaos_welcome.core import install
 from threading import Thread
 
 gi.require_version("Gtk", "3.0")
 from gi.repository import Gtk, GdkPixbuf
+from ui.AsyncHandler import async_handler
 
 base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if not os.path.isdir(os.path.join(base_dir, "images")):
+    # running from the bundle, the data files stay next to it
+    base_dir = os.path.dirname(base_dir)
 
 
 # generic Message Dialog with yes/no buttons
@@ -74,7 +77,7 @@ class MessageDialogBootloader(Gtk.Dialog):
         install_method,
         pacman_lockfile,
         run_app,
-        calamares_polkit,
+        launch_installer,
     ):
         Gtk.Dialog.__init__(self)
 
@@ -86,7 +89,7 @@ class MessageDialogBootloader(Gtk.Dialog):
 
         self.pacman_lockfile = pacman_lockfile
         self.run_app = run_app
-        self.calamares_polkit = calamares_polkit
+        self.launch_installer = launch_installer
 
         self.label_message = Gtk.Label(xalign=0, yalign=0)
         self.label_message.set_halign(Gtk.Align.CENTER)
@@ -160,103 +163,55 @@ class MessageDialogBootloader(Gtk.Dialog):
     def on_md_cancel_clicked(self, widget):
         self.destroy()
 
-    # select GRUB
-    def on_bootloader_grub_clicked(self, widget):
-        if not os.path.exists(self.pacman_lockfile):
-            bootloader_file = "/etc/calamares/modules/bootloader-grub.conf"
+    def select_bootloader(self, bootloader):
+        # Shared by both bootloader buttons, file checks run on a worker thread
+        bootloader_file = install.bootloader_file(bootloader)
+        locked = yield lambda: install.is_locked(self.pacman_lockfile)
+        if not locked:
+            found = yield lambda: os.path.exists(bootloader_file)
 
-            if os.path.exists(bootloader_file):
-                app_cmd = [
-                    "sudo",
-                    "cp",
-                    bootloader_file,
-                    "/etc/calamares/modules/bootloader.conf",
-                ]
+            if found:
+                app_cmd = install.bootloader_command(bootloader)
 
                 Thread(target=self.run_app, args=(app_cmd,), daemon=True).start()
 
-                subprocess.Popen([self.calamares_polkit, "-d"], shell=False)
-            else:
-                print(
-                    "[ERROR]: %s not found, Make sure you are on a Live ISO?"
-                    % bootloader_file
-                )
+                self.launch_installer()
 
-                if self.label_message is not None:
-                    self.label_message.destroy()
-
-                self.label_message.set_markup(
-                    "<span foreground='red'><b>%s not found\nMake sure you are on a Live ISO?</b></span>"
-                    % bootloader_file
-                )
+                self.destroy()
+                return
 
-                self.vbox.add(self.label_message)
-                self.show_all()
-
-        else:
             print(
-                "[ERROR]: Pacman lockfile found %s, is another pacman process running ?"
-                % self.pacman_lockfile
+                "[ERROR]: %s not found, Make sure you are on a Live ISO?"
+                % bootloader_file
             )
 
-            if self.label_message is not None:
-                self.label_message.destroy()
-
             self.label_message.set_markup(
-                "<span foreground='red'><b Pacman lockfile found %s, is another pacman process running ?</b></span>"
-                % self.pacman_lockfile
+                "<span foreground='red'><b>%s not found\nMake sure you are on a Live ISO?</b></span>"
+                % bootloader_file
             )
 
-            self.vbox.add(self.label_message)
-            self.show_all()
-
-        self.destroy()
-
-    # select systemd-boot
-    def on_bootloader_systemd_boot_clicked(self, widget):
-        if not os.path.exists(self.pacman_lockfile):
-            bootloader_file = "/etc/calamares/modules/bootloader-systemd.conf"
-
-            if os.path.exists(bootloader_file):
-                app_cmd = [
-                    "sudo",
-                    "cp",
-                    bootloader_file,
-                    "/etc/calamares/modules/bootloader.conf",
-                ]
-
-                Thread(target=self.run_app, args=(app_cmd,), daemon=True).start()
-                subprocess.Popen([self.calamares_polkit, "-d"], shell=False)
-
-            else:
-                print("[ERROR]: %s not found, Make sure you are on a Live ISO?" % bootloader_file)
-
-                if self.label_message is not None:
-                    self.label_message.destroy()
-
-                self.label_message.set_markup(
-                    "<span foreground='red'><b>%s not found\nMake sure you are on a Live ISO?</b></span>"
-                    % bootloader_file
-                )
-
-                self.vbox.add(self.label_message)
-                self.show_all()
-
         else:
             print(
                 "[ERROR]: Pacman lockfile found %s, is another pacman process running ?"
                 % self.pacman_lockfile
             )
 
-            if self.label_message is not None:
-                self.label_message.destroy()
-
             self.label_message.set_markup(
-                "<span foreground='red'><b Pacman lockfile found %s, is another pacman process running ?</b></span>"
+                "<span foreground='red'><b>Pacman lockfile found %s, is another pacman process running ?</b></span>"
                 % self.pacman_lockfile
             )
 
+        # keep the dialog open so the error stays visible
+        if self.label_message.get_parent() is None:
             self.vbox.add(self.label_message)
-            self.show_all()
+        self.show_all()
 
-        self.destroy()
+    # select GRUB
+    @async_handler
+    def on_bootloader_grub_clicked(self, widget):
+        yield from self.select_bootloader("grub")
+
+    # select systemd-boot
+    @async_handler
+    def on_bootloader_systemd_boot_clicked(self, widget):
+        yield from self.select_bootloader("systemd-boot")
@@ -0,0 +1,94 @@
+import gi
+
+gi.require_version("Gtk", "3.0")
+from gi.repository import Gtk, GLib
+
+from snigdhaos_welcome.core import packages
+
+
+# Stack page searching the sync databases through a syncdb.PackageIndex
+class PackageSearch(Gtk.Box):
+    def __init__(self, on_install, on_conflicts):
+        """
+        Args:
+            on_install (callable): Called with a package name when a result is activated.
+            on_conflicts (callable): Called with the list of selected package names.
+        """
+        super(PackageSearch, self).__init__(orientation=Gtk.Orientation.VERTICAL, spacing=10)
+
+        self.index = None
+        self.on_install = on_install
+        self.on_conflicts = on_conflicts
+
+        self.entry = Gtk.SearchEntry()
+        self.entry.set_placeholder_text("Search packages")
+        self.entry.set_sensitive(False)
+        self.entry.connect("search-changed", self.on_search_changed)
+
+        self.label_status = Gtk.Label(xalign=0)
+        self.label_status.set_markup("<i>Indexing package databases...</i>")
+
+        # name, version, repository, download size, description
+        self.store = Gtk.ListStore(str, str, str, str, str)
+        self.view = Gtk.TreeView(model=self.store)
+        for column, title in enumerate(("Name", "Version", "Repository", "Size", "Description")):
+            renderer = Gtk.CellRendererText()
+            self.view.append_column(Gtk.TreeViewColumn(title, renderer, text=column))
+        self.view.set_tooltip_text("Double click a package to install it")
+        self.view.get_selection().set_mode(Gtk.SelectionMode.MULTIPLE)
+        self.view.connect("row-activated", self.on_row_activated)
+
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_policy(Gtk.PolicyType.AUTOMATIC, Gtk.PolicyType.AUTOMATIC)
+        scrolled.set_size_request(780, 260)
+        scrolled.add(self.view)
+
+        button_conflicts = Gtk.Button(label="Check conflicts")
+        button_conflicts.set_tooltip_text(
+            "Show conflicts between the selected packages and the installed system"
+        )
+        button_conflicts.connect("clicked", self.on_conflicts_clicked)
+
+        hbox_search = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+        hbox_search.pack_start(self.entry, True, True, 0)
+        hbox_search.pack_start(button_conflicts, False, False, 0)
+
+        self.pack_start(hbox_search, False, False, 0)
+        self.pack_start(self.label_status, False, False, 0)
+        self.pack_start(scrolled, True, True, 0)
+
+    def set_index(self, index):
+        # called on the main thread once the index is loaded (or failed to load)
+        self.index = index
+        if index is None:
+            self.label_status.set_markup("<i>Package databases are not available</i>")
+            return False
+        self.entry.set_sensitive(True)
+        self.label_status.set_markup("<i>%d packages available</i>" % len(index))
+        return False
+
+    def on_search_changed(self, entry):
+        self.store.clear()
+        if self.index is None:
+            return
+        matches = self.index.search_packages(entry.get_text())
+        for i in matches:
+            record = self.index.record(i)
+            self.store.append(
+                [
+                    record["name"],
+                    record["version"],
+                    record["repo"],
+                    packages.format_size(int(record["csize"] or 0)),
+                    record["desc"],
+                ]
+            )
+        if entry.get_text().strip():
+            self.label_status.set_markup("<i>%d matching packages</i>" % len(matches))
+
+    def on_row_activated(self, view, path, column):
+        self.on_install(self.store[path][0])
+
+    def on_conflicts_clicked(self, widget):
+        model, paths = self.view.get_selection().get_selected_rows()
+        self.on_conflicts([model[path][0] for path in paths])
@@ -0,0 +1,139 @@
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from gi.repository import GLib
+
+# Main loop stall watchdog
+#
+# A GLib timeout on the main loop acts as a heartbeat. Every beat records how late
+# it fired (the main loop latency). A separate thread watches the heartbeat and,
+# when it stops for longer than the threshold, captures the Python stack of the
+# main thread. Once the loop recovers the stall is written to the log file.
+
+
+class Watchdog:
+    def __init__(self, log_file, interval=0.1, threshold=0.5, max_log_size=1024 * 1024):
+        """
+        Args:
+            log_file (str): Path of the JSON lines file receiving stall records.
+            interval (float): Heartbeat interval in seconds.
+            threshold (float): Heartbeat delay in seconds that counts as a stall.
+            max_log_size (int): Size in bytes after which the log is rotated once.
+        """
+        self.log_file = log_file
+        self.interval = interval
+        self.threshold = threshold
+        self.max_log_size = max_log_size
+
+        self.main_thread_id = threading.main_thread().ident
+        self.latencies = deque(maxlen=1000)  # recent heartbeat latencies in seconds
+        self.stall_count = 0
+        self.last_beat = time.monotonic()
+        self.expected = self.last_beat + interval
+        self.stopped = threading.Event()
+        self.running = threading.Event()  # cleared while paused, the watch thread blocks on it
+        self.running.set()
+        self.source = None
+
+    def start(self):
+        self.schedule()
+        threading.Thread(target=self.watch, daemon=True).start()
+
+    def schedule(self):
+        self.last_beat = time.monotonic()
+        self.expected = self.last_beat + self.interval
+        self.source = GLib.timeout_add(int(self.interval * 1000), self.heartbeat)
+
+    def stop(self):
+        self.stopped.set()
+        # a paused watch thread has to wake up to exit
+        self.running.set()
+
+    def pause(self):
+        # main loop only, stops the heartbeat wake-ups while the app is resident
+        self.running.clear()
+        if self.source is not None:
+            GLib.source_remove(self.source)
+            self.source = None
+
+    def resume(self):
+        if self.source is None and not self.stopped.is_set():
+            self.schedule()
+        self.running.set()
+
+    def heartbeat(self):
+        # runs on the main loop
+        now = time.monotonic()
+        self.latencies.append(max(0.0, now - self.expected))
+        self.last_beat = now
+        self.expected = now + self.interval
+        if self.stopped.is_set():
+            self.source = None
+            return False
+        return True
+
+    def watch(self):
+        stall = None
+        while not self.stopped.wait(self.interval):
+            if not self.running.is_set():
+                # no wake-ups at all until resume()
+                stall = None
+                self.running.wait()
+                continue
+            behind = time.monotonic() - self.last_beat - self.interval
+            if behind > self.threshold and stall is None:
+                # stack is captured while the main thread is still stuck
+                stall = self.capture()
+            elif behind <= self.threshold and stall is not None:
+                # time between the last beat before the stall and the first one after it
+                stall["duration"] = round(self.last_beat - stall.pop("since") - self.interval, 3)
+                self.stall_count += 1
+                self.write(stall)
+                print(
+                    "[WARN]: Main loop stalled for %.2fs in %s"
+                    % (stall["duration"], stall["handler"])
+                )
+                stall = None
+
+    def capture(self):
+        frame = sys._current_frames().get(self.main_thread_id)
+        stack = traceback.extract_stack(frame) if frame is not None else []
+        return {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "since": self.last_beat,
+            "handler": self.handler_name(stack),
+            "stack": traceback.format_list(stack),
+        }
+
+    def handler_name(self, stack):
+        # prefer the innermost signal handler, fall back to the innermost frame
+        for entry in reversed(stack):
+            if entry.name.startswith(("on_", "_on_")):
+                return entry.name
+        return stack[-1].name if stack else "unknown"
+
+    def write(self, record):
+        try:
+            if os.path.isfile(self.log_file) and os.path.getsize(self.log_file) > self.max_log_size:
+                os.replace(self.log_file, self.log_file + ".1")
+            with open(self.log_file, "a") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            print("[ERROR]: Failed to write stall record: %s" % e)
+
+    def p99_latency(self):
+        latencies = sorted(self.latencies)
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+
+    def summary(self):
+        return "Stalls: %d | p99 main loop latency: %d ms" % (
+            self.stall_count,
+            self.p99_latency() * 1000,
+        )
@@ -0,0 +1,1251 @@
+# Snigdha OS Welcome window, started through launcher.main()
+
+# Import necessary modules and libraries
+import sys
+import gi
+import os
+import conflicts
+from snigdhaos_welcome.core import (  # GTK-free logic shared with the command line
+    catalog,
+    cleanup,
+    conflictindex,
+    dbwarm,
+    diskbench,
+    estimator,
+    install,
+    lancache,
+    memreport,
+    metrics,
+    mirrors,
+    network,
+    operations,
+    packages,
+    paths,
+    prefetch,
+    readahead,
+    settings,
+    syncdb,
+    verify,
+)
+import subprocess
+import threading
+import shutil
+from time import sleep
+from queue import Queue
+import ui.GUI as GUI  # Import GUI module from the ui package
+from dbusservice import DBusService  # Session D-Bus interface for other tools
+from resident import ResidentMode  # Releases resources while the window is unused
+from watchdog import Watchdog  # Main loop stall watchdog
+from ui.MessageDialog import MessageDialogBootloader  # Import MessageDialogBootloader class from ui.MessageDialog
+from ui.AsyncHandler import async_handler, message_dialog, show_message  # Non-blocking handler helpers
+
+# Ensure the required version of Gtk is available
+gi.require_version("Gtk", "3.0")
+# Import Gtk and related classes from the gi.repository for GTK GUI application development
+from gi.repository import Gtk, GdkPixbuf, GLib, Gdk
+
+# Define base directory path by getting the absolute path of the current file's directory
+base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__)))
+if not os.path.isdir(os.path.join(base_dir, "images")):
+    # running from the bundle, the data files stay next to it
+    base_dir = os.path.dirname(base_dir)
+
+css = """
+box#stack_box{
+    padding: 10px 10px 10px 10px;
+}
+button#button_grub_boot_enabled{
+     font-weight: bold;
+     background-color: @theme_base_color_button;
+}
+button#button_systemd_boot_enabled{
+     font-weight: bold;
+     background-color: @theme_base_color_button;
+}
+button#button_easy_install_enabled{
+     font-weight: bold;
+     background-color: @theme_base_color_button;
+}
+button#button_adv_install_enabled{
+     font-weight: bold;
+     background-color: @theme_base_color_button;
+}
+label#label_style {
+    background-color: @theme_base_color;
+    border-top: 1px solid @borders;
+    border-bottom: 1px solid @borders;
+    border-left: 1px solid @borders;
+    border-right: 1px solid @borders;
+    padding: 10px 10px 10px 10px;
+    border-radius: 0px;
+    font-size: 16px;
+    font-weight: bold;
+    color: #6495ed;
+}
+label#label_style_eshan {
+    background-color: @theme_base_color;
+    border-top: 1px solid @borders;
+    border-bottom: 1px solid @borders;
+    border-left: 1px solid @borders;
+    border-right: 1px solid @borders;
+    padding: 10px 10px 10px 10px;
+    border-radius: 0px;
+    font-size: 16px;
+    font-weight: bold;
+    color: #2af598;
+}
+"""
+
+class Main(Gtk.Window):
+    def __init__(self):
+        super(Main, self).__init__(title="Snigdha OS Welcome")
+        
+        # Basic Window Configuration
+        self.set_border_width(10)  # Set the border width of the window
+        self.set_default_size(860, 450)  # Set the default size of the window
+        self.set_icon_from_file(os.path.join(base_dir, "images/snigdhaos-welcome-small.png"))  # Set the window icon
+        self.set_position(Gtk.WindowPosition.CENTER)  # Center the window on the screen
+        self.results = ""  # Initialize results to an empty string
+        if paths.root() != "/":
+            print("[INFO]: Working on the system root %s" % paths.root())
+
+        # Initialize Configuration Directory and Settings
+        config_dir = settings.CONFIG_DIR  # Define the configuration directory path
+        if not os.path.exists(config_dir):  # Check if the directory exists
+            try:
+                os.makedirs(config_dir, exist_ok=True)  # Create the directory if it doesn't exist
+                with open(GUI.Settings, "w") as f:  # Open the settings file in write mode
+                    f.write("autostart=True")  # Write default settings
+            except OSError as e:
+                print(f"Error initializing configuration: {e}")  # Handle any file/directory creation errors
+
+        # CSS Styling
+        self.style_provider = Gtk.CssProvider()  # Create a CSS provider
+        try:
+            # Load the CSS data into the style provider
+            self.style_provider.load_from_data(css, len(css))
+            # Apply the style provider to the default screen
+            Gtk.StyleContext.add_provider_for_screen(
+                Gdk.Screen.get_default(),
+                self.style_provider,
+                Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION,  # Set priority for application-specific styles
+            )
+        except GLib.Error as e:
+            print(f"Error loading CSS: {e}")  # Handle CSS loading errors
+
+        # Initialize Internal Attributes
+        self.pkg_queue = Queue()  # Initialize a queue for package operations
+        self.pacman_lockfile = paths.resolve(install.PACMAN_LOCKFILE)  # Define the lockfile path for pacman
+        self.sudo_username = os.getlogin()  # Get the username of the user running the script
+        self.calamares_polkit = install.CALAMARES_POLKIT  # Path to the Calamares Polkit executable
+        self.session = None  # Initialize session attribute
+        self.tool_status = {}  # package -> installed, filled in by scan_tools()
+        self.tool_buttons = {}  # package -> Gtk.Button, filled in by GUI.GUI()
+        self.prefetcher = None  # prefetch.Prefetcher while pre-downloading tool packages
+        self.db_warmer = None  # dbwarm.DatabaseWarmer, started the first time the live session is online
+        self.conflict_index = None  # conflictindex.ConflictIndex, built by load_package_index()
+        self.conflicts_window = None
+        self.package_index = None  # syncdb.PackageIndex, set by load_package_index()
+        self.package_index_loaded = threading.Event()
+        self.estimate_started = False
+        self.verifier = None  # verify.MediaVerifier while the medium is being checked
+        self.media_verified = None  # None until verified, then True/False
+        self.install_estimates = {}  # button name -> estimate line shown under its label
+        self.cache_server = None  # lancache.CacheServer while the package cache is shared
+        self.memory_report = "--memory-report" in sys.argv
+        self.monitors_resumed = threading.Event()  # cleared while the resident mode pauses monitors
+        self.monitors_resumed.set()
+        self.peer_discovery = None  # lancache.PeerDiscovery, listens for LAN package caches
+        # Operation timings, journaled next to the settings, optionally exported for Prometheus
+        self.metrics = metrics.Metrics(textfile=self.load_setting("metrics_textfile", "") or None)
+        # Mirror updates and package installs, shared with the D-Bus service
+        self.operations = operations.Operations()
+        self.operations.add_listener(self.on_operation_event)
+
+        # Retrieve Session Information
+        self.get_session()  # Fetch the session information (implementation not shown here)
+
+        # Initialize GUI
+        GUI.GUI(self, Gtk, GdkPixbuf)  # Initialize the graphical user interface components
+
+        # Offer to remove live-only packages on an installed system
+        self.live_package_sizes = {}
+        if GUI.username != GUI.user:
+            threading.Thread(target=self.scan_live_packages, daemon=True).start()
+
+        # Warm the page cache for Calamares while the install page is shown
+        self.warmer = None  # readahead.Warmer
+        if GUI.username == GUI.user:
+            self.stack.connect("notify::visible-child", self.on_stack_page_changed)
+            for button in (self.button_easy_install, self.button_adv_install):
+                button.connect("enter-notify-event", self.on_install_hover)
+            # give the window a moment to map before competing for IO
+            GLib.timeout_add_seconds(3, self.start_warmup)
+
+        # Listen for package caches shared by other machines, share ours when enabled
+        self.start_peer_discovery()
+
+        # Let first-boot scripts and applets drive this instance over the session bus
+        self.dbus_service = DBusService(
+            peers=lambda: self.peer_discovery.peers() if self.peer_discovery is not None else [],
+            metrics=self.metrics,
+            registry=self.operations,
+        )
+        self.dbus_service.start()
+
+        # Load (or rebuild) the sync database index behind the package search page
+        threading.Thread(target=self.load_package_index, daemon=True).start()
+
+        # Check every catalog tool in one batch so clicks never wait on a status probe
+        threading.Thread(target=self.scan_tools, daemon=True).start()
+
+        # Watch the main loop for stalls, records are written next to the settings file
+        self.watchdog = Watchdog(os.path.join(config_dir, "stalls.log"))
+        self.watchdog.start()
+        self.stall_counter_source = GLib.timeout_add_seconds(2, self.update_stall_counter)
+
+        # Release what an unused window does not need, rebuild it on demand
+        self.resident = ResidentMode(self, on_change=self.on_resident_change)
+        self.resident.add("idle", self.pause_monitors, self.resume_monitors)
+        self.resident.add("hidden", self.release_images, self.restore_images)
+        self.resident.add("hidden", self.release_pages, self.restore_pages)
+        # an iconified window stays mapped, stop the dashboard sampling explicitly
+        self.resident.add("hidden", self.dashboard.stop, self.dashboard.start)
+
+        # Start Internet Notifier Thread if the user matches the GUI user
+        if GUI.username == GUI.user:  # Check if the username matches
+            internet_notifier_thread = threading.Thread(
+                target=self.internet_notifier, daemon=True  # Create a thread for the internet notifier
+            )
+            internet_notifier_thread.start()  # Start the thread
+
+    def get_session(self):
+        """
+        Retrieve the session type (e.g., X11, Wayland, etc.) from environment variables.
+        """
+        try:
+            # Attempt to get the session type from the environment variable
+            self.session = os.environ.get("XDG_SESSION_TYPE")
+            
+            if not self.session:
+                # Log a warning if the session type is not found
+                print("Warning: 'XDG_SESSION_TYPE' is not set in the environment.")
+        except Exception as e:
+            # Log the exception with details for debugging
+            print(f"Error retrieving session type in get_session(): {e}")
+            self.session = None  # Ensure session is set to None on failure
+
+    def pause_monitors(self):
+        self.monitors_resumed.clear()  # internet_notifier() waits for it
+        self.watchdog.pause()
+        if self.stall_counter_source is not None:
+            GLib.source_remove(self.stall_counter_source)
+            self.stall_counter_source = None
+        if self.warmer is not None and self.warmer.is_alive():
+            self.warmer.cancel()
+
+    def resume_monitors(self):
+        self.watchdog.resume()
+        if self.stall_counter_source is None:
+            self.stall_counter_source = GLib.timeout_add_seconds(2, self.update_stall_counter)
+        self.monitors_resumed.set()
+
+    def release_images(self):
+        self.images = [entry for entry in self.images if entry[0]() is not None]
+        for image_ref, path, size in self.images:
+            image_ref().clear()
+
+    def restore_images(self):
+        for image_ref, path, size in self.images:
+            image = image_ref()
+            if image is not None:
+                image.set_from_pixbuf(GdkPixbuf.Pixbuf().new_from_file_at_size(path, size, size))
+
+    def release_pages(self):
+        # the package search page holds the result rows, drop it unless it is the one shown
+        if self.package_search is not None and self.stack.get_visible_child() is not self.package_search:
+            self.package_search.destroy()
+            self.package_search = None
+
+    def restore_pages(self):
+        if self.package_search is None:
+            GUI.add_package_page(self)
+            self.package_search.show_all()
+
+    def on_resident_change(self, level):
+        print("[INFO]: Resident mode: %s" % level)
+        if self.memory_report:
+            # after the release callbacks and the trim have settled
+            GLib.timeout_add_seconds(1, self.print_memory_report)
+
+    def print_memory_report(self):
+        print("[INFO]: Memory report (%s)\n%s" % (self.resident.level, memreport.report()))
+        return False
+
+    def update_stall_counter(self):
+        self.label_stalls.set_markup("<small>%s</small>" % self.watchdog.summary())
+        return True
+
+    def on_settings_clicked(self, widget):
+        self.toggle_popover()
+
+    def toggle_popover(self):
+        if self.popover.get_visible():
+            self.popover.hide()
+        else:
+            self.popover.show_all()
+
+    def file_check(self, path):
+        if os.path.isfile(path):
+            return True
+        return False
+
+    def on_mirror_clicked(self, widget):
+        self.run_operation("mirrors", self.mirror_update, "The mirrors are already being updated")
+
+    def on_mirror_rollback_clicked(self, widget):
+        self.run_operation("mirrors", self.mirror_rollback, "The mirrors are already being updated")
+
+    def run_operation(self, key, target, busy_message, *args):
+        """
+        Starts target(operation, *args) through the registry shared with the D-Bus
+        service, or tells the user the same operation is already running.
+
+        Returns:
+            bool: True when the operation was started.
+        """
+        operation, started = self.operations.run(key, target, *args)
+        if not started:
+            print("[INFO]: %s (%s)" % (busy_message, operation))
+            self.label_notify.set_name("label_style")
+            self.label_notify.show()
+            self.label_notify.set_markup("<span foreground='yellow'>%s</span>" % GLib.markup_escape_text(busy_message))
+        return started
+
+    def on_operation_event(self, event, operation, key, *values):
+        # any thread, also for operations started over D-Bus
+        if key == "mirrors" and event in ("started", "completed"):
+            running = event == "started"
+            GLib.idle_add(self.button_mirrors.set_sensitive, not running)
+            GLib.idle_add(self.button_mirrors_rollback.set_sensitive, not running)
+            if not running:
+                GLib.idle_add(self.button_mirrors_rollback.set_visible, mirrors.has_previous())
+        elif key is not None and key.startswith("tool:") and event == "completed":
+            package = key.split(":", 1)[1]
+            GLib.idle_add(self.update_tool_status, {package: package in packages.installed_packages([package])})
+
+    def on_update_clicked(self, widget):
+        print("Clicked")
+
+    def convert_to_hex(self, rgba_color):
+        red = int(rgba_color.red * 255)
+        green = int(rgba_color.green * 255)
+        blue = int(rgba_color.blue * 255)
+        return "#{r:02x}{g:02x}{b:02x}".format(r=red, g=green, b=blue)
+
+    def pacman_lockfile_dialog(self):
+        # Dialog warning about a running pacman process, meant to be yielded from an async handler
+        print(f"[ERROR]: Pacman lockfile found {self.pacman_lockfile}, is another pacman process running?")
+        return message_dialog(
+            self,
+            f"Pacman lockfile found {self.pacman_lockfile}, is another pacman process running?",
+        )
+
+    def highlight_install_button(self, widget, name, markup):
+        # Update the button's style and label to reflect the enabled state
+        widget.set_name(name)
+        widget.get_child().set_markup(markup)
+
+        # Retrieve the selected background color from the theme
+        selected_bg_color = widget.get_style_context().lookup_color("theme_selected_bg_color")
+        if selected_bg_color[0]:  # If the color is successfully retrieved
+            # Convert the Gdk.Color to HEX format for custom CSS
+            theme_bg_hex_color = self.convert_to_hex(selected_bg_color[1])
+            custom_css = css.replace("@theme_base_color_button", theme_bg_hex_color)
+            self.style_provider.load_from_data(custom_css, len(custom_css))
+
+    @async_handler
+    def on_easy_install_clicked(self, widget):
+        """
+        Handles the "Easy Install" button click. Configures offline installation settings 
+        and launches the appropriate installer based on system state.
+        """
+        # Check if the Pacman lockfile exists (on a worker, the live medium can be slow)
+        locked = yield lambda: os.path.exists(self.pacman_lockfile)
+        if locked:
+            yield self.pacman_lockfile_dialog()
+            return
+
+        if self.media_verified is False:
+            response = yield message_dialog(
+                self,
+                "The installation medium failed verification",
+                "An offline installation copies everything from this medium and will most likely fail.\n"
+                "Write the ISO to another USB stick, or continue anyway?",
+                buttons=[("Continue", 1), ("Cancel", 0)],
+            )
+            if response != 1:
+                return
+
+        self.highlight_install_button(
+            widget, "button_easy_install_enabled", self.install_button_markup("button_easy_install")
+        )
+
+        # Set the default style for the "Advanced Install" button
+        self.button_adv_install.set_name("button_adv_install")
+
+        # The offline installation needs no databases, leave the bandwidth to it
+        if self.db_warmer is not None:
+            self.db_warmer.stop()
+
+        # Copy the beginner settings and the packages configuration for offline mode
+        for app_cmd in install.mode_commands("offline"):
+            threading.Thread(target=self.run_staging, args=(app_cmd,), daemon=True).start()
+
+        # Check for EFI bootloader support
+        efi_file_check = yield install.is_efi
+        if efi_file_check:
+            # If EFI is supported, display the bootloader selection dialog
+            md = MessageDialogBootloader(
+                title="Choose Bootloader",
+                install_method="Offline Installation",
+                pacman_lockfile=self.pacman_lockfile,
+                run_app=self.run_staging,
+                launch_installer=self.launch_installer,
+            )
+            md.show_all()
+        else:
+            # Launch the Calamares installer directly if not an EFI system
+            self.launch_installer()
+
+    @async_handler
+    def on_adv_install_clicked(self, widget):
+        """
+        Handles the "Advanced Install" button click. Configures online installation settings 
+        and launches the appropriate installer based on system state.
+        """
+        # Check if the Pacman lockfile exists (on a worker, the live medium can be slow)
+        locked = yield lambda: os.path.exists(self.pacman_lockfile)
+        if locked:
+            yield self.pacman_lockfile_dialog()
+            return
+
+        self.highlight_install_button(
+            widget, "button_adv_install_enabled", self.install_button_markup("button_adv_install")
+        )
+
+        # Reset the style for the "Easy Install" button
+        self.button_easy_install.set_name("button_easy_install")
+
+        # Copy the advanced settings and the system update configuration for online mode
+        for app_cmd in install.mode_commands("online"):
+            threading.Thread(target=self.run_staging, args=(app_cmd,), daemon=True).start()
+
+        # Check for EFI bootloader support
+        efi_file_check = yield install.is_efi
+        if efi_file_check:
+            # If EFI is supported, display the bootloader selection dialog
+            md = MessageDialogBootloader(
+                title="Choose Bootloader",
+                install_method="Online Installation",
+                pacman_lockfile=self.pacman_lockfile,
+                run_app=self.run_staging,
+                launch_installer=self.launch_online_installer,
+            )
+            md.show_all()
+        else:
+            # Launch the Calamares installer directly if not an EFI system
+            self.launch_online_installer()
+
+    def install_button_markup(self, name):
+        # Label of an install button including its estimated duration, once known
+        title = {
+            "button_easy_install": "Offline Installation",
+            "button_adv_install": "Online Installation",
+        }[name]
+        markup = "<span size='large'>%s</span>" % title
+        if name in self.install_estimates:
+            markup += "\n<small>%s</small>" % self.install_estimates[name]
+        return markup
+
+    def estimate_install_time(self):
+        """
+        Estimates the duration of both installation methods from the sync databases and
+        a short bandwidth probe of the top mirror. Runs on a worker once online.
+        """
+        self.package_index_loaded.wait()
+        if self.package_index is None:
+            return
+        try:
+            result = estimator.estimate(self.package_index)
+        except Exception as e:
+            print("[ERROR]: Exception in estimate_install_time(): %s" % e)
+            return
+        GLib.idle_add(self.show_install_estimates, result)
+
+    def show_install_estimates(self, result):
+        self.install_estimates["button_easy_install"] = estimator.format_duration(result["offline"])
+        if result["online"] is not None:
+            self.install_estimates["button_adv_install"] = "%s, %s to download" % (
+                estimator.format_duration(result["online"]),
+                packages.format_size(result["download_size"]),
+            )
+        if result["recommend_offline"]:
+            self.install_estimates["button_easy_install"] += " (recommended)"
+
+        tooltips = {
+            "button_easy_install": "No internet connection required\nEstimated: %s"
+            % self.install_estimates["button_easy_install"],
+            "button_adv_install": "Internet connection required!\n%d updated packages (%s)\nEstimated: %s"
+            % (
+                result["download_count"],
+                packages.format_size(result["download_size"]),
+                self.install_estimates.get("button_adv_install", "unknown, the mirror could not be reached"),
+            ),
+        }
+        for name, button in (
+            ("button_easy_install", self.button_easy_install),
+            ("button_adv_install", self.button_adv_install),
+        ):
+            button.get_child().set_markup(self.install_button_markup(name))
+            button.disconnect_by_func(self.tooltip_callback)
+            button.connect("query-tooltip", self.tooltip_callback, tooltips[name])
+        return False
+
+    def start_warmup(self):
+        # (Re)start the installer warm-up unless it already ran to completion
+        if self.warmer is not None and (self.warmer.is_alive() or not self.warmer.cancelled.is_set()):
+            return False
+        if self.stack.get_visible_child() is not self.install_page:
+            return False
+        self.warmer = readahead.Warmer()
+        self.warmer.start()
+        return False
+
+    def on_stack_page_changed(self, stack, param):
+        if stack.get_visible_child() is self.install_page:
+            self.start_warmup()
+        elif self.warmer is not None and self.warmer.is_alive():
+            self.warmer.cancel()
+
+    def on_install_hover(self, widget, event):
+        self.start_warmup()
+        return False
+
+    def on_verify_clicked(self, widget):
+        # Second click cancels a running verification
+        if self.verifier is not None and self.verifier.is_alive():
+            self.verifier.cancel()
+            return
+        widget.set_label("Cancel verification")
+        self.label_notify.set_name("label_style")
+        self.label_notify.show()
+        self.label_notify.set_markup("<span foreground='cyan'><b>Verifying installation medium...</b></span>")
+        self.verifier = verify.MediaVerifier(
+            lambda done, total, rate: GLib.idle_add(self.show_verify_progress, done, total, rate),
+            lambda results: GLib.idle_add(self.show_verify_results, results),
+        )
+        self.verifier.start()
+
+    def show_verify_progress(self, done, total, rate):
+        self.label_notify.set_markup(
+            "<span foreground='cyan'><b>Verifying installation medium: %d%% at %s/s</b></span>"
+            % (done * 100 // max(total, 1), packages.format_size(rate))
+        )
+        return False
+
+    def show_verify_results(self, results):
+        self.button_verify.set_label("Verify media")
+        if results is None:
+            self.label_notify.set_markup("<span foreground='orange'><b>Verification cancelled</b></span>")
+            return False
+        for image, ok, message in results:
+            print("[%s]: %s: %s" % ("INFO" if ok else "ERROR", image, message))
+        self.media_verified = all(ok for image, ok, message in results)
+        if self.media_verified:
+            self.label_notify.set_markup("<span foreground='green'><b>Installation medium is OK</b></span>")
+        else:
+            self.label_notify.set_markup(
+                "<span foreground='red'><b>%s</b></span>"
+                % GLib.markup_escape_text(
+                    "\n".join(
+                        "%s: %s" % (os.path.basename(image), message)
+                        for image, ok, message in results
+                        if not ok
+                    )
+                )
+            )
+        return False
+
+    @async_handler
+    def on_benchmark_clicked(self, widget):
+        """
+        Benchmarks a mounted partition picked by the user and warns when installing
+        to it would take very long.
+        """
+        chooser = Gtk.FileChooserDialog(
+            title="Choose a folder on the target partition",
+            parent=self,
+            action=Gtk.FileChooserAction.SELECT_FOLDER,
+        )
+        chooser.add_buttons("Cancel", Gtk.ResponseType.CANCEL, "Benchmark", Gtk.ResponseType.OK)
+        chooser.set_current_folder("/mnt" if os.path.isdir("/mnt") else GUI.home)
+        response = yield chooser
+        folder = chooser.get_filename()
+        if response != Gtk.ResponseType.OK or not folder:
+            return
+
+        try:
+            result = yield lambda: diskbench.run(folder)
+        except OSError as e:
+            yield message_dialog(self, "Benchmark failed", GLib.markup_escape_text(str(e)), title="Disk benchmark")
+            return
+
+        install_size = yield estimator.installed_size
+        assumed = install_size is None
+        if assumed:
+            install_size = estimator.DEFAULT_INSTALLED_SIZE
+        seconds = diskbench.install_seconds(result, install_size)
+        text = "%s\n\nEstimated install time: %s" % (
+            diskbench.summary(result),
+            estimator.format_duration(seconds),
+        )
+        if assumed:
+            text += " (no live image found, assuming %s installed)" % packages.format_size(install_size)
+        slow = seconds > diskbench.SLOW_INSTALL_SECONDS
+        if slow:
+            text += "\n\n<b>This disk is very slow, consider installing to a faster disk.</b>"
+        yield message_dialog(
+            self,
+            "Disk benchmark of %s" % folder,
+            text,
+            message_type=Gtk.MessageType.WARNING if slow else Gtk.MessageType.INFO,
+            title="Disk benchmark",
+        )
+
+    def scan_tools(self):
+        # One pass over the local pacman database for every catalog tool, runs on a worker
+        installed = packages.installed_packages(tool.package for tool in catalog.TOOLS)
+        GLib.idle_add(
+            self.update_tool_status,
+            {tool.package: tool.package in installed for tool in catalog.TOOLS},
+        )
+
+    def update_tool_status(self, status):
+        self.tool_status.update(status)
+        for package, button in self.tool_buttons.items():
+            button.set_label(catalog.get_tool(package).label(self.tool_status.get(package)))
+        if self.load_setting("prefetch", "False") == "True":
+            self.start_prefetch()
+        return False
+
+    def start_prefetch(self):
+        """
+        Starts downloading the packages of uninstalled tools offered in this session.
+        Opt-in through the "prefetch" setting, only once the status scan is known.
+        """
+        if self.prefetcher is not None and self.prefetcher.is_alive():
+            return
+        missing = [
+            package
+            for package, installed in self.tool_status.items()
+            if installed is False and package in self.tool_buttons
+        ]
+        if not missing:
+            return
+        self.prefetcher = prefetch.Prefetcher(
+            missing,
+            self.is_connected,
+            self.pacman_lockfile,
+            rate_limit=int(self.load_setting("prefetch_rate", str(512 * 1024))),
+        )
+        self.prefetcher.start()
+
+    def prefetch_toggle(self, widget):
+        self.save_setting("prefetch", widget.get_active())
+        if widget.get_active():
+            self.start_prefetch()
+        elif self.prefetcher is not None:
+            self.prefetcher.stop()
+            self.prefetcher = None
+
+    def start_peer_discovery(self):
+        try:
+            self.peer_discovery = lancache.PeerDiscovery(on_expire=self.on_peers_expired)
+        except OSError as e:
+            print("[ERROR]: LAN package cache discovery unavailable: %s" % e)
+            return
+        self.peer_discovery.start()
+        if self.load_setting("lan_cache", "False") == "True":
+            self.start_cache_server()
+
+    def start_cache_server(self):
+        """
+        Shares the local package cache with LAN peers, opt-in through the "lan_cache" setting.
+        """
+        if self.cache_server is not None or self.peer_discovery is None:
+            return
+        try:
+            self.cache_server = lancache.CacheServer()
+        except OSError as e:
+            print("[ERROR]: Cannot share the package cache: %s" % e)
+            return
+        self.cache_server.start()
+        self.peer_discovery.server_port = self.cache_server.port
+
+    def lan_cache_toggle(self, widget):
+        self.save_setting("lan_cache", widget.get_active())
+        if widget.get_active():
+            self.start_cache_server()
+        elif self.cache_server is not None:
+            self.peer_discovery.server_port = None
+            server, self.cache_server = self.cache_server, None
+            # shutdown() waits for the serve loop to notice, keep it off the main thread
+            threading.Thread(target=lambda: (server.shutdown(), server.server_close()), daemon=True).start()
+
+    def on_peers_expired(self, peers):
+        # peers that went away are dead mirrors for pacman, a mirror update in progress
+        # writes the peers it started with and the next expiry catches up
+        operation, started = self.operations.run("mirrors", self.mirror_drop_peers, peers)
+        if not started:
+            print("[INFO]: Mirrors busy (%s), expired LAN peers stay listed for now" % operation)
+
+    @async_handler
+    def on_tool_clicked(self, widget, tool):
+        """
+        Handles a click on any catalog tool button. Launches the tool when it is installed,
+        otherwise offers to install it. The installed state comes from the startup scan,
+        only a click that beats the scan probes the local database (on a worker thread).
+
+        Args:
+            tool (catalog.Tool): The tool bound to the clicked button.
+        """
+        installed = self.tool_status.get(tool.package)
+        if installed is None:
+            installed = yield lambda: self.check_package_installed(tool.package)
+        if installed:
+            # Already installed, launch it in a separate thread
+            threading.Thread(target=self.run_app, args=(tool.app_cmd(),), daemon=True).start()
+            return
+
+        locked = yield lambda: os.path.exists(self.pacman_lockfile)
+        if locked:
+            yield self.pacman_lockfile_dialog()
+            return
+
+        # Ask the user whether the package should be installed
+        response = yield message_dialog(
+            self,
+            "%s was not found" % tool.package,
+            "Let Snigdha OS - Welcome install it?",
+            buttons=[("Yes", 1), ("No", 0)],
+        )
+        if response != 1:
+            return
+
+        # Packages pre-downloaded by the prefetcher are picked up through an extra cache dir
+        cachedir_args = yield prefetch.cachedir_args
+
+        # Install on a worker, unless a D-Bus EnsureTool is already installing it
+        if self.run_operation(
+            "tool:" + tool.package,
+            self.install_package,
+            "%s is already being installed" % tool.package,
+            tool.app_cmd(),
+            tool.pacman_cmd(cachedir_args),
+            tool.package,
+        ):
+            # Start the package queue checker in a separate thread
+            threading.Thread(target=self.check_package_queue, daemon=True).start()
+
+    def set_package_index(self, index):
+        # the search page is rebuilt after resident mode, it picks the index up itself then
+        if self.package_search is not None:
+            self.package_search.set_index(index)
+        return False
+
+    def load_package_index(self):
+        try:
+            index = syncdb.load()
+        except Exception as e:
+            print("[ERROR]: Exception in load_package_index(): %s" % e)
+            index = None
+        self.package_index = index
+        self.package_index_loaded.set()
+        GLib.idle_add(self.set_package_index, index)
+
+        # Resolve every conflict up front, the conflicts window only does lookups
+        try:
+            self.conflict_index = conflictindex.ConflictIndex(index)
+        except Exception as e:
+            print("[ERROR]: Failed to build the conflict index: %s" % e)
+
+    @async_handler
+    def on_package_install(self, widget, package):
+        """
+        Installs a package picked on the package search page.
+
+        Args:
+            package (str): Name of the package to install.
+        """
+        installed = yield lambda: self.check_package_installed(package)
+        if installed:
+            yield message_dialog(
+                self, "%s is already installed" % package, message_type=Gtk.MessageType.INFO, title="Packages"
+            )
+            return
+
+        locked = yield lambda: os.path.exists(self.pacman_lockfile)
+        if locked:
+            yield self.pacman_lockfile_dialog()
+            return
+
+        response = yield message_dialog(
+            self,
+            "Install %s?" % package,
+            message_type=Gtk.MessageType.QUESTION,
+            buttons=[("Yes", 1), ("No", 0)],
+            title="Packages",
+        )
+        if response != 1:
+            return
+
+        pacman_cmd = ["pkexec", "pacman"] + paths.pacman_args() + ["-S", package, "--noconfirm", "--needed"]
+        if self.run_operation(
+            "tool:" + package, self.install_package, "%s is already being installed" % package, None, pacman_cmd, package
+        ):
+            threading.Thread(target=self.check_package_queue, daemon=True).start()
+
+    def check_package_queue(self):
+        """
+        Waits for the result of install_package() and launches the freshly installed
+        application, or reports the failure. Runs on a worker thread.
+        """
+        while True:
+            item = self.pkg_queue.get()
+            if item is None:
+                break
+            status, app_cmd, package = item
+            if status == 0:
+                # the tool buttons are refreshed by on_operation_event()
+                # packages installed from the search page have nothing to launch
+                if app_cmd:
+                    threading.Thread(target=self.run_app, args=(app_cmd,), daemon=True).start()
+            else:
+                GLib.idle_add(
+                    show_message,
+                    self,
+                    "%s could not be installed" % package,
+                    "Check your internet connection and try again.",
+                )
+
+    def scan_live_packages(self):
+        # Runs on a worker, offers the cleanup button only when there is something to remove
+        self.live_package_sizes = cleanup.live_packages()
+        if self.live_package_sizes:
+            GLib.idle_add(
+                self.button_cleanup.set_label,
+                "Remove live packages (%s)"
+                % packages.format_size(sum(self.live_package_sizes.values())),
+            )
+            GLib.idle_add(self.button_cleanup.show)
+
+    @async_handler
+    def on_cleanup_clicked(self, widget):
+        """
+        Handles the "Remove live packages" button click. Confirms the package list and
+        the space to be freed, then removes everything in one pacman transaction.
+        """
+        locked = yield lambda: os.path.exists(self.pacman_lockfile)
+        if locked:
+            yield self.pacman_lockfile_dialog()
+            return
+
+        sizes = yield cleanup.live_packages
+        if not sizes:
+            widget.hide()
+            return
+
+        response = yield message_dialog(
+            self,
+            "Remove %d live ISO packages?" % len(sizes),
+            "%s\n\n<b>%s</b> will be freed."
+            % (
+                GLib.markup_escape_text(", ".join(sorted(sizes))),
+                packages.format_size(sum(sizes.values())),
+            ),
+            message_type=Gtk.MessageType.QUESTION,
+            buttons=[("Yes", 1), ("No", 0)],
+            title="Cleanup",
+        )
+        if response != 1:
+            return
+
+        removed = yield lambda: self.remove_live_packages(list(sizes))
+        if removed:
+            widget.hide()
+
+    def remove_live_packages(self, names):
+        """
+        Removes the given live-only packages in a single pacman transaction, streaming
+        pacman's output to the notification label. Runs on a worker thread.
+
+        Args:
+            names (list): Names of the packages to remove.
+
+        Returns:
+            bool: True when none of the packages is installed anymore.
+        """
+        GLib.idle_add(self.label_notify.set_name, "label_style")
+        GLib.idle_add(self.label_notify.show)
+
+        def on_line(line):
+            print(line.strip())
+            GLib.idle_add(
+                self.label_notify.set_markup,
+                "<span foreground='orange'><b>%s</b></span>" % GLib.markup_escape_text(line.strip()),
+            )
+
+        packages.run_pacman(cleanup.pacman_cmd(names), on_line)
+
+        # one scan of the local database confirms the whole transaction
+        remaining = packages.installed_packages(names)
+        if not remaining:
+            print("[INFO]: Removed live packages %s" % " ".join(names))
+            GLib.idle_add(
+                self.label_notify.set_markup,
+                "<span foreground='orange'><b>Live packages removed</b></span>",
+            )
+            return True
+
+        print("[ERROR]: Pacman failed to remove %s" % " ".join(sorted(remaining)))
+        GLib.idle_add(
+            self.label_notify.set_markup,
+            "<span foreground='red'><b>Failed to remove live packages</b></span>",
+        )
+        return False
+
+    def on_pacman_line(self, operation, line):
+        print(line)
+        self.operations.progress(operation, line)
+
+    def install_package(self, operation, app_cmd, pacman_cmd, package):
+        """
+        Runs the pacman command of package on a worker, as operation of the registry.
+
+        Returns:
+            tuple: (installed, message)
+        """
+        installed = False
+        try:
+            # Set the label style for notifications
+            self.label_notify.set_name("label_style")
+            
+            # Update the notification label to show the package being installed
+            GLib.idle_add(
+                self.label_notify.set_markup,
+                "<span foreground='cyan'><b>Installing %s</b></span>" % package,
+            )
+            
+            # Run the pacman command to install the package, timed until it shows up as installed
+            with self.metrics.measure("tool_install") as measurement:
+                packages.run_pacman(pacman_cmd, lambda line: self.on_pacman_line(operation, line))
+                installed = self.check_package_installed(package)
+                measurement.outcome = "ok" if installed else "failed"
+
+            # Check if the package was successfully installed
+            if installed:
+                # Notify success: Add the installation task to the queue
+                self.pkg_queue.put((0, app_cmd, package))
+                print("[INFO]: Pacman package install completed")
+                
+                # Update the notification label to show package installation success
+                self.label_notify.set_name("label_style")
+                GLib.idle_add(self.label_notify.show)
+                GLib.idle_add(
+                    self.label_notify.set_markup,
+                    "<span foreground='purple'><b>Package %s installed</b></span>" % package,
+                )
+                GLib.idle_add(self.label_notify.hide)  # Hide the notification after a short time
+            else:
+                # Notify failure: Add the installation failure task to the queue
+                self.pkg_queue.put((1, app_cmd, package))
+                print("[ERROR]: Pacman package install failed")
+                
+                # Update the notification label to show installation failure
+                self.label_notify.set_name("label_style")
+                GLib.idle_add(self.label_notify.show)
+                GLib.idle_add(
+                    self.label_notify.set_markup,
+                    "<span foreground='orange'><b>Package %s install failed</b></span>" % package,
+                )
+                GLib.idle_add(self.label_notify.hide)  # Hide the notification after a short time
+        except subprocess.CalledProcessError as e:
+            # Catch specific error for subprocess-related issues and notify the user
+            print(f"[ERROR]: Subprocess failed during package installation: {e}")
+            self.label_notify.set_name("label_style")
+            GLib.idle_add(self.label_notify.show)
+            GLib.idle_add(
+                self.label_notify.set_markup,
+                "<span foreground='red'><b>Package install failed (subprocess error)</b></span>",
+            )
+        except Exception as e:
+            # Catch any other general exceptions and notify the user
+            print("[ERROR]: Exception in install_package(): %s" % e)
+            self.label_notify.set_name("label_style")
+            GLib.idle_add(self.label_notify.show)
+            GLib.idle_add(
+                self.label_notify.set_markup,
+                "<span foreground='red'><b>Package install failed (unknown error)</b></span>",
+            )
+        finally:
+            # Ensure that the package queue is always updated after the operation
+            self.pkg_queue.put(None)  # This can be used to signal the end of the task or stop the process
+        return installed, ("Package %s installed" if installed else "Package %s install failed") % package
+
+    def run_staging(self, app_cmd):
+        # Calamares configuration copies, timed as one "staging" operation each
+        with self.metrics.measure("staging") as measurement:
+            if self.run_app(app_cmd) is None:
+                measurement.outcome = "failed"
+
+    def launch_installer(self):
+        # removing the LAN peers from the mirrorlists may wait for pkexec
+        threading.Thread(target=self.start_installer, daemon=True).start()
+
+    def start_installer(self):
+        # time until Calamares is spawned, its own start-up is not visible from here
+        with self.metrics.measure("installer_launch"):
+            install.launch_installer(self.calamares_polkit)
+
+    def launch_online_installer(self):
+        # the swap runs sudo cp, keep it off the main thread
+        threading.Thread(target=self.swap_databases_and_launch, daemon=True).start()
+
+    def swap_databases_and_launch(self):
+        # Calamares syncs the databases first thing, hand it the warmed ones
+        warmer, self.db_warmer = self.db_warmer, None
+        if warmer is not None:
+            warmer.stop()
+            # the snapshot must not race a download that is still being written
+            warmer.join(dbwarm.STOP_TIMEOUT)
+            if warmer.is_alive():
+                print("[INFO]: Database warm-up still busy, the installer syncs on its own")
+            else:
+                for app_cmd in warmer.swap_commands():
+                    self.run_app(app_cmd)
+        self.start_installer()
+
+    def run_app(self, app_cmd):
+        try:
+            # Run the application command with subprocess.run() and capture stdout and stderr
+            process = subprocess.run(
+                app_cmd,
+                shell=False,  # Avoid shell injection
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,  # Capture stderr separately
+                universal_newlines=True,  # Ensure output is decoded as text
+                check=True  # Raise CalledProcessError if command returns non-zero exit code
+            )
+
+            # Debugging: Print stdout to console if debugging is enabled
+            if GUI.debug:
+                print(process.stdout)
+
+            return process.stdout  # Return the output
+
+        except subprocess.CalledProcessError as e:
+            # Handle errors in case the command fails (non-zero exit code)
+            if GUI.debug:
+                print(f"Error executing command: {e}")
+            return None  # Return None on failure
+
+        except Exception as e:
+            # Catch any other exceptions
+            if GUI.debug:
+                print(f"Unexpected error: {e}")
+            return None
+
+    def startup_toggle(self, widget):
+        try:
+            # Check if the toggle button is active
+            if widget.get_active():
+                # If active, copy the .desktop file to autostart location
+                if os.path.isfile(GUI.dot_desktop):
+                    shutil.copy(GUI.dot_desktop, GUI.autostart)
+                    print(f"[INFO]: {GUI.dot_desktop} copied to {GUI.autostart}")
+            else:
+                # If inactive, remove the autostart file if it exists
+                if os.path.isfile(GUI.autostart):
+                    os.unlink(GUI.autostart)
+                    print(f"[INFO]: {GUI.autostart} removed")
+            
+            # Save the settings based on the widget state (active or not)
+            self.save_settings(widget.get_active())
+
+        except Exception as e:
+            # Log any errors that occur during the operation
+            print(f"[ERROR]: Error in startup_toggle: {e}")
+
+    def save_settings(self, state):
+        # Save the autostart state
+        self.save_setting("autostart", state)
+
+    def load_settings(self):
+        # Autostart state as "True"/"False", defaults to "True"
+        return self.load_setting("autostart", "True")
+
+    def read_settings(self):
+        return settings.read()
+
+    def load_setting(self, key, default):
+        return settings.load(key, default)
+
+    def save_setting(self, key, value):
+        settings.save(key, value)
+
+    def on_link_clicked(self, widget, link):
+        t = threading.Thread(target=self.weblink, args=(link,))
+        t.daemon = True
+        t.start()
+
+    def on_social_clicked(self, widget, event, link):
+        t = threading.Thread(target=self.weblink, args=(link,))
+        t.daemon = True
+        t.start()
+
+    def on_conflicts_clicked(self, selected):
+        # Only one conflicts window at a time, reopening shows the current selection
+        if self.conflicts_window is not None:
+            self.conflicts_window.destroy()
+        self.conflicts_window = conflicts.Conflicts(self.conflict_index, selected)
+        self.conflicts_window.connect("destroy", self.on_conflicts_destroyed)
+        self.conflicts_window.show_all()
+
+    def on_conflicts_destroyed(self, window):
+        if self.conflicts_window is window:
+            self.conflicts_window = None
+
+    def weblink(self, link):
+        # webbrowser.open_new_tab(link)
+        try:
+            # use xdg-open to use the default browser to open the weblink
+            subprocess.Popen(
+                ["xdg-open", link],
+                shell=False,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+            )
+        except Exception as e:
+            print("Exception in opening weblink(): %s" % e)
+
+    def is_connected(self):
+        with self.metrics.measure("connectivity") as measurement:
+            connected = network.is_connected()
+            measurement.outcome = "ok" if connected else "offline"
+        return connected
+
+    def tooltip_callback(self, widget, x, y, keyboard_mode, tooltip, text):
+        tooltip.set_text(text)
+        return True
+
+    def internet_notifier(self):
+        bb = 0
+        dis = 0
+        while True:
+            self.monitors_resumed.wait()
+            connected = self.is_connected()
+            if not connected:
+                dis = 1
+                GLib.idle_add(self.button_mirrors.set_sensitive, False)
+                self.label_notify.set_name("label_style")
+                GLib.idle_add(
+                    self.label_notify.set_markup,
+                    f"<span foreground='yellow'><b>No internet!</b>\n"
+                    f"Snigdha OS will <b>not</b> install any additional packages!</span>",
+                )  # noqa
+            else:
+                self.label_notify.set_name("")
+                if not self.estimate_started:
+                    # first time online, estimate both installation methods
+                    self.estimate_started = True
+                    threading.Thread(target=self.estimate_install_time, daemon=True).start()
+                    # databases and keyrings for the online installation, at low priority
+                    self.db_warmer = dbwarm.DatabaseWarmer()
+                    self.db_warmer.start()
+                if bb == 0 and dis == 1:
+                    GLib.idle_add(self.button_mirrors.set_sensitive, True)
+                    GLib.idle_add(self.label_notify.set_text, "")
+                    bb = 1
+            sleep(3)
+
+    def check_package_installed(self, package):
+        # Reads the local pacman database instead of spawning "pacman -Qi"
+        return package in packages.installed_packages([package])
+        
+    def mirror_update(self, operation):
+        colors = {"info": "cyan", "warning": "yellow", "error": "red"}
+
+        def on_status(message, level):
+            self.operations.progress(operation, message)
+            GLib.idle_add(
+                self.label_notify.set_markup,
+                f"<span foreground='{colors[level]}'>{GLib.markup_escape_text(message)}</span>",
+            )
+
+        peers = self.peer_discovery.peers() if self.peer_discovery is not None else []
+        with self.metrics.measure("mirrors") as measurement:
+            updated, summary = mirrors.update(on_status, peers)
+            measurement.outcome = "ok" if updated else "failed"
+        if updated:
+            # median latency of the top mirrors before -> after
+            GLib.idle_add(
+                self.label_notify.set_markup,
+                "<b>Mirrorlist updated</b>\n%s" % GLib.markup_escape_text(summary),
+            )
+        return updated, summary
+
+    def mirror_drop_peers(self, operation, peers):
+        messages = []
+
+        def on_status(message, level):
+            messages.append(message)
+            self.operations.progress(operation, message)
+
+        dropped = mirrors.drop_peers(peers, on_status)
+        return dropped, "\n".join(messages)
+
+    def mirror_rollback(self, operation):
+        messages = []
+
+        def on_status(message, level):
+            messages.append(message)
+            self.operations.progress(operation, message)
+
+        rolled_back = mirrors.rollback(on_status)
+        if rolled_back:
+            GLib.idle_add(self.label_notify.set_markup, "<b>%s</b>" % GLib.markup_escape_text("\n".join(messages)))
+        else:
+            GLib.idle_add(
+                self.label_notify.set_markup,
+                "<span foreground='red'>%s</span>" % GLib.markup_escape_text("\n".join(messages)),
+            )
+        return rolled_back, "\n".join(messages)
+
+    def MessageBox(self, title, message):
+        # Non-blocking, the dialog destroys itself on response
+        show_message(self, title, message, message_type=Gtk.MessageType.INFO, title=title)
+
+def main():
+    w = Main()
+    w.connect("delete-event", Gtk.main_quit)
+    w.show_all()
+    Gtk.main()
+    # operations timed right before quitting are still queued for the journal
+    w.metrics.flush()
+    if w.memory_report:
+        print("[INFO]: Memory report at exit\n%s" % memreport.report())
+
+
+if __name__ == "__main__":
+    main()